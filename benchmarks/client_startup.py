@@ -0,0 +1,62 @@
+"""Startup benchmark for YouTube API client construction.
+
+    uv run python benchmarks/client_startup.py [clients]
+
+Times how long a fresh client takes to produce its first request object
+(playlistItems.list), building the service with googleapiclient's build()
+and by copying sortarr's process-cached service template. The first cached
+client pays the one-off parse and build; later ones only copy the template
+and create their own transport.
+"""
+
+import sys
+import time
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from sortarr.core.youtube import YouTubeAPIClient, service_template
+
+
+def _credentials() -> Credentials:
+    return Credentials(
+        token="benchmark",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="id",
+        client_secret="secret",
+    )
+
+
+def _first_request(service) -> None:
+    service.playlistItems().list(part="snippet", playlistId="PL", maxResults=50)
+
+
+def _time(fn, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        fn()
+    return (time.perf_counter() - start) / runs * 1000
+
+
+def main() -> None:
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    credentials = _credentials()
+
+    def _built():
+        _first_request(build("youtube", "v3", credentials=credentials))
+
+    def _cached():
+        client = YouTubeAPIClient(credentials=credentials)
+        _first_request(client.service)
+        client.close()
+
+    cold = _time(_cached, 1)
+    assert service_template.cache_info().currsize == 1
+    print(f"clients={runs}")
+    print(f"{'build()':>16}: {_time(_built, runs):8.2f} ms/client")
+    print(f"{'cached, first':>16}: {cold:8.2f} ms")
+    print(f"{'cached':>16}: {_time(_cached, runs):8.2f} ms/client")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Micro-benchmark for the title-similarity distance backends.
+
+    uv run python benchmarks/title_similarity.py [corpus_size]
+
+Times title_similarity() and TitleSimilarityIndex.find() against a corpus
+built from tests/fixtures/titles.txt, once per available backend.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+from sortarr.filters.title_similarity import (
+    DISTANCE_BACKENDS,
+    TitleSimilarityIndex,
+    set_distance_backend,
+    title_similarity,
+)
+
+THRESHOLD = 80
+QUERIES = 200
+
+
+def _corpus(size: int) -> list[tuple[str, str]]:
+    path = Path(__file__).parent.parent / "tests" / "fixtures" / "titles.txt"
+    titles = [line for line in path.read_text().splitlines() if line]
+    return [
+        (f"v{i}", f"{titles[i % len(titles)]} {i // len(titles)}") for i in range(size)
+    ]
+
+
+def _time(fn, queries: list[str]) -> float:
+    start = time.perf_counter()
+    for title in queries:
+        fn(title)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    corpus = _corpus(size)
+    queries = [f"{title} (new)" for _, title in corpus[:QUERIES]]
+    index = TitleSimilarityIndex(corpus)
+    print(f"corpus={size} queries={len(queries)} threshold={THRESHOLD}")
+    for name in DISTANCE_BACKENDS:
+        set_distance_backend(name)
+        linear = _time(lambda t: title_similarity(t, corpus, THRESHOLD), queries)
+        indexed = _time(lambda t: index.find(t, THRESHOLD), queries)
+        print(
+            f"{name:>12}: linear {linear:8.2f} ms/query   index {indexed:8.2f} ms/query"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,8 +11,9 @@ from sortarr.config import load_settings, Settings
 from google.auth.transport.requests import Request
 from sortarr.core.youtube import YouTubeAPIClient
 from sortarr.core.auth import load_credentials
+from sortarr.core.client_pool import ClientPool
 from sortarr.core.scheduler import PipelineScheduler
-from sortarr.core.pipeline_runner import execute_pipeline
+from sortarr.core.pipeline_runner import drain_insert_outbox, execute_pipeline
 from sortarr.core.playlist_tracker import PlaylistTracker
 from sortarr.db.migrations import init_db
 from sortarr.db.repository import config as repo
@@ -39,6 +40,8 @@ class AppState:
         self.credentials = None
         self.youtube: YouTubeAPIClient | None = None
         self.scheduler: PipelineScheduler | None = None
+        # API transports shared by background jobs, sized by pipeline_concurrency
+        self.clients = ClientPool()
 
 
 @asynccontextmanager
@@ -52,7 +55,8 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
     if db_dir:
         os.makedirs(db_dir, exist_ok=True)
 
-    init_db(db_path)
+    if not init_db(db_path):
+        raise RuntimeError(f"Failed to initialize database {db_path}")
     state.db_con = sqlite3.connect(db_path)
     state.db_con.row_factory = sqlite3.Row
 
@@ -81,13 +85,18 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
         "compare_distance",
         "credentials_file",
         "reprocess_days",
-        "playlist_sleep",
-        "subscription_sleep",
+        "insert_rate_per_minute",
+        "list_rate_per_second",
         "pipeline_concurrency",
         "activity_limit",
         "subscription_limit",
         "log_level",
         "published_after",
+        "discovery_mode",
+        "evaluation_mode",
+        "insert_mode",
+        "video_metadata_ttl_days",
+        "quota_daily_budget",
         "no_webbrowser",
         "public_url",
     ]:
@@ -107,6 +116,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
             env_val = getattr(state.settings, key)
             if env_val is not None:
                 repo.set_config(state.db_con, key, str(env_val))
+    state.clients.size = state.settings.pipeline_concurrency
 
     # --- SCHEDULER WIRING ---
     # Only start scheduler if a cron is set and credentials are valid
@@ -122,6 +132,9 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
         async def pipeline_callback():
             await execute_pipeline(state, trigger="auto")
 
+        async def outbox_callback():
+            await drain_insert_outbox(state)
+
         async def playlist_tracker_callback():
             channel = state.db_con.execute("SELECT id FROM channel LIMIT 1").fetchone()
             cid = channel["id"] if channel else None
@@ -137,14 +150,14 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
             def _run():
                 tcon = sqlite3.connect(state.settings.database_file)
                 tcon.row_factory = sqlite3.Row
-                client = YouTubeAPIClient(credentials=state.credentials)
                 try:
-                    tracker = PlaylistTracker(client, tcon, cid)
+                    tracker = PlaylistTracker(
+                        state.youtube, tcon, cid, clients=state.clients
+                    )
                     result = tracker.run()
                     log.info("Playlist tracker result: %s", result)
                     return result
                 finally:
-                    client.close()
                     tcon.close()
 
             await asyncio.to_thread(_run)
@@ -162,6 +175,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
                 if playlist_tracker_cron and playlist_tracker_cron.strip() != ""
                 else None
             ),
+            outbox_fn=outbox_callback,
         )
         state.scheduler.start()
         log.info(f"PipelineScheduler started with cron: {state.settings.schedule}")
@@ -174,6 +188,7 @@ async def lifespan(app: FastAPI) -> AsyncIterator:
 
     if state.scheduler:
         state.scheduler.stop()
+    state.clients.close()
     if state.youtube:
         state.youtube.close()
     if state.db_con:
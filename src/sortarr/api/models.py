@@ -11,8 +11,8 @@ class ConfigResponse(BaseModel):
     schedule: str
     compare_distance: int
     reprocess_days: int
-    playlist_sleep: int
-    subscription_sleep: int
+    insert_rate_per_minute: int
+    list_rate_per_second: int
     pipeline_concurrency: int
     activity_limit: int
     subscription_limit: int
@@ -27,8 +27,8 @@ class ConfigUpdate(BaseModel):
     schedule: Optional[str] = None
     compare_distance: Optional[int] = Field(None, ge=0, le=100)
     reprocess_days: Optional[int] = Field(None, ge=0)
-    playlist_sleep: Optional[int] = Field(None, ge=0)
-    subscription_sleep: Optional[int] = Field(None, ge=0)
+    insert_rate_per_minute: Optional[int] = Field(None, ge=0)
+    list_rate_per_second: Optional[int] = Field(None, ge=0)
     pipeline_concurrency: Optional[int] = Field(None, ge=1, le=10)
     activity_limit: Optional[int] = Field(None, ge=0)
     subscription_limit: Optional[int] = Field(None, ge=0)
@@ -31,9 +31,11 @@ async def get_config(request: Request):
             _get_db_val(state, "compare_distance", s.compare_distance)
         ),
         reprocess_days=int(_get_db_val(state, "reprocess_days", s.reprocess_days)),
-        playlist_sleep=int(_get_db_val(state, "playlist_sleep", s.playlist_sleep)),
-        subscription_sleep=int(
-            _get_db_val(state, "subscription_sleep", s.subscription_sleep)
+        insert_rate_per_minute=int(
+            _get_db_val(state, "insert_rate_per_minute", s.insert_rate_per_minute)
+        ),
+        list_rate_per_second=int(
+            _get_db_val(state, "list_rate_per_second", s.list_rate_per_second)
         ),
         pipeline_concurrency=int(
             _get_db_val(state, "pipeline_concurrency", s.pipeline_concurrency)
@@ -62,6 +64,7 @@ async def update_config(update: ConfigUpdate, request: Request):
         if hasattr(s, k):
             setattr(s, k, v)
             repo.set_config(state.db_con, k, str(v))
+    state.clients.size = s.pipeline_concurrency
     return await get_config(request)
 
 
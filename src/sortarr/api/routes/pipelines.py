@@ -12,6 +12,7 @@ from sortarr.api.models import (
     PlaylistResponse,
 )
 from sortarr.api.deps import get_state, require_youtube
+from sortarr.filters.word_filter import invalidate_word_matchers
 from sortarr.db.repository import (
     pipeline as pl,
     ignore_lists as il,
@@ -193,6 +194,7 @@ async def update_ignore_list(list_id: str, body: IgnoreListCreate, request: Requ
 async def delete_ignore_list(list_id: str, request: Request):
     state = _get_state(request)
     il.delete_ignore_list(state.db_con, list_id)
+    invalidate_word_matchers(list_id)
 
 
 @router.post("/ignore-lists/{list_id}/entries", status_code=201)
@@ -207,6 +209,7 @@ async def add_ignore_list_entry(
     ok = il.add_ignore_list_entry(state.db_con, eid, list_id, body.value)
     if not ok:
         raise HTTPException(status_code=500, detail="Failed to add entry")
+    invalidate_word_matchers(list_id)
     return {"id": eid, "value": body.value}
 
 
@@ -214,6 +217,7 @@ async def add_ignore_list_entry(
 async def remove_ignore_list_entry(list_id: str, entry_id: str, request: Request):
     state = _get_state(request)
     il.remove_ignore_list_entry(state.db_con, entry_id)
+    invalidate_word_matchers(list_id)
 
 
 @router.get("/playlists", response_model=List[PlaylistResponse])
@@ -240,21 +244,25 @@ async def list_playlists(request: Request):
 
 @router.get("/videos/{video_id}")
 async def get_video_by_id(video_id: str, request: Request):
-    """Look up video details by YouTube video ID across all pipelines."""
+    """Look up video details by YouTube video ID across all pipelines.
+    Top-level fields describe the latest placement; placements lists all."""
     state = _get_state(request)
-    result = v.get_video_by_id(state.db_con, video_id)
-    if not result:
+    rows = v.get_video_by_id(state.db_con, video_id)
+    if not rows:
         raise HTTPException(status_code=404, detail="Video not found in database")
-    return {
-        "video_id": video_id,
-        "title": result.get("title"),
-        "timestamp": result.get("timestamp"),
-        "subscription_id": result.get("subscriptionId"),
-        "playlist_id": result.get("playlistId"),
-        "duration_seconds": result.get("duration_seconds"),
-        "route_rule": result.get("route_rule"),
-        "pipeline_id": result.get("pipeline_id"),
-    }
+    placements = [
+        {
+            "pipeline_id": r.get("pipeline_id"),
+            "title": r.get("title"),
+            "timestamp": r.get("timestamp"),
+            "subscription_id": r.get("subscriptionId"),
+            "playlist_id": r.get("playlistId"),
+            "duration_seconds": r.get("duration_seconds"),
+            "route_rule": r.get("route_rule"),
+        }
+        for r in rows
+    ]
+    return {"video_id": video_id, **placements[-1], "placements": placements}
 
 
 @router.get("/videos/{video_id}/runs")
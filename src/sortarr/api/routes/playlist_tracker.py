@@ -2,7 +2,6 @@ import logging
 from fastapi import APIRouter, HTTPException, Request
 from sortarr.api.deps import get_state, require_youtube
 from sortarr.core.playlist_tracker import PlaylistTracker
-from sortarr.core.youtube import YouTubeAPIClient
 
 log = logging.getLogger("sortarr.api.playlist_tracker")
 router = APIRouter()
@@ -28,12 +27,10 @@ async def trigger_playlist_tracker(request: Request):
     def _run():
         tcon = sqlite3.connect(state.settings.database_file)
         tcon.row_factory = sqlite3.Row
-        client = YouTubeAPIClient(credentials=state.credentials)
         try:
-            tracker = PlaylistTracker(client, tcon, channel_id)
+            tracker = PlaylistTracker(youtube, tcon, channel_id, clients=state.clients)
             return tracker.run()
         finally:
-            client.close()
             tcon.close()
 
     result = await asyncio.to_thread(_run)
@@ -22,7 +22,7 @@ async def get_subscription_stats(request: Request):
             """
             SELECT v.subscriptionId,
                    COALESCE(s.title, v.subscriptionId) AS title,
-                   COUNT(v.videoId) AS videos_added,
+                   COUNT(DISTINCT v.videoId) AS videos_added,
                    MAX(v.timestamp) AS last_added_at,
                    COALESCE(s.added_to_playlist_count, 0) AS added_to_playlist_count
             FROM videos v
@@ -1,8 +1,8 @@
 import logging
 
 from pydantic_settings import BaseSettings
-from pydantic import Field
-from typing import Optional
+from pydantic import Field, model_validator
+from typing import Literal, Optional
 
 log = logging.getLogger("sortarr.config")
 
@@ -23,15 +23,50 @@ class Settings(BaseSettings):
     log_file: str = Field(default="stream")
     compare_distance: int = Field(default=80, ge=0, le=100)
     reprocess_days: int = Field(default=2, ge=0)
-    playlist_sleep: int = Field(default=10, ge=0)
-    subscription_sleep: int = Field(default=30, ge=0)
+    insert_rate_per_minute: int = Field(default=6, ge=0)
+    list_rate_per_second: int = Field(default=10, ge=0)
     pipeline_concurrency: int = Field(default=1, ge=1, le=10)
     activity_limit: int = Field(default=0, ge=0)
     subscription_limit: int = Field(default=0, ge=0)
     published_after: Optional[str] = Field(default=None)
+    discovery_mode: Literal["uploads", "activities"] = Field(default="uploads")
+    evaluation_mode: Literal["single_pass", "per_pipeline"] = Field(
+        default="single_pass"
+    )
+    insert_mode: Literal["queued", "inline"] = Field(default="queued")
+    video_metadata_ttl_days: int = Field(default=30, ge=0)
+    quota_daily_budget: int = Field(default=10000, ge=0)
     no_webbrowser: bool = Field(default=False)
     public_url: str = Field(default="http://localhost:8080")
     playlist_tracker_schedule: str = Field(default="0 3 * * *")
+    # Deprecated: replaced by insert_rate_per_minute and the shared rate
+    # limiter. Still accepted so existing .env files keep loading.
+    playlist_sleep: Optional[int] = Field(default=None, ge=0)
+    subscription_sleep: Optional[int] = Field(default=None, ge=0)
+
+    @model_validator(mode="after")
+    def _map_deprecated_sleeps(self) -> "Settings":
+        if self.playlist_sleep is not None:
+            if "insert_rate_per_minute" in self.model_fields_set:
+                log.warning(
+                    "SORTARR_PLAYLIST_SLEEP is deprecated and ignored, "
+                    "SORTARR_INSERT_RATE_PER_MINUTE is set"
+                )
+            else:
+                rate = (
+                    max(1, round(60 / self.playlist_sleep))
+                    if self.playlist_sleep
+                    else 0
+                )
+                log.warning(
+                    "SORTARR_PLAYLIST_SLEEP is deprecated, use "
+                    "SORTARR_INSERT_RATE_PER_MINUTE=%d instead",
+                    rate,
+                )
+                self.insert_rate_per_minute = rate
+        if self.subscription_sleep is not None:
+            log.warning("SORTARR_SUBSCRIPTION_SLEEP is deprecated and ignored")
+        return self
 
 
 def load_settings() -> Settings:
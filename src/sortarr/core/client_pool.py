@@ -0,0 +1,80 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator
+from sortarr import metrics
+from sortarr.core.youtube import YouTubeAPIClient
+
+# Upper bound on pooled clients, whatever size is configured
+MAX_POOL_SIZE = 10
+
+
+class ClientPool:
+    """Bounds how many API transports sortarr drives at once, across jobs.
+
+    Workers check a client out for a unit of work and hand it back; a
+    client is only ever used by the thread holding it, since its httplib2
+    transport is not thread-safe. Clients are spawned from the source
+    client passed to checkout(), so they share its credentials (and their
+    refresh), quota ledger and rate limits, and up to size of them are kept
+    idle for reuse so their transports are not rebuilt. size may be changed
+    while clients are out; it applies to later checkouts."""
+
+    def __init__(self, size: int = 1):
+        self.size = size
+        self._cond = threading.Condition()
+        self._in_use = 0
+        self._idle: list[YouTubeAPIClient] = []
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def limit(self) -> int:
+        return min(max(1, self.size), MAX_POOL_SIZE)
+
+    @contextmanager
+    def checkout(self, youtube: YouTubeAPIClient) -> Iterator[YouTubeAPIClient]:
+        started = time.monotonic()
+        with self._cond:
+            while self._in_use >= self.limit:
+                self._cond.wait()
+            self._in_use += 1
+            metrics.clients_in_use.set(self._in_use)
+            client = self._take_idle(youtube)
+        metrics.client_checkout_wait_seconds.observe(time.monotonic() - started)
+        try:
+            if client is None:
+                client = youtube.spawn()
+            yield client
+        finally:
+            surplus = None
+            with self._cond:
+                self._in_use -= 1
+                metrics.clients_in_use.set(self._in_use)
+                if client is not None:
+                    if len(self._idle) < self.limit:
+                        self._idle.append(client)
+                    else:
+                        surplus = client
+                self._cond.notify()
+            if surplus is not None:
+                surplus.close()
+
+    def _take_idle(self, youtube: YouTubeAPIClient):
+        """An idle client sharing youtube's credentials. Idle clients holding
+        replaced credentials (e.g. after re-authorization) are closed."""
+        while self._idle:
+            client = self._idle.pop()
+            if client.credentials is youtube.credentials:
+                return client
+            client.close()
+        return None
+
+    def close(self) -> None:
+        """Close the idle clients."""
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for client in idle:
+            client.close()
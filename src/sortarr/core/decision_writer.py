@@ -0,0 +1,103 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from typing import Optional
+from sortarr.db.repository import pipeline_runs as pr
+
+log = logging.getLogger("sortarr.decision_writer")
+
+# A batch is written once this many decisions are waiting, or this many
+# seconds after its first one arrived, whichever comes first
+DECISION_BATCH_SIZE = 200
+DECISION_FLUSH_INTERVAL = 0.5
+
+
+class DecisionWriter:
+    """Run decisions and progress counters written by a background thread on
+    its own connection, so evaluation never waits on a commit.
+
+    Decisions are buffered and written in one transaction per batch, with
+    only the latest counters. close() writes whatever is still buffered."""
+
+    def __init__(
+        self,
+        database_file: str,
+        run_id: int,
+        batch_size: int = DECISION_BATCH_SIZE,
+        interval: float = DECISION_FLUSH_INTERVAL,
+    ):
+        self.database_file = database_file
+        self.run_id = run_id
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: queue.Queue = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._write, name="sortarr-decisions", daemon=True
+        )
+        self._thread.start()
+
+    def add(self, decision: dict, settles: bool = False) -> None:
+        """Queue a decision. With settles, it replaces the outcome of the
+        pending decision recorded earlier for the same pipeline and video."""
+        self._queue.put(("settled" if settles else "decisions", decision))
+
+    def progress(self, summary: dict) -> None:
+        self._queue.put(("summary", summary))
+
+    def close(self) -> None:
+        """Write what is still buffered and stop the thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def _write(self) -> None:
+        con = sqlite3.connect(self.database_file)
+        con.execute("PRAGMA journal_mode=WAL")
+        batch: dict = {"decisions": [], "settled": [], "summary": None}
+        deadline: Optional[float] = None
+        try:
+            while True:
+                timeout = None
+                if deadline is not None:
+                    timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = ()
+                if item is None:
+                    break
+                if item:
+                    kind, payload = item
+                    if kind == "summary":
+                        batch["summary"] = payload
+                    else:
+                        batch[kind].append(payload)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.interval
+                waiting = len(batch["decisions"]) + len(batch["settled"])
+                if deadline is not None and (
+                    waiting >= self.batch_size or time.monotonic() >= deadline
+                ):
+                    self._flush(con, batch)
+                    deadline = None
+            self._flush(con, batch)
+        finally:
+            con.close()
+
+    def _flush(self, con: sqlite3.Connection, batch: dict) -> None:
+        if batch["decisions"] or batch["settled"] or batch["summary"] is not None:
+            pr.write_run_progress(
+                con,
+                self.run_id,
+                batch["decisions"],
+                batch["settled"],
+                batch["summary"],
+            )
+        batch["decisions"], batch["settled"], batch["summary"] = [], [], None
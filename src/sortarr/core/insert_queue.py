@@ -0,0 +1,162 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+from googleapiclient.errors import HttpError
+from sortarr.core.youtube import TRANSIENT_STATUSES, YouTubeAPIClient
+from sortarr.models.pipeline import VideoResult
+
+log = logging.getLogger("sortarr.insert_queue")
+
+INSERT_ENDPOINT = "playlistItems.insert"
+# Attempts per insert, and the pause before each retry
+INSERT_ATTEMPTS = 3
+INSERT_RETRY_DELAYS = [2, 5]
+
+
+@dataclass
+class InsertJob:
+    """A playlist insert intent (an insert_outbox row) waiting to run. The
+    writer fills in the outcome; the submitting thread records it."""
+
+    intent: dict
+    result: Optional[VideoResult] = None  # the run decision it settles
+    added: bool = False
+    error: Optional[str] = None
+    quota_exhausted: bool = False
+    # An earlier attempt may have been applied: check the playlist first
+    verify: bool = False
+
+
+class InsertQueue:
+    """Playlist inserts drained by one writer thread at the client's insert
+    rate, so filter evaluation never waits on them.
+
+    Rate-limit and server errors are retried a few times. Finished jobs
+    come back through completed() in submission order, so the submitting
+    thread keeps sole ownership of the database connection."""
+
+    def __init__(
+        self,
+        youtube: YouTubeAPIClient,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.youtube = youtube
+        self._sleep = sleep
+        self._jobs: queue.Queue = queue.Queue()
+        self._done: queue.Queue = queue.Queue()
+        self._outstanding = 0  # submitted but not yet collected
+        self._submitted = 0
+        self._started = 0  # taken up by the writer
+        self._thread: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return self._outstanding
+
+    def start(self) -> None:
+        self._thread = threading.Thread(
+            target=self._drain, name="sortarr-insert", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, job: InsertJob) -> None:
+        self._outstanding += 1
+        self._submitted += 1
+        self._jobs.put(job)
+
+    @property
+    def waiting(self) -> int:
+        """Submitted jobs the writer has not started, so nothing has been
+        charged for them yet. The writer checks the quota again before
+        each call it makes."""
+        return self._submitted - self._started
+
+    def completed(self, wait: bool = False) -> list[InsertJob]:
+        """Jobs the writer has finished; with wait, block until every
+        submitted job is done."""
+        jobs: list[InsertJob] = []
+        while self._outstanding:
+            try:
+                job = self._done.get(block=wait)
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            jobs.append(job)
+        return jobs
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def close(self) -> None:
+        """Stop the writer once the jobs already submitted are done, and
+        release its client."""
+        if self._thread is None:
+            return
+        self._jobs.put(None)
+        self._thread.join()
+        self._thread = None
+        self.youtube.close()
+
+    def _drain(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            self._started += 1
+            try:
+                self.insert(job)
+            except Exception as e:
+                job.error = str(e)
+            self._done.put(job)
+
+    def insert(self, job: InsertJob) -> None:
+        """Run one insert on the calling thread.
+
+        TRANSIENT_STATUSES and transport errors such as timeouts are retried
+        with backoff; other HTTP errors are final. A server or transport
+        error can arrive after the insert was applied, so the retry (like
+        any job marked verify) first checks whether the video is already
+        in the playlist."""
+        playlist_id = job.intent["playlist_id"]
+        video_id = job.intent["video_id"]
+        for attempt in range(INSERT_ATTEMPTS):
+            if not self.youtube.quota.can_afford(INSERT_ENDPOINT):
+                job.quota_exhausted = True
+                return
+            try:
+                if job.verify:
+                    if self.youtube.playlist_contains(playlist_id, video_id):
+                        log.info("Video %s already in %s", video_id, playlist_id)
+                        job.added, job.error = True, None
+                        return
+                    job.verify = False
+                self.youtube.insert_playlist_item(playlist_id, video_id)
+                job.added, job.error = True, None
+                return
+            except HttpError as err:
+                job.error = f"HTTP {err.resp.status}: {err}"
+                if err.resp.status not in TRANSIENT_STATUSES:
+                    break
+                # A rate-limited request was rejected outright
+                job.verify = job.verify or err.resp.status != 429
+            except Exception as e:
+                job.error = str(e)
+                job.verify = True
+            if attempt < INSERT_ATTEMPTS - 1:
+                delay = INSERT_RETRY_DELAYS[attempt]
+                log.warning(
+                    "Insert of %s failed (%s), retrying in %ds (attempt %d/%d)",
+                    video_id,
+                    job.error,
+                    delay,
+                    attempt + 1,
+                    INSERT_ATTEMPTS,
+                )
+                self._sleep(delay)
+        if not self.youtube.quota.can_afford(INSERT_ENDPOINT):
+            job.quota_exhausted = True
+            return
+        log.error("Failed to add video %s: %s", video_id, job.error)
@@ -0,0 +1,103 @@
+import logging
+import threading
+from datetime import datetime, timezone
+from sqlite3 import Connection
+from typing import Optional
+from sortarr.core.insert_queue import InsertJob, InsertQueue
+from sortarr.core.youtube import YouTubeAPIClient
+from sortarr.db.repository import outbox as ob, videos as v
+
+log = logging.getLogger("sortarr.outbox")
+
+# Failed attempts (not counting quota exhaustion) before an intent is dropped
+MAX_INSERT_FAILURES = 5
+
+# Held by whoever is draining the outbox, so a pipeline run and the
+# background drain never insert the same intent twice
+drain_lock = threading.Lock()
+
+
+def pending_jobs(
+    con: Connection, created_before: Optional[str] = None
+) -> list[InsertJob]:
+    """Intents still to insert, oldest first, optionally only those recorded
+    no later than created_before. An intent whose video already reached the
+    ledger (the process stopped between the two writes) is cleared instead.
+    The rest may have been inserted by an attempt that failed ambiguously or
+    was cut short, so they are checked against the playlist before being
+    inserted again."""
+    jobs: list[InsertJob] = []
+    for intent in ob.get_insert_intents(con, created_before):
+        exists, _ = v.video_exists_for_pipeline(
+            con, intent["video_id"], intent["pipeline_id"]
+        )
+        if exists:
+            ob.delete_insert_intent(con, intent["pipeline_id"], intent["video_id"])
+        else:
+            jobs.append(InsertJob(intent, verify=True))
+    return jobs
+
+
+def record_outcome(con: Connection, job: InsertJob) -> bool:
+    """Apply a finished insert to the ledger and the outbox. Returns whether
+    the video was added. Intents that ran out of quota stay for the next
+    drain."""
+    intent = job.intent
+    pipeline_id, video_id = intent["pipeline_id"], intent["video_id"]
+    if job.added:
+        v.insert_video(
+            con,
+            video_id,
+            datetime.now(timezone.utc).isoformat(),
+            intent["title"],
+            intent["subscription_id"],
+            intent["playlist_id"],
+            intent["duration_seconds"],
+            intent["route_rule"],
+            pipeline_id,
+        )
+        ob.delete_insert_intent(con, pipeline_id, video_id)
+        return True
+    if not job.quota_exhausted:
+        attempts = ob.record_insert_failure(con, pipeline_id, video_id, job.error)
+        if attempts >= MAX_INSERT_FAILURES:
+            log.warning(
+                "Dropping insert of %s for pipeline %s after %d failed attempts: %s",
+                video_id,
+                pipeline_id,
+                attempts,
+                job.error,
+            )
+            ob.delete_insert_intent(con, pipeline_id, video_id)
+    return False
+
+
+def drain_outbox(youtube: YouTubeAPIClient, con: Connection) -> dict[str, int]:
+    """Insert the intents earlier runs left behind, oldest first, until they
+    are done or the quota runs out. Does nothing while a pipeline run is
+    draining them. A run that starts meanwhile leaves the outbox to this
+    drain, so intents recorded after it began are that run's own and are
+    not touched."""
+    counts = {"added": 0, "failed": 0, "remaining": 0}
+    if not drain_lock.acquire(blocking=False):
+        log.info("Insert outbox is being drained by a pipeline run")
+        return counts
+    try:
+        started = datetime.now(timezone.utc).isoformat()
+        youtube.quota.load(con)
+        inserts = InsertQueue(youtube)
+        for job in pending_jobs(con, started):
+            inserts.insert(job)
+            if record_outcome(con, job):
+                counts["added"] += 1
+            elif job.quota_exhausted:
+                break
+            else:
+                counts["failed"] += 1
+        counts["remaining"] = ob.count_insert_intents(con)
+    finally:
+        drain_lock.release()
+        youtube.quota.flush(con)
+    if counts["added"] or counts["failed"]:
+        log.info("Insert outbox drained: %s", counts)
+    return counts
@@ -1,14 +1,23 @@
 import logging
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from sqlite3 import Connection
+from typing import Optional
 from sortarr.config import Settings
 from sortarr.core.youtube import YouTubeAPIClient
-from sortarr.db.repository import pipeline as pl, videos as v, ignore_lists as il
-from sortarr.filters.word_filter import word_filter
-from sortarr.filters.title_similarity import title_similarity
-from sortarr.filters.ignore_list import ignore_list_filter
-from sortarr.filters.selector_filter import selector_filter
+from sortarr.core import outbox
+from sortarr.core.client_pool import ClientPool
+from sortarr.core.insert_queue import INSERT_ENDPOINT, InsertJob, InsertQueue
+from sortarr.core.video_metadata import VideoMetadataCache
+from sortarr.core.utils import parse_timestamp
+from sortarr.core.pipeline_plan import (
+    ActivityFeatures,
+    CompiledPipelinePlan,
+    PipelinePlan,
+)
+from sortarr.db.repository import outbox as ob, pipeline as pl, videos as v
+from sortarr.filters.title_similarity import TitleSimilarityIndex
 from sortarr import metrics
 from sortarr.models.pipeline import (
     PipelineSummary,
@@ -18,7 +27,7 @@ from sortarr.models.pipeline import (
     PipelineConfig,
     PipelineSelector,
 )
-from sortarr.models.youtube import Channel, Playlist, Activity
+from sortarr.models.youtube import Channel, Playlist, Activity, Subscription
 
 log = logging.getLogger("sortarr.pipeline")
 
@@ -37,6 +46,7 @@ class PipelineOrchestrator:
         default_playlist_title: str,
         dry_run: bool = False,
         on_progress=None,
+        clients: Optional[ClientPool] = None,
     ):
         self.settings = settings
         self.youtube = youtube
@@ -49,24 +59,44 @@ class PipelineOrchestrator:
         self.default_playlist_title = default_playlist_title
         self.dry_run = dry_run
         self.on_progress = on_progress
+        # Shared limit on concurrent API transports; a private one if None
+        self.clients = clients
+        self.video_metadata = VideoMetadataCache(
+            youtube, db_con, settings.video_metadata_ttl_days
+        )
+        self._durations: dict[str, int] = {}
+        self._quota_exhausted = False
+        # subscription_id -> {pipeline_id: newest published_at evaluated}
+        self._watermarks: dict[str, dict[str, str]] = {}
+        # pipeline_id -> stored titles / videoIds, loaded once per run
+        self._title_indexes: dict[str, TitleSimilarityIndex] = {}
+        self._seen: dict[str, set[str]] = {}
+        self._inserts: Optional[InsertQueue] = None
+        # Whether this run holds outbox.drain_lock and resumes leftovers
+        self._draining = False
+        # pipeline_id -> {videoId: row} with an insert intent still in the
+        # outbox
+        self._queued: dict[str, dict[str, dict]] = {}
+        # (pipeline_id, subscription_id) whose watermark must not move this
+        # run, because an accepted upload could not be saved to the outbox
+        self._held: set[tuple[str, str]] = set()
 
     def _now_iso(self) -> str:
         return datetime.now(timezone.utc).isoformat()
 
     # ── Phase 1: Data Collection ──────────────────────────────────
 
-    def _collect_activities(self, subscriptions: list) -> dict[str, list[Activity]]:
+    def _collect_activities(
+        self,
+        subscriptions: list,
+        pipelines_by_sub: Optional[dict[str, list[PipelineConfig]]] = None,
+    ) -> dict[str, list[Activity]]:
         """Fetch activities for all subscriptions and cache in DB.
         Returns dict of sub_id -> [Activity] for convenience."""
         cached: dict[str, list[Activity]] = {}
-        for sub in subscriptions:
-            pub_after = self._compute_published_after(sub)
-            try:
-                activities = self.youtube.get_subscription_activity(
-                    sub.channel_id, published_after=pub_after
-                )
-            except Exception as e:
-                log.error("Failed to fetch activity for %s: %s", sub.title, e)
+        fetched = self._fetch_activities(subscriptions, pipelines_by_sub)
+        for sub, activities in zip(subscriptions, fetched):
+            if activities is None:
                 continue
 
             activity_objects = []
@@ -99,192 +129,253 @@ class PipelineOrchestrator:
             )
         return cached
 
-    def _compute_published_after(self, sub) -> str:
-        """Compute the earliest time we need data for this subscription
-        across all pipelines."""
-        min_ts = pl.get_min_tracking_for_subscription(self.db_con, sub.id)
-        candidates = []
-        if self.settings.published_after:
-            candidates.append(self.settings.published_after)
-        if min_ts:
-            candidates.append(min_ts)
-        if candidates:
-            return min(candidates)
-        return (datetime.now(timezone.utc) - timedelta(weeks=52)).isoformat()
+    def _fetch_activities(
+        self,
+        subscriptions: list,
+        pipelines_by_sub: Optional[dict[str, list[PipelineConfig]]] = None,
+    ) -> list[Optional[list[Activity]]]:
+        """Fetch activity for every subscription, fanning out over up to
+        pipeline_concurrency workers, each holding a client from the pool.
+        Results are returned in subscription order; None marks a failed
+        fetch."""
+        # Watermark lookups use the DB connection, so they stay on this thread
+        windows = [
+            self._compute_published_after(
+                sub, pipelines_by_sub.get(sub.id) if pipelines_by_sub else None
+            )
+            for sub in subscriptions
+        ]
+        workers = min(self.settings.pipeline_concurrency, len(subscriptions))
+        if workers <= 1:
+            return [
+                self._fetch_subscription_activity(self.youtube, sub, pub_after)
+                for sub, pub_after in zip(subscriptions, windows)
+            ]
 
-    # ── Phase 2: Pipeline Processing ──────────────────────────────
+        clients = self.clients or ClientPool(workers)
 
-    def _run(self) -> PipelineSummary:
-        now_iso = self._now_iso()
-        summary = PipelineSummary(started_at=now_iso)
-        start = time.time()
+        def _fetch(sub, pub_after):
+            with clients.checkout(self.youtube) as client:
+                return self._fetch_subscription_activity(client, sub, pub_after)
 
-        # Fetch subscriptions once
         try:
-            subscriptions = self.youtube.get_subscriptions()
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="sortarr-fetch"
+            ) as executor:
+                return list(executor.map(_fetch, subscriptions, windows))
+        finally:
+            if clients is not self.clients:
+                clients.close()
+
+    def _fetch_subscription_activity(
+        self, youtube: YouTubeAPIClient, sub, pub_after: str
+    ) -> Optional[list[Activity]]:
+        try:
+            if self.settings.discovery_mode == "uploads":
+                return youtube.get_channel_uploads(
+                    sub.channel_id,
+                    published_after=pub_after,
+                    limit=self.settings.activity_limit,
+                )
+            return youtube.get_subscription_activity(
+                sub.channel_id, published_after=pub_after
+            )
         except Exception as e:
-            summary.status = "failed"
-            summary.error_message = str(e)
-            summary.errors = 1
-            return summary
+            log.error("Failed to fetch activity for %s: %s", sub.title, e)
+            return None
 
-        # Phase 1: Collect all activities into cache
-        activity_cache = self._collect_activities(subscriptions)
+    def _compute_published_after(
+        self, sub, pipelines: Optional[list[PipelineConfig]] = None
+    ) -> str:
+        """Compute the earliest time we need data for this subscription
+        across the given pipelines (default: all enabled), from each
+        pipeline's content watermark."""
+        default = (
+            self.settings.published_after
+            or (datetime.now(timezone.utc) - timedelta(weeks=52)).isoformat()
+        )
+        if pipelines is None:
+            pipelines = [p for p in self.pipelines if p.enabled]
+        watermarks = self._watermarks.get(sub.id, {})
+        candidates = [watermarks.get(pipeline.id) or default for pipeline in pipelines]
+        if self.settings.published_after:
+            candidates.append(self.settings.published_after)
+        return min(candidates) if candidates else default
 
-        # Phase 2: Process each pipeline
-        for pipeline in self.pipelines:
-            if not pipeline.enabled:
-                continue
-            summary.pipelines_invoked += 1
-            pipeline_errors = 0
+    # ── Planning ──────────────────────────────────────────────────
 
-            # Resolve ignore lists for this pipeline
-            pipeline_ignore_list_ids = pl.get_pipeline_ignore_list_ids(
-                self.db_con, pipeline.id
+    def _plan_pipeline(
+        self,
+        pipeline: PipelineConfig,
+        subscriptions: list,
+        ignore_lists: list[tuple[str, str]],
+    ) -> PipelinePlan:
+        """Compile a pipeline's filters and decide, before anything is
+        fetched, which subscriptions it will process and which it skips.
+        ignore_lists holds the pipeline's (list_id, list_type) pairs."""
+        selectors = [
+            PipelineSelector(
+                id=r["id"],
+                pipeline_id=r["pipeline_id"],
+                field=r["field"],
+                operator=r["operator"],
+                pattern=r["pattern"],
+                combine_operator=r.get("combine_operator", "AND"),
             )
-            ignore_videos: list[str] = []
-            ignore_words: list[str] = []
-            ignore_subs: list[str] = []
-            for lid in pipeline_ignore_list_ids:
-                entries = self.all_ignore_lists.get(lid, [])
-                list_type = self._get_list_type(lid)
-                if list_type == "video":
-                    ignore_videos.extend(entries)
-                elif list_type == "word":
-                    ignore_words.extend(entries)
-                elif list_type == "subscription":
-                    ignore_subs.extend(entries)
-
-            # Resolve selectors
-            selector_rows = pl.get_pipeline_selectors(self.db_con, pipeline.id)
-            selectors = [
-                PipelineSelector(
-                    id=r["id"],
-                    pipeline_id=r["pipeline_id"],
-                    field=r["field"],
-                    operator=r["operator"],
-                    pattern=r["pattern"],
-                    combine_operator=r.get("combine_operator", "AND"),
-                )
-                for r in selector_rows
-            ]
+            for r in pl.get_pipeline_selectors(self.db_con, pipeline.id)
+        ]
+        plan = PipelinePlan(
+            filters=CompiledPipelinePlan.compile(
+                pipeline,
+                selectors,
+                (
+                    (lid, list_type, self.all_ignore_lists.get(lid, []))
+                    for lid, list_type in ignore_lists
+                ),
+            )
+        )
 
-            # Determine subscription scope
-            if pipeline.subscription_scope == "selected":
-                selected_ids = pl.get_pipeline_subscription_ids(
-                    self.db_con, pipeline.id
-                )
-                target_subs = [s for s in subscriptions if s.id in selected_ids]
-            else:
-                target_subs = subscriptions
+        # Determine subscription scope
+        if pipeline.subscription_scope == "selected":
+            selected_ids = pl.get_pipeline_subscription_ids(self.db_con, pipeline.id)
+            target_subs = [s for s in subscriptions if s.id in selected_ids]
+        else:
+            target_subs = subscriptions
 
-            for sub in target_subs:
-                # 2.1: Subscription ignore list
-                if sub.title in ignore_subs:
-                    summary.subscriptions_skipped += 1
-                    skip = dict(
+        threshold = datetime.now(timezone.utc) - timedelta(
+            days=self.settings.reprocess_days
+        )
+        for sub in target_subs:
+            # Subscription ignore list
+            if plan.filters.ignores_subscription(sub.title):
+                plan.skips.append(
+                    dict(
                         subscription_id=sub.id,
                         subscription_title=sub.title,
                         channel_id=sub.channel_id,
                         reason="ignored",
                         reason_detail="Subscription in pipeline ignore list",
                     )
-                    summary.subscription_skips.append(skip)
-                    if self.on_progress:
-                        self.on_progress(skip, summary)
-                    continue
-
-                # 2.2: Reprocess window
-                last_processed = pl.get_pipeline_tracking(
-                    self.db_con, pipeline.id, sub.id
                 )
-                if last_processed:
-                    threshold = datetime.now(timezone.utc) - timedelta(
-                        days=self.settings.reprocess_days
-                    )
-                    try:
-                        last_dt = datetime.fromisoformat(last_processed)
-                        if last_dt.replace(tzinfo=timezone.utc) > threshold:
-                            summary.subscriptions_skipped += 1
-                            skip = dict(
+                continue
+
+            # Reprocess window
+            last_processed = pl.get_pipeline_tracking(self.db_con, pipeline.id, sub.id)
+            if last_processed:
+                try:
+                    last_dt = datetime.fromisoformat(last_processed)
+                    if last_dt.replace(tzinfo=timezone.utc) > threshold:
+                        plan.skips.append(
+                            dict(
                                 subscription_id=sub.id,
                                 subscription_title=sub.title,
                                 channel_id=sub.channel_id,
                                 reason="already_up_to_date",
                                 reason_detail=f"Checked within {self.settings.reprocess_days}d reprocess window",
                             )
-                            summary.subscription_skips.append(skip)
-                            if self.on_progress:
-                                self.on_progress(skip, summary)
-                            continue
-                    except ValueError:
-                        pass
-
-                # 2.3: Get cached activities
-                activities = activity_cache.get(sub.id, [])
-                if not activities:
-                    continue
+                        )
+                        continue
+                except ValueError:
+                    pass
+
+            plan.targets.append(sub)
+        return plan
+
+    @staticmethod
+    def _pipelines_by_subscription(
+        plans: list[PipelinePlan],
+    ) -> dict[str, list[PipelineConfig]]:
+        """Map each subscription id to the pipelines that will process it.
+        Subscriptions missing from the map are not fetched at all."""
+        needed: dict[str, list[PipelineConfig]] = {}
+        for plan in plans:
+            for sub in plan.targets:
+                needed.setdefault(sub.id, []).append(plan.pipeline)
+        return needed
 
-                summary.subscriptions_processed += 1
-                activity_count = 0
-                for activity in activities:
-                    if (
-                        self.settings.activity_limit > 0
-                        and activity_count >= self.settings.activity_limit
-                    ):
-                        break
-                    activity_count += 1
+    # ── Phase 2: Pipeline Processing ──────────────────────────────
 
-                    result = self._process_activity(
-                        activity,
-                        sub,
-                        pipeline,
-                        ignore_videos,
-                        ignore_words,
-                        selectors,
-                    )
-                    summary.video_results.append(result)
-                    if result.added:
-                        summary.videos_added += 1
-                    elif result.filter_result and not result.filter_result.passed:
-                        summary.videos_skipped += 1
-                    if result.error:
-                        summary.errors += 1
-                        pipeline_errors += 1
-                    if self.on_progress:
-                        self.on_progress(result, summary)
-
-                    # Per-activity watermark
-                    if not self.dry_run:
-                        pl.upsert_pipeline_tracking(
-                            self.db_con,
-                            pipeline.id,
-                            sub.id,
-                            now_iso,  # Use run time as watermark, not video's published_at
-                        )
+    def _run(self) -> PipelineSummary:
+        now_iso = self._now_iso()
+        summary = PipelineSummary(started_at=now_iso)
+        start = time.time()
+        self.youtube.quota.daily_budget = self.settings.quota_daily_budget
+        self.youtube.quota.load(self.db_con)
+        self.youtube.rate_limiter.configure(
+            self.settings.insert_rate_per_minute, self.settings.list_rate_per_second
+        )
+        self._watermarks = pl.get_subscription_watermarks(self.db_con)
+        self._title_indexes = {}
+        self._seen = {}
+        self._queued = {}
 
-                    if activity_count < len(activities):
-                        time.sleep(self.settings.playlist_sleep)
-
-                # End-activity loop — final watermark to ensure we captured
-                # the latest activity even if it was the last one
-                if activities and not self.dry_run:
-                    pl.upsert_pipeline_tracking(
-                        self.db_con,
-                        pipeline.id,
-                        sub.id,
-                        now_iso,  # Use run time as watermark
-                    )
+        # Fetch subscriptions once
+        try:
+            subscriptions = self.youtube.get_subscriptions()
+        except Exception as e:
+            summary.status = "failed"
+            summary.error_message = str(e)
+            summary.errors = 1
+            return summary
 
-            # End-subscription loop
-            if pipeline_errors > 0:
-                summary.pipelines_with_errors += 1
+        # Plan which subscriptions each enabled pipeline will process
+        ignore_lists = pl.get_ignore_lists_by_pipeline(self.db_con)
+        plans = [
+            self._plan_pipeline(
+                pipeline, subscriptions, ignore_lists.get(pipeline.id, [])
+            )
+            for pipeline in self.pipelines
+            if pipeline.enabled
+        ]
+        pipelines_by_sub = self._pipelines_by_subscription(plans)
+
+        # Phase 1: Collect activities only for subscriptions some pipeline
+        # will process, over the earliest window those pipelines need
+        activity_cache = self._collect_activities(
+            [s for s in subscriptions if s.id in pipelines_by_sub], pipelines_by_sub
+        )
 
-            if (
-                self.settings.subscription_limit > 0
-                and summary.subscriptions_processed >= self.settings.subscription_limit
-            ):
-                break
+        # Phase 2: Evaluate the pipelines against the collected activities
+        work = {
+            plan.pipeline.id: self._pipeline_work(plan, activity_cache)
+            for plan in plans
+        }
+
+        # Batch-resolve durations for candidates that pass any
+        # pipeline's cheap filters
+        self._resolve_durations(
+            [
+                activity.video_id
+                for plan in plans
+                for _, activities in work[plan.pipeline.id]
+                for activity in activities
+                if plan.filters.passes_cheap_filters(activity)
+            ]
+        )
+
+        pipeline_errors: dict[str, int] = {}
+        try:
+            if not self.dry_run:
+                self._open_inserts(summary, pipeline_errors)
+            if self.settings.evaluation_mode == "single_pass":
+                self._evaluate_single_pass(
+                    plans, work, subscriptions, summary, pipeline_errors, now_iso
+                )
+            else:
+                self._evaluate_per_pipeline(
+                    plans, work, summary, pipeline_errors, now_iso
+                )
+        finally:
+            self._close_inserts(summary, pipeline_errors)
+        summary.pipelines_with_errors = sum(1 for n in pipeline_errors.values() if n)
+
+        if self._quota_exhausted:
+            log.warning(
+                "Daily quota budget exhausted — deferring remaining subscriptions"
+            )
+            summary.error_message = (
+                "Daily quota budget exhausted; remaining subscriptions deferred"
+            )
 
         # Phase 3: Finalize
         summary.finished_at = self._now_iso()
@@ -302,22 +393,337 @@ class PipelineOrchestrator:
             metrics.errors_total.inc(summary.errors)
             metrics.last_pipeline_status.set(1 if summary.errors == 0 else 0)
             if self.youtube:
-                metrics.quota_estimate.set(self.youtube.api_calls[0])
+                metrics.quota_estimate.set(self.youtube.quota.used)
 
             # Clear activity cache
             v.clear_activity_cache(self.db_con)
 
         return summary
 
+    def _pipeline_work(
+        self, plan: PipelinePlan, activity_cache: dict[str, list[Activity]]
+    ) -> list[tuple[Subscription, list[Activity]]]:
+        """The (subscription, activities) pairs a pipeline will evaluate:
+        cached activities newer than its content watermark, oldest first so
+        the watermark only ever covers uploads that were actually evaluated."""
+        work: list[tuple[Subscription, list[Activity]]] = []
+        for sub in plan.targets:
+            activities = activity_cache.get(sub.id, [])
+            if self.settings.activity_limit > 0:
+                activities = activities[: self.settings.activity_limit]
+            # Compared as datetimes: watermarks seeded from older run times
+            # are not in publishedAt's format
+            watermark = self._watermarks.get(sub.id, {}).get(plan.pipeline.id)
+            if watermark:
+                cutoff = parse_timestamp(watermark)
+                activities = [
+                    a for a in activities if parse_timestamp(a.published_at) > cutoff
+                ]
+            activities = sorted(activities, key=lambda a: a.published_at)
+            if activities:
+                work.append((sub, activities))
+        return work
+
+    def _start_pipeline(self, plan: PipelinePlan, summary: PipelineSummary) -> None:
+        summary.pipelines_invoked += 1
+        # Subscriptions ruled out by the plan
+        for skip in plan.skips:
+            summary.subscriptions_skipped += 1
+            summary.subscription_skips.append(skip)
+            if self.on_progress:
+                self.on_progress(skip, summary)
+
+    def _record_result(
+        self,
+        result: VideoResult,
+        summary: PipelineSummary,
+        pipeline_errors: dict[str, int],
+    ) -> None:
+        summary.video_results.append(result)
+        self._tally(result, summary, pipeline_errors)
+        self._collect_inserts(summary, pipeline_errors)
+
+    def _tally(
+        self,
+        result: VideoResult,
+        summary: PipelineSummary,
+        pipeline_errors: dict[str, int],
+    ) -> None:
+        """Count a settled result (pending ones count nothing yet) and
+        report it."""
+        if result.added:
+            summary.videos_added += 1
+        elif result.filter_result and not result.filter_result.passed:
+            summary.videos_skipped += 1
+        if result.error:
+            summary.errors += 1
+            pipeline_errors[result.pipeline_id] = (
+                pipeline_errors.get(result.pipeline_id, 0) + 1
+            )
+        if self.on_progress:
+            self.on_progress(result, summary)
+
+    def _advance_watermark(
+        self, pipeline: PipelineConfig, sub, activity: Activity
+    ) -> None:
+        """Record that the pipeline has evaluated uploads up to this one.
+        Accepted uploads are already safe in the insert outbox."""
+        if not self.dry_run and (pipeline.id, sub.id) not in self._held:
+            pl.upsert_pipeline_tracking(
+                self.db_con, pipeline.id, sub.id, None, activity.published_at
+            )
+
+    def _finish_subscription(self, pipeline: PipelineConfig, sub, now_iso: str) -> None:
+        """Subscription fully evaluated — start its reprocess window."""
+        if (pipeline.id, sub.id) in self._held:
+            return
+        if not self.dry_run and not self._quota_exhausted:
+            pl.upsert_pipeline_tracking(self.db_con, pipeline.id, sub.id, now_iso)
+
+    def _open_inserts(
+        self, summary: PipelineSummary, pipeline_errors: dict[str, int]
+    ) -> None:
+        """Start inserting, beginning with the intents earlier runs left in
+        the outbox, which are reported with this run's results. While a
+        background drain holds the outbox they are left to it. With
+        insert_mode "queued" inserts are paced on their own thread and
+        client; otherwise they run inline."""
+        self._draining = outbox.drain_lock.acquire(blocking=False)
+        if not self._draining:
+            log.info("Insert outbox is being drained in the background")
+        try:
+            if self.settings.insert_mode == "queued":
+                self._inserts = InsertQueue(self.youtube.spawn())
+                self._inserts.start()
+            else:
+                self._inserts = InsertQueue(self.youtube)
+        except BaseException:
+            self._release_outbox()
+            raise
+        if not self._draining:
+            return
+        leftovers = outbox.pending_jobs(self.db_con)
+        if leftovers:
+            log.info("Resuming %d playlist inserts from the outbox", len(leftovers))
+        for job in leftovers:
+            job.result = self._leftover_result(job.intent)
+            self._queue_insert(job)
+            self._record_result(job.result, summary, pipeline_errors)
+
+    def _leftover_result(self, intent: dict) -> VideoResult:
+        """The run decision for an intent an earlier run accepted."""
+        pipeline = next(
+            (p for p in self.pipelines if p.id == intent["pipeline_id"]), None
+        )
+        playlist_title = intent["playlist_id"]
+        if pipeline and pipeline.destination_playlist_id == playlist_title:
+            playlist_title = pipeline.destination_playlist_title
+        return VideoResult(
+            video_id=intent["video_id"],
+            title=intent["title"] or "",
+            subscription_title="",
+            subscription_id=intent["subscription_id"] or "",
+            pipeline_id=intent["pipeline_id"],
+            pipeline_name=pipeline.name if pipeline else "",
+            route_result=RouteResult(
+                playlist_id=intent["playlist_id"],
+                playlist_title=playlist_title,
+                rule_name=intent["route_rule"] or "",
+            ),
+            pending=True,
+        )
+
+    def _release_outbox(self) -> None:
+        if self._draining:
+            self._draining = False
+            outbox.drain_lock.release()
+
+    def _queue_insert(self, job: InsertJob) -> None:
+        intent = job.intent
+        # Later checks in this run see the video as routed already
+        self._queued.setdefault(intent["pipeline_id"], {})[intent["video_id"]] = {
+            "videoId": intent["video_id"],
+            "title": intent["title"],
+        }
+        self._remember_insert(
+            intent["pipeline_id"], intent["video_id"], intent["title"]
+        )
+        if self._inserts.running:
+            self._inserts.submit(job)
+        else:
+            self._inserts.insert(job)
+            self._apply_insert(job)
+
+    def _collect_inserts(
+        self, summary: PipelineSummary, pipeline_errors: dict[str, int]
+    ) -> None:
+        """Record the inserts the writer has finished since the last call."""
+        if self._inserts is None:
+            return
+        for job in self._inserts.completed():
+            self._apply_insert(job)
+            if job.result is not None:
+                self._tally(job.result, summary, pipeline_errors)
+
+    def _close_inserts(
+        self, summary: PipelineSummary, pipeline_errors: dict[str, int]
+    ) -> None:
+        """Let the writer finish the queued inserts, then record them."""
+        if self._inserts is None:
+            return
+        try:
+            self._inserts.close()
+            self._collect_inserts(summary, pipeline_errors)
+        finally:
+            self._inserts = None
+            self._release_outbox()
+
+    def _apply_insert(self, job: InsertJob) -> None:
+        """Record a finished insert in the ledger, the outbox and, for
+        videos accepted this run, their result."""
+        intent = job.intent
+        self._queued.get(intent["pipeline_id"], {}).pop(intent["video_id"], None)
+        added = outbox.record_outcome(self.db_con, job)
+        if job.quota_exhausted or (
+            job.error and not self.youtube.quota.can_afford(INSERT_ENDPOINT)
+        ):
+            self._quota_exhausted = True
+        result = job.result
+        if result is None:
+            if added:
+                log.info(
+                    "Added from outbox: %s -> %s",
+                    intent["title"],
+                    intent["playlist_id"],
+                )
+            return
+        if added:
+            result.added = True
+            log.info(
+                "Added: %s -> %s (%s via %s)",
+                result.title,
+                result.route_result.playlist_title,
+                result.route_result.rule_name,
+                result.pipeline_name,
+            )
+        elif not job.quota_exhausted:
+            result.error = job.error
+        # Intents that ran out of quota stay pending in the outbox
+        result.pending = job.quota_exhausted
+
+    def _subscription_limit_reached(
+        self, processed: dict[str, int], pipeline_id: str
+    ) -> bool:
+        """Whether a pipeline has processed subscription_limit subscriptions
+        this run. The limit counts each pipeline separately, in both
+        evaluation modes."""
+        return (
+            self.settings.subscription_limit > 0
+            and processed.get(pipeline_id, 0) >= self.settings.subscription_limit
+        )
+
+    def _evaluate_per_pipeline(
+        self,
+        plans: list[PipelinePlan],
+        work: dict[str, list[tuple[Subscription, list[Activity]]]],
+        summary: PipelineSummary,
+        pipeline_errors: dict[str, int],
+        now_iso: str,
+    ) -> None:
+        """Walk each pipeline's subscriptions in turn, pipeline by pipeline."""
+        processed: dict[str, int] = {}
+        for plan in plans:
+            pipeline_id = plan.pipeline.id
+            self._start_pipeline(plan, summary)
+            for sub, activities in work[pipeline_id]:
+                if self._quota_exhausted or self._subscription_limit_reached(
+                    processed, pipeline_id
+                ):
+                    break
+                summary.subscriptions_processed += 1
+                processed[pipeline_id] = processed.get(pipeline_id, 0) + 1
+                for activity in activities:
+                    result = self._process_activity(activity, sub, plan.filters)
+                    self._record_result(result, summary, pipeline_errors)
+                    if self._quota_exhausted:
+                        break
+                    self._advance_watermark(plan.pipeline, sub, activity)
+                self._finish_subscription(plan.pipeline, sub, now_iso)
+
+            if self._quota_exhausted:
+                break
+
+    def _evaluate_single_pass(
+        self,
+        plans: list[PipelinePlan],
+        work: dict[str, list[tuple[Subscription, list[Activity]]]],
+        subscriptions: list,
+        summary: PipelineSummary,
+        pipeline_errors: dict[str, int],
+        now_iso: str,
+    ) -> None:
+        """Walk each subscription's activities once, evaluating every
+        pipeline that wants an activity against features computed once.
+        Each pipeline still sees its own activities oldest first, and stops
+        taking subscriptions once it has processed subscription_limit."""
+        for plan in plans:
+            self._start_pipeline(plan, summary)
+
+        by_sub: dict[str, list[tuple[PipelinePlan, list[Activity]]]] = {}
+        for plan in plans:
+            for sub, activities in work[plan.pipeline.id]:
+                by_sub.setdefault(sub.id, []).append((plan, activities))
+
+        processed: dict[str, int] = {}
+        for sub in subscriptions:
+            entries = [
+                (plan, activities)
+                for plan, activities in by_sub.get(sub.id, [])
+                if not self._subscription_limit_reached(processed, plan.pipeline.id)
+            ]
+            if not entries:
+                continue
+            if self._quota_exhausted:
+                break
+            summary.subscriptions_processed += len(entries)
+            for plan, _ in entries:
+                processed[plan.pipeline.id] = processed.get(plan.pipeline.id, 0) + 1
+
+            # Activities are shared objects from the cache, so identity
+            # merges the per-pipeline lists without collapsing duplicates
+            merged: dict[int, Activity] = {}
+            wanted: dict[int, list[PipelinePlan]] = {}
+            for plan, activities in entries:
+                for activity in activities:
+                    merged.setdefault(id(activity), activity)
+                    wanted.setdefault(id(activity), []).append(plan)
+
+            for activity in sorted(merged.values(), key=lambda a: a.published_at):
+                features = ActivityFeatures.of(activity, sub.title)
+                for plan in wanted[id(activity)]:
+                    result = self._process_activity(
+                        activity, sub, plan.filters, features
+                    )
+                    self._record_result(result, summary, pipeline_errors)
+                    if self._quota_exhausted:
+                        break
+                    self._advance_watermark(plan.pipeline, sub, activity)
+                if self._quota_exhausted:
+                    break
+
+            for plan, _ in entries:
+                self._finish_subscription(plan.pipeline, sub, now_iso)
+
     def _process_activity(
         self,
         activity: Activity,
         sub,
-        pipeline: PipelineConfig,
-        ignore_videos: list[str],
-        ignore_words: list[str],
-        selectors: list[PipelineSelector],
+        plan: CompiledPipelinePlan,
+        features: Optional[ActivityFeatures] = None,
     ) -> VideoResult:
+        pipeline = plan.pipeline
+        if features is None:
+            features = ActivityFeatures.of(activity, sub.title)
         result = VideoResult(
             video_id=activity.video_id,
             title=activity.title,
@@ -328,23 +734,29 @@ class PipelineOrchestrator:
         )
 
         # 2.3.2: Video_id ignore lists
-        fr = ignore_list_filter(activity.video_id, ignore_videos)
+        fr = plan.check_ignore_list(activity.video_id)
         if not fr.passed:
             result.filter_result = fr
             return result
 
         # 2.3.3: Word ignore lists
-        fr = word_filter(activity.title, ignore_words)
+        fr = plan.check_words(activity.title)
         if not fr.passed:
             result.filter_result = fr
             return result
 
         # 2.3.4: Per-pipeline DB exists
+        # Most activities are new; only seen-set hits go to the DB for the
+        # stored row's details
         if pipeline.check_db_exists:
-            exists, existing_video = v.video_exists_for_pipeline(
-                self.db_con, activity.video_id, pipeline.id
-            )
-            if exists and existing_video:
+            existing_video = self._queued.get(pipeline.id, {}).get(activity.video_id)
+            if existing_video is None and activity.video_id in self._seen_ids(
+                pipeline.id
+            ):
+                _, existing_video = v.video_exists_for_pipeline(
+                    self.db_con, activity.video_id, pipeline.id
+                )
+            if existing_video:
                 result.filter_result = FilterResult(
                     passed=False,
                     reason=f"Video {activity.video_id} already exists in DB for this pipeline (matched: {existing_video.get('videoId', activity.video_id)}, title: '{existing_video.get('title', 'N/A')}')",
@@ -357,52 +769,24 @@ class PipelineOrchestrator:
 
         # 2.3.5: Per-pipeline title similarity
         if pipeline.check_title_similarity:
-            existing = v.get_all_video_titles_for_pipeline(self.db_con, pipeline.id)
-            fr = title_similarity(activity.title, existing, pipeline.compare_distance)
+            fr = self._check_title_similarity(
+                activity, pipeline, features.normalized_title
+            )
             if not fr.passed:
                 result.filter_result = fr
                 return result
 
         # 2.3.6: Duration bounds
-        video_length = 0
-        try:
-            video_length = self.youtube.get_video_duration(activity.video_id)
-        except Exception as e:
-            log.warning("Could not get duration for %s: %s", activity.video_id, e)
+        video_length = self._get_duration(activity.video_id)
 
-        if (
-            pipeline.duration_min_seconds > 0
-            and video_length < pipeline.duration_min_seconds
-        ):
-            result.filter_result = FilterResult(
-                passed=False,
-                reason=f"Duration {video_length}s below min {pipeline.duration_min_seconds}s",
-                skipped_by="duration",
-                matched_video_id=activity.video_id,
-                matched_title=activity.title,
-                match_type="duration_min",
-            )
-            return result
-        if (
-            pipeline.duration_max_seconds > 0
-            and video_length > pipeline.duration_max_seconds
-        ):
-            result.filter_result = FilterResult(
-                passed=False,
-                reason=f"Duration {video_length}s above max {pipeline.duration_max_seconds}s",
-                skipped_by="duration",
-                matched_video_id=activity.video_id,
-                matched_title=activity.title,
-                match_type="duration_max",
-            )
+        fr = plan.check_duration(activity, video_length)
+        if not fr.passed:
+            result.filter_result = fr
             return result
 
         # 2.3.7: Pipeline selectors
-        fr = selector_filter(activity, sub.title, selectors, pipeline.selector_mode)
+        fr = plan.check_selectors(activity, features)
         if not fr.passed:
-            fr.matched_video_id = activity.video_id
-            fr.matched_title = activity.title
-            fr.match_type = "selector"
             result.filter_result = fr
             return result
 
@@ -423,48 +807,136 @@ class PipelineOrchestrator:
                 route_result.rule_name,
                 pipeline.name,
             )
+        elif not self.youtube.quota.can_afford(
+            INSERT_ENDPOINT, 1 + self._inserts.waiting
+        ):
+            # Inserts still waiting in the queue have first claim on the
+            # remaining budget; finished ones are already charged
+            self._quota_exhausted = True
+            result.route_result = None
+            result.filter_result = self._quota_result(activity)
         else:
-            try:
-                success = self.youtube.add_to_playlist(
-                    route_result.playlist_id, activity.video_id
+            # The intent is durable before the watermark moves past the video
+            intent = {
+                "pipeline_id": pipeline.id,
+                "video_id": activity.video_id,
+                "playlist_id": route_result.playlist_id,
+                "title": activity.title,
+                "subscription_id": sub.id,
+                "duration_seconds": video_length,
+                "route_rule": route_result.rule_name,
+            }
+            saved = ob.add_insert_intent(self.db_con, **intent)
+            if saved:
+                result.pending = True
+                self._queue_insert(InsertJob(intent, result))
+            elif saved is None:
+                # Keep the upload ahead of the watermark so the next run
+                # accepts it again
+                self._held.add((pipeline.id, sub.id))
+                result.route_result = None
+                result.error = f"Could not save insert intent for {activity.video_id}"
+            else:
+                result.route_result = None
+                result.filter_result = FilterResult(
+                    passed=False,
+                    reason=f"Video {activity.video_id} is already queued for this pipeline",
+                    skipped_by="db_exists",
+                    matched_video_id=activity.video_id,
+                    matched_title=activity.title,
+                    match_type="queued",
                 )
-                if success:
-                    v.insert_video(
-                        self.db_con,
-                        activity.video_id,
-                        datetime.now(timezone.utc).isoformat(),
-                        activity.title,
-                        sub.id,
-                        route_result.playlist_id,
-                        video_length,
-                        route_result.rule_name,
-                        pipeline.id,
-                    )
-                    result.added = True
-                    log.info(
-                        "Added: %s -> %s (%s via %s)",
-                        activity.title,
-                        route_result.playlist_title,
-                        route_result.rule_name,
-                        pipeline.name,
-                    )
-                else:
-                    result.error = "add_to_playlist returned False"
-            except Exception as e:
-                result.error = str(e)
-                log.error("Failed to add video %s: %s", activity.video_id, e)
 
         return result
 
-    def _get_list_type(self, list_id: str) -> str:
-        """Determine ignore list type from the list_id."""
-        list_info = il.get_ignore_list(self.db_con, list_id)
-        return list_info["list_type"] if list_info else ""
+    def _quota_result(self, activity: Activity) -> FilterResult:
+        return FilterResult(
+            passed=False,
+            reason=f"Daily quota budget exhausted ({self.youtube.quota.used}/{self.youtube.quota.daily_budget} units)",
+            skipped_by="quota",
+            matched_video_id=activity.video_id,
+            matched_title=activity.title,
+            match_type="quota",
+        )
+
+    def _resolve_durations(self, video_ids: list[str]) -> None:
+        """Fetch durations for unresolved video IDs from the metadata cache,
+        falling back to batched videos.list calls. Results are kept for the
+        whole run so every pipeline shares them."""
+        pending = list(
+            dict.fromkeys(vid for vid in video_ids if vid not in self._durations)
+        )
+        if not pending:
+            return
+        try:
+            resolved = self.video_metadata.get_durations(pending)
+        except Exception as e:
+            log.warning("Could not get durations for %d videos: %s", len(pending), e)
+            return
+        for video_id in pending:
+            self._durations[video_id] = resolved.get(video_id, 0)
+
+    def _get_duration(self, video_id: str) -> int:
+        if video_id not in self._durations:
+            self._resolve_durations([video_id])
+        return self._durations.get(video_id, 0)
+
+    def _check_title_similarity(
+        self, activity: Activity, pipeline: PipelineConfig, normalized: str
+    ) -> FilterResult:
+        # Exact normalized duplicates, stored or routed earlier in this run,
+        # are answered before any fuzzy comparison runs
+        index = self._title_index(pipeline.id)
+        fr = index.exact(activity.title, pipeline.compare_distance, normalized)
+        if fr:
+            return fr
+        return index.find(activity.title, pipeline.compare_distance, normalized)
+
+    def _title_index(self, pipeline_id: str) -> TitleSimilarityIndex:
+        """The pipeline's stored and queued titles, read on first use in a
+        run and kept in memory afterwards."""
+        index = self._title_indexes.get(pipeline_id)
+        if index is None:
+            index = self._title_indexes[pipeline_id] = TitleSimilarityIndex(
+                v.get_title_corpus_for_pipeline(self.db_con, pipeline_id)
+            )
+            for video_id, queued in self._queued.get(pipeline_id, {}).items():
+                index.add(video_id, queued["title"])
+        return index
+
+    def _seen_ids(self, pipeline_id: str) -> set[str]:
+        """videoIds already routed by the pipeline, read from the DB on first
+        use in a run and kept in memory afterwards."""
+        seen = self._seen.get(pipeline_id)
+        if seen is None:
+            seen = self._seen[pipeline_id] = v.get_video_ids_for_pipeline(
+                self.db_con, pipeline_id
+            )
+        return seen
+
+    def _remember_insert(self, pipeline_id: str, video_id: str, title: str) -> None:
+        """Make a video routed during this run visible to later existence
+        and similarity checks without re-reading the DB."""
+        seen = self._seen.get(pipeline_id)
+        if seen is not None:
+            seen.add(video_id)
+        index = self._title_indexes.get(pipeline_id)
+        if index is not None:
+            index.add(video_id, title)
+
+    def _flush_quota(self) -> None:
+        try:
+            self.youtube.quota.flush(self.db_con)
+        except Exception as e:
+            log.error("Failed to persist quota usage: %s", e)
 
     def run(self) -> PipelineSummary:
         try:
-            return self._run()
+            summary = self._run()
+            self._flush_quota()
+            return summary
         except Exception as e:
+            self._flush_quota()
             log.error("Pipeline run failed: %s", e)
             summary = PipelineSummary(started_at=self._now_iso())
             summary.status = "failed"
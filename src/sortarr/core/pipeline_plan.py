@@ -0,0 +1,130 @@
+from dataclasses import dataclass, field
+from typing import Iterable
+from sortarr.filters.ignore_list import ignore_list_filter
+from sortarr.filters.selector_filter import SelectorMatcher, selector_fields
+from sortarr.filters.title_similarity import normalize_title
+from sortarr.filters.word_filter import WordMatcher, cached_word_matcher
+from sortarr.models.pipeline import FilterResult, PipelineConfig, PipelineSelector
+from sortarr.models.youtube import Activity
+
+
+@dataclass(frozen=True)
+class CompiledPipelinePlan:
+    """A pipeline's filters compiled once per run: ignore lists as
+    frozensets, matchers for words and selectors, and duration bounds."""
+
+    pipeline: PipelineConfig
+    video_ignores: frozenset[str]
+    subscription_ignores: frozenset[str]
+    words: WordMatcher
+    selectors: SelectorMatcher
+    duration_min_seconds: int = 0
+    duration_max_seconds: int = 0
+
+    @classmethod
+    def compile(
+        cls,
+        pipeline: PipelineConfig,
+        selectors: list[PipelineSelector],
+        ignore_lists: Iterable[tuple[str, str, list[str]]],
+    ) -> "CompiledPipelinePlan":
+        """Build a plan from the pipeline's selectors and its ignore lists,
+        given as (list_id, list_type, entries) triples."""
+        videos: list[str] = []
+        word_list_ids: list[str] = []
+        words: list[str] = []
+        subs: list[str] = []
+        for list_id, list_type, entries in ignore_lists:
+            if list_type == "video":
+                videos.extend(entries)
+            elif list_type == "word":
+                word_list_ids.append(list_id)
+                words.extend(entries)
+            elif list_type == "subscription":
+                subs.extend(entries)
+        return cls(
+            pipeline=pipeline,
+            video_ignores=frozenset(videos),
+            subscription_ignores=frozenset(subs),
+            words=cached_word_matcher(word_list_ids, words),
+            selectors=SelectorMatcher(selectors),
+            duration_min_seconds=pipeline.duration_min_seconds,
+            duration_max_seconds=pipeline.duration_max_seconds,
+        )
+
+    def ignores_subscription(self, title: str) -> bool:
+        return title in self.subscription_ignores
+
+    def check_ignore_list(self, video_id: str) -> FilterResult:
+        return ignore_list_filter(video_id, self.video_ignores)
+
+    def check_words(self, title: str) -> FilterResult:
+        return self.words.check(title)
+
+    def passes_cheap_filters(self, activity: Activity) -> bool:
+        """Whether the activity survives the filters that need no lookups."""
+        return (
+            activity.video_id not in self.video_ignores
+            and self.words.match(activity.title) is None
+        )
+
+    def check_duration(self, activity: Activity, seconds: int) -> FilterResult:
+        if self.duration_min_seconds > 0 and seconds < self.duration_min_seconds:
+            return FilterResult(
+                passed=False,
+                reason=f"Duration {seconds}s below min {self.duration_min_seconds}s",
+                skipped_by="duration",
+                matched_video_id=activity.video_id,
+                matched_title=activity.title,
+                match_type="duration_min",
+            )
+        if self.duration_max_seconds > 0 and seconds > self.duration_max_seconds:
+            return FilterResult(
+                passed=False,
+                reason=f"Duration {seconds}s above max {self.duration_max_seconds}s",
+                skipped_by="duration",
+                matched_video_id=activity.video_id,
+                matched_title=activity.title,
+                match_type="duration_max",
+            )
+        return FilterResult(passed=True)
+
+    def check_selectors(
+        self, activity: Activity, features: "ActivityFeatures"
+    ) -> FilterResult:
+        fr = self.selectors.check_fields(features.selector_fields)
+        if not fr.passed:
+            fr.matched_video_id = activity.video_id
+            fr.matched_title = activity.title
+            fr.match_type = "selector"
+        return fr
+
+
+@dataclass(frozen=True)
+class ActivityFeatures:
+    """Values derived from an activity once and shared by every pipeline
+    plan that evaluates it."""
+
+    normalized_title: str
+    selector_fields: dict[str, str]
+
+    @classmethod
+    def of(cls, activity: Activity, channel_title: str) -> "ActivityFeatures":
+        return cls(
+            normalized_title=normalize_title(activity.title),
+            selector_fields=selector_fields(activity, channel_title),
+        )
+
+
+@dataclass
+class PipelinePlan:
+    """A compiled pipeline plus the subscriptions it will process (targets)
+    and the ones it skips during one run."""
+
+    filters: CompiledPipelinePlan
+    targets: list = field(default_factory=list)
+    skips: list[dict] = field(default_factory=list)
+
+    @property
+    def pipeline(self) -> PipelineConfig:
+        return self.filters.pipeline
@@ -1,4 +1,6 @@
 from sortarr.api.deps import require_youtube
+from sortarr.core.decision_writer import DecisionWriter
+from sortarr.core.outbox import drain_outbox
 from sortarr.core.pipeline import PipelineOrchestrator
 from sortarr.models.youtube import Channel, Playlist
 from sortarr.models.pipeline import PipelineConfig
@@ -93,8 +95,11 @@ async def execute_pipeline(state, trigger="manual", dry_run=False, pipeline_id=N
 
         import asyncio
 
-        def _build_progress_callback(tcon):
-            """Return on_progress callback that saves decisions & counters immediately."""
+        def _build_progress_callback(writer):
+            """Return on_progress callback that hands decisions & counters to
+            the decision writer."""
+            # id(VideoResult) of inserts recorded as pending
+            pending: set[int] = set()
 
             def _on_progress(decision, summary):
                 try:
@@ -112,8 +117,12 @@ async def execute_pipeline(state, trigger="manual", dry_run=False, pipeline_id=N
                         }
                     else:
                         r = decision
-                        if r.added:
-                            action, reason = "added", "matched"
+                        if r.added or r.pending:
+                            action, reason = (
+                                ("added", "matched")
+                                if r.added
+                                else ("pending", "queued")
+                            )
                             pipeline_name = getattr(r, "pipeline_name", None)
                             rule_name = (
                                 getattr(r.route_result, "rule_name", None)
@@ -140,7 +149,7 @@ async def execute_pipeline(state, trigger="manual", dry_run=False, pipeline_id=N
                             )
                         elif r.error:
                             action, reason, reason_detail = (
-                                "error",
+                                "failed",
                                 "add_failed",
                                 r.error,
                             )
@@ -176,11 +185,17 @@ async def execute_pipeline(state, trigger="manual", dry_run=False, pipeline_id=N
                             "routed_to": r.route_result.playlist_title
                             if r.route_result
                             else None,
+                            "pipeline_id": getattr(r, "pipeline_id", None),
+                            "pipeline_name": getattr(r, "pipeline_name", None),
                         }
-                    pr.insert_run_decision(tcon, run_id, d)
-                    pr.update_pipeline_run_progress(
-                        tcon,
-                        run_id,
+                    if id(decision) in pending:
+                        pending.discard(id(decision))
+                        writer.add(d, settles=True)
+                    else:
+                        writer.add(d)
+                        if d["action"] == "pending":
+                            pending.add(id(decision))
+                    writer.progress(
                         {
                             "subscriptions_processed": summary.subscriptions_processed,
                             "subscriptions_skipped": summary.subscriptions_skipped,
@@ -200,10 +215,15 @@ async def execute_pipeline(state, trigger="manual", dry_run=False, pipeline_id=N
             tcon = sqlite3.connect(state.settings.database_file)
             tcon.row_factory = sqlite3.Row
             tcon.execute("PRAGMA journal_mode=WAL")
+            writer = DecisionWriter(state.settings.database_file, run_id)
+            writer.start()
+            # The run thread gets its own transport; state.youtube stays with
+            # the event loop thread serving API routes
+            client = state.youtube.spawn()
             try:
                 orch = PipelineOrchestrator(
                     settings=state.settings,
-                    youtube=state.youtube,
+                    youtube=client,
                     db_con=tcon,
                     channel=channel,
                     playlist=playlist,
@@ -212,15 +232,18 @@ async def execute_pipeline(state, trigger="manual", dry_run=False, pipeline_id=N
                     default_playlist_id=playlist.id,
                     default_playlist_title=playlist.title,
                     dry_run=dry_run,
-                    on_progress=_build_progress_callback(tcon),
+                    on_progress=_build_progress_callback(writer),
+                    clients=state.clients,
                 )
                 return orch.run()
             finally:
+                writer.close()
+                client.close()
                 tcon.close()
 
         summary = await asyncio.to_thread(_run_orchestrator)
 
-        # Decisions already saved incrementally — no bulk insert needed
+        # Decisions were saved by the writer as the run went — no bulk insert needed
         pr.cleanup_old_decisions(state.db_con)
 
         pr.finish_pipeline_run(
@@ -252,3 +275,28 @@ async def execute_pipeline(state, trigger="manual", dry_run=False, pipeline_id=N
         return None
 
     return run_id
+
+
+async def drain_insert_outbox(state):
+    """Insert the playlist intents earlier runs left in the outbox, e.g.
+    after the quota resets. Returns the drain counts."""
+    require_youtube(state)
+    import asyncio
+
+    def _drain():
+        tcon = sqlite3.connect(state.settings.database_file)
+        tcon.row_factory = sqlite3.Row
+        tcon.execute("PRAGMA journal_mode=WAL")
+        client = state.youtube.spawn()
+        client.quota.daily_budget = state.settings.quota_daily_budget
+        client.rate_limiter.configure(
+            state.settings.insert_rate_per_minute,
+            state.settings.list_rate_per_second,
+        )
+        try:
+            return drain_outbox(client, tcon)
+        finally:
+            client.close()
+            tcon.close()
+
+    return await asyncio.to_thread(_drain)
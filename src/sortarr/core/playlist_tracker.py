@@ -1,15 +1,26 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, Iterator, Optional
+from sortarr.core.client_pool import ClientPool
 
 log = logging.getLogger("sortarr.playlist_tracker")
 
 
 class PlaylistTracker:
-    def __init__(self, youtube_client: Any, db_con: Any, channel_id: str):
+    def __init__(
+        self,
+        youtube_client: Any,
+        db_con: Any,
+        channel_id: str,
+        clients: Optional[ClientPool] = None,
+    ):
         self.youtube = youtube_client
         self.db_con = db_con
         self.channel_id = channel_id
+        # With a pool, API calls run on pooled clients and playlists are
+        # read concurrently; the database stays on the calling thread
+        self.clients = clients
 
     def _get_playlists(self) -> list[dict]:
         pipeline_ids = set()
@@ -19,7 +30,11 @@ class PlaylistTracker:
         for row in rows:
             pipeline_ids.add(row["destination_playlist_id"])
 
-        playlists = self.youtube.get_user_playlists(self.channel_id)
+        if self.clients is None:
+            playlists = self.youtube.get_user_playlists(self.channel_id)
+        else:
+            with self.clients.checkout(self.youtube) as client:
+                playlists = client.get_user_playlists(self.channel_id)
         excluded = 0
         result = []
         for p in playlists:
@@ -30,14 +45,21 @@ class PlaylistTracker:
             if "liked videos" in title_lower or "watch later" in title_lower:
                 excluded += 1
                 continue
-            result.append({"id": p.id, "title": p.title})
+            result.append(
+                {
+                    "id": p.id,
+                    "title": p.title,
+                    "item_count": p.item_count,
+                    "etag": p.etag,
+                }
+            )
         log.info("Found %d playlists (%d excluded)", len(result), excluded)
         return result
 
-    def _get_playlist_items(self, playlist_id: str) -> list[dict]:
-        items = self.youtube.get_playlist(playlist_id)
+    @staticmethod
+    def _parse_items(raw_items: list[dict]) -> list[dict]:
         result = []
-        for item in items:
+        for item in raw_items:
             snippet = item.get("snippet", {})
             resource_id = snippet.get("resourceId", {})
             video_id = resource_id.get("videoId", "")
@@ -53,84 +75,198 @@ class PlaylistTracker:
             )
         return result
 
-    def _increment_count(
-        self, video_subscription_id: str, video_id: str, source_playlist_id: str
-    ) -> None:
-        self.db_con.execute(
-            "UPDATE playlist_video_tracking SET counted = 1 WHERE video_id = ? AND source_playlist_id = ?",
-            (video_id, source_playlist_id),
-        )
-        self.db_con.execute(
-            "UPDATE subscription SET added_to_playlist_count = COALESCE(added_to_playlist_count, 0) + 1 WHERE id = ?",
-            (video_subscription_id,),
+    def _get_state(self, playlist_id: str) -> Optional[dict]:
+        row = self.db_con.execute(
+            "SELECT item_count, etag, newest_item_id, newest_page_token FROM playlist_tracker_state WHERE playlist_id = ?",
+            (playlist_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    @staticmethod
+    def _read_pages(
+        youtube: Any, playlist_id: str, page_token: Optional[str] = None
+    ) -> tuple[list[dict], Optional[tuple[str, str]]]:
+        """Raw items from page_token to the end of the playlist, and the id
+        and page token of the last one."""
+        raw: list[dict] = []
+        newest = None
+        while True:
+            page, next_token = youtube.get_playlist_page(playlist_id, page_token)
+            raw.extend(page)
+            if page:
+                newest = (page[-1].get("id", ""), page_token or "")
+            if not next_token:
+                return raw, newest
+            page_token = next_token
+
+    def _read_appended(
+        self, youtube: Any, pl: dict, state: dict
+    ) -> Optional[tuple[list[dict], Optional[tuple[str, str]]]]:
+        """Items added after the newest one seen last time, read from that
+        item's page on. None when the playlist changed in any other way."""
+        try:
+            raw, newest = self._read_pages(
+                youtube, pl["id"], state["newest_page_token"] or None
+            )
+        except Exception as e:
+            log.info("Cannot resume playlist %s, reading it all: %s", pl["id"], e)
+            return None
+        ids = [item.get("id") for item in raw]
+        if state["newest_item_id"] not in ids:
+            return None
+        last = ids.index(state["newest_item_id"])
+        position = raw[last].get("snippet", {}).get("position")
+        appended = raw[last + 1 :]
+        if (
+            position != state["item_count"] - 1
+            or len(appended) != pl["item_count"] - state["item_count"]
+        ):
+            return None
+        return appended, newest
+
+    @staticmethod
+    def _unchanged(pl: dict, state: Optional[dict]) -> bool:
+        """Whether the playlist's metadata shows no change since the last
+        read."""
+        return bool(
+            state
+            and pl["etag"]
+            and (state["etag"], state["item_count"]) == (pl["etag"], pl["item_count"])
         )
-        self.db_con.commit()
 
-    def _process_video(self, video_id: str, source_playlist_id: str) -> bool:
-        now = datetime.now(timezone.utc).isoformat()
+    def _read_changes(
+        self, youtube: Any, pl: dict, state: Optional[dict]
+    ) -> tuple[list[dict], bool, Optional[tuple[str, str]]]:
+        """The playlist's items to reconcile, as (raw items, appended only,
+        newest item)."""
+        if state and state["newest_item_id"]:
+            if pl["item_count"] > state["item_count"] > 0:
+                appended = self._read_appended(youtube, pl, state)
+                if appended is not None:
+                    return appended[0], True, appended[1]
+        raw, newest = self._read_pages(youtube, pl["id"])
+        return raw, False, newest
 
-        existing = self.db_con.execute(
-            "SELECT counted FROM playlist_video_tracking WHERE video_id = ? AND source_playlist_id = ?",
-            (video_id, source_playlist_id),
-        ).fetchone()
+    def _read_all(self, playlists: list[dict]) -> Iterator[tuple[dict, Any]]:
+        """Yield (playlist, changes) in playlist order, where changes is
+        None for an unchanged playlist or the exception its read raised.
+        With a client pool, reads run concurrently on pooled clients."""
+        states = {pl["id"]: self._get_state(pl["id"]) for pl in playlists}
 
-        if existing:
-            if existing["counted"] == 1:
-                log.info(
-                    "Video %s already counted for playlist %s",
-                    video_id,
-                    source_playlist_id,
-                )
-                return False
-            video = self.db_con.execute(
-                "SELECT subscriptionId FROM videos WHERE videoId = ? LIMIT 1",
-                (video_id,),
-            ).fetchone()
-            if video:
-                self._increment_count(
-                    video["subscriptionId"], video_id, source_playlist_id
-                )
-                log.info(
-                    "Upgraded video %s to counted=1 for playlist %s",
-                    video_id,
-                    source_playlist_id,
-                )
-                return True
-            return False
+        def _read(pl: dict) -> Any:
+            state = states[pl["id"]]
+            if self._unchanged(pl, state):
+                return None
+            try:
+                if self.clients is None:
+                    return self._read_changes(self.youtube, pl, state)
+                with self.clients.checkout(self.youtube) as client:
+                    return self._read_changes(client, pl, state)
+            except Exception as e:
+                return e
 
-        video = self.db_con.execute(
-            "SELECT subscriptionId FROM videos WHERE videoId = ? LIMIT 1",
-            (video_id,),
-        ).fetchone()
+        if self.clients is None or self.clients.size <= 1 or len(playlists) <= 1:
+            for pl in playlists:
+                yield pl, _read(pl)
+            return
+        with ThreadPoolExecutor(
+            max_workers=min(self.clients.size, len(playlists)),
+            thread_name_prefix="sortarr-tracker",
+        ) as executor:
+            yield from zip(playlists, executor.map(_read, playlists))
 
-        if video:
-            self.db_con.execute(
-                "INSERT OR IGNORE INTO playlist_video_tracking (video_id, source_playlist_id, counted, created_at) VALUES (?, ?, 1, ?)",
-                (video_id, source_playlist_id, now),
+    def _reconcile(
+        self,
+        source_playlist_id: str,
+        items: list[dict],
+        partial: bool = False,
+        state: Optional[dict] = None,
+    ) -> list[dict]:
+        """Track a playlist's items and count the ones routed by sortarr, in
+        one transaction. Items are staged in a temporary table and settled
+        with set-based statements. When only part of the playlist was read,
+        its uncounted tracking rows are settled too. state, if given, is
+        saved as the playlist's tracker state. Returns the newly counted
+        items."""
+        now = datetime.now(timezone.utc).isoformat()
+        con = self.db_con
+        with con:
+            con.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS tracker_items (video_id TEXT PRIMARY KEY, channel_id TEXT, position INTEGER)"
             )
-            self._increment_count(video["subscriptionId"], video_id, source_playlist_id)
-            log.info(
-                "Video %s newly counted for playlist %s", video_id, source_playlist_id
+            con.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS tracker_counted (video_id TEXT PRIMARY KEY, channel_id TEXT, position INTEGER, subscription_id TEXT)"
             )
-            return True
-        else:
-            self.db_con.execute(
-                "INSERT OR IGNORE INTO playlist_video_tracking (video_id, source_playlist_id, counted, created_at) VALUES (?, ?, 0, ?)",
-                (video_id, source_playlist_id, now),
+            con.execute("DELETE FROM temp.tracker_items")
+            con.execute("DELETE FROM temp.tracker_counted")
+            # A video listed twice is only considered once, as first seen
+            con.executemany(
+                "INSERT OR IGNORE INTO temp.tracker_items (video_id, channel_id, position) VALUES (?, ?, ?)",
+                [
+                    (item["video_id"], item["channel_id"], position)
+                    for position, item in enumerate(items)
+                ],
             )
-            self.db_con.commit()
-            log.info(
-                "Video %s not in videos table, tracked as uncounted for playlist %s",
-                video_id,
-                source_playlist_id,
+            if partial:
+                con.execute(
+                    "INSERT OR IGNORE INTO temp.tracker_items (video_id, channel_id, position) "
+                    "SELECT video_id, channel_id, -1 FROM playlist_video_tracking "
+                    "WHERE source_playlist_id = ? AND counted = 0",
+                    (source_playlist_id,),
+                )
+            # Untracked or uncounted items whose video is in the ledger; the
+            # earliest ledger row names the subscription
+            con.execute(
+                "INSERT INTO temp.tracker_counted (video_id, channel_id, position, subscription_id) "
+                "SELECT i.video_id, i.channel_id, i.position, "
+                "(SELECT v.subscriptionId FROM videos v WHERE v.videoId = i.video_id ORDER BY v.rowid LIMIT 1) "
+                "FROM temp.tracker_items i "
+                "LEFT JOIN playlist_video_tracking t ON t.video_id = i.video_id AND t.source_playlist_id = ? "
+                "WHERE COALESCE(t.counted, 0) = 0 "
+                "AND EXISTS (SELECT 1 FROM videos v WHERE v.videoId = i.video_id)",
+                (source_playlist_id,),
+            )
+            con.execute(
+                "UPDATE playlist_video_tracking SET counted = 1 "
+                "WHERE source_playlist_id = ? AND counted = 0 "
+                "AND video_id IN (SELECT video_id FROM temp.tracker_counted)",
+                (source_playlist_id,),
+            )
+            con.execute(
+                "INSERT OR IGNORE INTO playlist_video_tracking (video_id, source_playlist_id, counted, created_at, channel_id) "
+                "SELECT video_id, ?, video_id IN (SELECT video_id FROM temp.tracker_counted), ?, channel_id "
+                "FROM temp.tracker_items",
+                (source_playlist_id, now),
+            )
+            con.execute(
+                "UPDATE subscription SET added_to_playlist_count = COALESCE(added_to_playlist_count, 0) + "
+                "(SELECT COUNT(*) FROM temp.tracker_counted c WHERE c.subscription_id = subscription.id) "
+                "WHERE id IN (SELECT subscription_id FROM temp.tracker_counted)"
             )
-            return False
+            if state is not None:
+                con.execute(
+                    "INSERT OR REPLACE INTO playlist_tracker_state (playlist_id, item_count, etag, newest_item_id, newest_page_token, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        source_playlist_id,
+                        state["item_count"],
+                        state["etag"],
+                        state["newest_item_id"],
+                        state["newest_page_token"],
+                        now,
+                    ),
+                )
+            rows = con.execute(
+                "SELECT video_id, channel_id FROM temp.tracker_counted ORDER BY position"
+            ).fetchall()
+        return [{"video_id": row[0], "channel_id": row[1]} for row in rows]
 
     def run(self) -> dict:
         log.info("Starting playlist tracking run for channel %s", self.channel_id)
         playlists_count = 0
         videos_found = 0
         videos_newly_counted = 0
+        playlists_unchanged = 0
         subscriptions_set = set()
 
         try:
@@ -142,35 +278,60 @@ class PlaylistTracker:
                 "videos_found": 0,
                 "videos_newly_counted": 0,
                 "subscriptions_updated": 0,
+                "playlists_unchanged": 0,
             }
 
-        for pl in playlists:
+        for pl, changes in self._read_all(playlists):
             playlists_count += 1
+            if isinstance(changes, Exception):
+                log.warning(
+                    "Failed to get items for playlist %s: %s", pl["id"], changes
+                )
+                continue
+            if changes is None:
+                playlists_unchanged += 1
+                raw, partial, newest = [], True, None
+            else:
+                raw, partial, newest = changes
+            items = self._parse_items(raw)
+            videos_found += len(items)
+            seen = None
+            if newest is not None:
+                seen = {
+                    "item_count": pl["item_count"],
+                    "etag": pl["etag"],
+                    "newest_item_id": newest[0],
+                    "newest_page_token": newest[1],
+                }
             try:
-                items = self._get_playlist_items(pl["id"])
+                counted = self._reconcile(pl["id"], items, partial, seen)
             except Exception as e:
-                log.warning("Failed to get items for playlist %s: %s", pl["id"], e)
+                log.warning("Failed to process playlist %s: %s", pl["id"], e)
                 continue
-            for item in items:
-                videos_found += 1
-                try:
-                    if self._process_video(item["video_id"], pl["id"]):
-                        videos_newly_counted += 1
-                        if item["channel_id"]:
-                            subscriptions_set.add(item["channel_id"])
-                except Exception as e:
-                    log.warning(
-                        "Failed to process video %s in playlist %s: %s",
-                        item["video_id"],
-                        pl["id"],
-                        e,
-                    )
+            videos_newly_counted += len(counted)
+            subscriptions_set.update(
+                item["channel_id"] for item in counted if item["channel_id"]
+            )
+            log.info(
+                "Playlist %s: %s, %d items read, %d newly counted",
+                pl["id"],
+                "unchanged"
+                if changes is None
+                else ("appended" if partial else "read in full"),
+                len(items),
+                len(counted),
+            )
 
         summary = {
             "playlists_processed": playlists_count,
             "videos_found": videos_found,
             "videos_newly_counted": videos_newly_counted,
             "subscriptions_updated": len(subscriptions_set),
+            "playlists_unchanged": playlists_unchanged,
         }
+        try:
+            self.youtube.quota.flush(self.db_con)
+        except Exception as e:
+            log.error("Failed to persist quota usage: %s", e)
         log.info("Playlist tracking run complete: %s", summary)
         return summary
@@ -0,0 +1,104 @@
+import logging
+import threading
+from datetime import datetime
+from sqlite3 import Connection
+from typing import Optional
+from zoneinfo import ZoneInfo
+from sortarr import metrics
+from sortarr.db.repository import quota as q
+
+log = logging.getLogger("sortarr.quota")
+
+# YouTube Data API v3 unit costs; anything not listed costs 1 unit
+ENDPOINT_COSTS = {
+    "activities.list": 1,
+    "channels.list": 1,
+    "playlistItems.list": 1,
+    "playlists.list": 1,
+    "subscriptions.list": 1,
+    "videos.list": 1,
+    "playlistItems.insert": 50,
+}
+DEFAULT_DAILY_BUDGET = 10000
+# The daily quota resets at midnight Pacific time
+QUOTA_TIMEZONE = ZoneInfo("America/Los_Angeles")
+
+
+def quota_day(now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(QUOTA_TIMEZONE)
+    return now.astimezone(QUOTA_TIMEZONE).date().isoformat()
+
+
+def endpoint_cost(endpoint: str) -> int:
+    return ENDPOINT_COSTS.get(endpoint, 1)
+
+
+class QuotaLedger:
+    """Thread-safe tally of quota units spent per Pacific quota day.
+
+    Units are recorded in memory as requests execute and written to the
+    quota_usage table by flush(); load() pulls in usage recorded by other
+    clients (e.g. the playlist tracker) so the budget check sees the day's
+    full total."""
+
+    def __init__(self, daily_budget: int = DEFAULT_DAILY_BUDGET):
+        self.daily_budget = daily_budget  # 0 = unlimited
+        self._lock = threading.Lock()
+        self._day = quota_day()
+        self._used = 0
+        self._unsaved: dict[str, int] = {}
+
+    def _roll_over(self) -> None:
+        today = quota_day()
+        if today != self._day:
+            log.info("Quota day rolled over from %s to %s", self._day, today)
+            self._day = today
+            self._used = self._unsaved.get(today, 0)
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            self._roll_over()
+            return self._used
+
+    @property
+    def remaining(self) -> Optional[int]:
+        if self.daily_budget <= 0:
+            return None
+        return max(self.daily_budget - self.used, 0)
+
+    def record(self, endpoint: str) -> None:
+        cost = endpoint_cost(endpoint)
+        with self._lock:
+            self._roll_over()
+            self._used += cost
+            self._unsaved[self._day] = self._unsaved.get(self._day, 0) + cost
+        metrics.api_calls_total.labels(endpoint=endpoint).inc()
+
+    def can_afford(self, endpoint: str, calls: int = 1) -> bool:
+        remaining = self.remaining
+        return remaining is None or remaining >= endpoint_cost(endpoint) * calls
+
+    def exhaust(self) -> None:
+        """Mark the day's budget as spent after the API reports quotaExceeded."""
+        with self._lock:
+            self._roll_over()
+            if self.daily_budget > 0 and self._used < self.daily_budget:
+                self._unsaved[self._day] = (
+                    self._unsaved.get(self._day, 0) + self.daily_budget - self._used
+                )
+                self._used = self.daily_budget
+
+    def load(self, con: Connection) -> None:
+        with self._lock:
+            self._roll_over()
+            stored = q.get_quota_usage(con, self._day)
+            self._used = stored + self._unsaved.get(self._day, 0)
+
+    def flush(self, con: Connection) -> None:
+        with self._lock:
+            unsaved, self._unsaved = self._unsaved, {}
+        for day, units in unsaved.items():
+            if units and not q.add_quota_usage(con, day, units):
+                with self._lock:
+                    self._unsaved[day] = self._unsaved.get(day, 0) + units
@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Callable
+
+DEFAULT_INSERT_PER_MINUTE = 6
+DEFAULT_LIST_PER_SECOND = 10
+
+
+def endpoint_class(endpoint: str) -> str:
+    """Group API endpoints into the classes the limiter paces separately."""
+    return "insert" if endpoint.endswith(".insert") else "list"
+
+
+class TokenBucket:
+    """Thread-safe token bucket. Callers that find the bucket empty reserve
+    a future token and sleep outside the lock until it is due."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate  # tokens per second; 0 = unlimited
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = capacity
+        self._last = clock()
+
+    def acquire(self) -> float:
+        """Take one token, blocking until it is available. Returns the number
+        of seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self.capacity, self._tokens + (now - self._last) * self.rate
+            )
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class RateLimiter:
+    """Per-endpoint-class pacing shared by every client spawned from the same
+    YouTubeAPIClient. Inserts are spaced out one at a time; list calls may
+    burst up to one second's worth of tokens."""
+
+    def __init__(
+        self,
+        insert_per_minute: int = DEFAULT_INSERT_PER_MINUTE,
+        list_per_second: int = DEFAULT_LIST_PER_SECOND,
+    ):
+        self._buckets: dict[str, TokenBucket] = {}
+        self.configure(insert_per_minute, list_per_second)
+
+    def configure(self, insert_per_minute: int, list_per_second: int) -> None:
+        rates = {
+            "insert": (insert_per_minute / 60, 1.0),
+            "list": (list_per_second, max(list_per_second, 1)),
+        }
+        for name, (rate, capacity) in rates.items():
+            bucket = self._buckets.get(name)
+            if bucket is None or bucket.rate != rate:
+                self._buckets[name] = TokenBucket(rate, capacity)
+
+    def acquire(self, endpoint: str) -> float:
+        return self._buckets[endpoint_class(endpoint)].acquire()
@@ -3,6 +3,7 @@ from datetime import datetime, timezone
 from typing import Callable
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from sortarr.core.quota import QUOTA_TIMEZONE
 
 log = logging.getLogger("sortarr.scheduler")
 
@@ -14,11 +15,13 @@ class PipelineScheduler:
         pipeline_fn: Callable,
         playlist_tracker_cron: str | None = None,
         playlist_tracker_fn: Callable | None = None,
+        outbox_fn: Callable | None = None,
     ):
         self.cron_expression = cron_expression
         self.pipeline_fn = pipeline_fn
         self.playlist_tracker_cron = playlist_tracker_cron
         self.playlist_tracker_fn = playlist_tracker_fn
+        self.outbox_fn = outbox_fn
         self.scheduler = AsyncIOScheduler()
 
     def start(self) -> None:
@@ -34,6 +37,14 @@ class PipelineScheduler:
                 id="playlist_tracker",
                 name="Playlist Video Tracker",
             )
+        if self.outbox_fn:
+            # Shortly after the daily quota resets at midnight Pacific
+            self.scheduler.add_job(
+                self.outbox_fn,
+                CronTrigger(hour=0, minute=5, timezone=QUOTA_TIMEZONE),
+                id="insert_outbox",
+                name="Insert Outbox Drain",
+            )
         self.scheduler.start()
         log.info("Scheduler started with cron: %s", self.cron_expression)
         if self.playlist_tracker_cron:
@@ -1,6 +1,11 @@
 import re
+from datetime import datetime, timezone
 from typing import Optional
 
+# The format YouTube uses for publishedAt, and the one content watermarks
+# are stored in
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
 
 def time_to_seconds(time_str: str) -> int:
     if not time_str or time_str == "0s":
@@ -14,6 +19,18 @@ def time_to_seconds(time_str: str) -> int:
     return total
 
 
+def parse_timestamp(value: str) -> datetime:
+    """Parse an ISO 8601 timestamp; naive values are taken as UTC."""
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def utc_timestamp(value: str) -> str:
+    """Rewrite an ISO 8601 timestamp in TIMESTAMP_FORMAT, truncated to the
+    second."""
+    return parse_timestamp(value).astimezone(timezone.utc).strftime(TIMESTAMP_FORMAT)
+
+
 def find_channel(channels: list[dict], channel_name: str) -> Optional[dict]:
     for ch in channels:
         if channel_name.lower() in ch["title"].lower():
@@ -0,0 +1,56 @@
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlite3 import Connection
+from typing import Optional
+from sortarr import metrics
+from sortarr.core.youtube import YouTubeAPIClient
+from sortarr.db.repository import video_metadata as vm
+
+log = logging.getLogger("sortarr.video_metadata")
+
+
+class VideoMetadataCache:
+    """Read-through cache for videos.list metadata backed by the
+    video_metadata table. Only misses and expired entries hit the API.
+
+    Upcoming and live videos are not cached: their duration (P0D) is only
+    known once the broadcast ends."""
+
+    def __init__(self, youtube: YouTubeAPIClient, db_con: Connection, ttl_days: int):
+        self.youtube = youtube
+        self.db_con = db_con
+        self.ttl_days = ttl_days  # 0 = never expire
+
+    def _fetched_after(self) -> Optional[str]:
+        if self.ttl_days <= 0:
+            return None
+        return (datetime.now(timezone.utc) - timedelta(days=self.ttl_days)).isoformat()
+
+    def get_details(self, video_ids: list[str]) -> dict[str, dict]:
+        details = vm.get_video_metadata(self.db_con, video_ids, self._fetched_after())
+        misses = [vid for vid in video_ids if vid not in details]
+        metrics.video_metadata_lookups_total.labels(result="hit").inc(len(details))
+        metrics.video_metadata_lookups_total.labels(result="miss").inc(len(misses))
+        if misses:
+            fetched = self.youtube.get_video_details(misses)
+            final = [
+                d
+                for d in fetched.values()
+                if d.get("live_broadcast_content", "none") == "none"
+            ]
+            if final:
+                vm.upsert_video_metadata(self.db_con, final)
+            details.update(fetched)
+            log.debug(
+                "Video metadata: %d cached, %d fetched, %d unavailable",
+                len(video_ids) - len(misses),
+                len(fetched),
+                len(misses) - len(fetched),
+            )
+        return details
+
+    def get_durations(self, video_ids: list[str]) -> dict[str, int]:
+        return {
+            video_id: d["duration_seconds"]
+            for video_id, d in self.get_details(video_ids).items()
+        }
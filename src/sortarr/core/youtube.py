@@ -1,14 +1,22 @@
+import copy
+import functools
 import json
 import logging
 import os
 import pickle
+import threading
 import time
 from typing import Any, Optional
 from google.auth.credentials import Credentials
 from google.auth.transport.requests import Request
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+from googleapiclient.discovery import Resource, build_from_document
 from googleapiclient.errors import HttpError
+from googleapiclient.http import build_http
+from sortarr.core.quota import QuotaLedger
+from sortarr.core.rate_limit import RateLimiter
+from sortarr.core.utils import parse_timestamp
 from sortarr.models.youtube import Channel, Playlist, Subscription, Activity
 
 log = logging.getLogger("sortarr.youtube")
@@ -31,8 +39,37 @@ CRITICAL_STATUSES = {
     501,
     503,
 }
+# Rate-limit and server errors worth retrying a playlist insert for
+TRANSIENT_STATUSES = frozenset({429, 500, 502, 503, 504})
 MAX_RETRIES = 3
 RETRY_DELAYS = [1, 2, 4]
+MAX_IDS_PER_REQUEST = 50
+# YouTube Data API v3 discovery document shipped with sortarr, so building
+# a client neither fetches nor re-reads it
+DISCOVERY_DOCUMENT = os.path.join(
+    os.path.dirname(__file__), "discovery", "youtube_v3.json"
+)
+
+
+@functools.lru_cache(maxsize=1)
+def service_template() -> Resource:
+    """A service built once per process from the bundled discovery document.
+
+    Clients copy it with their own transport rather than parsing the
+    document again. googleapiclient fixes up the document in place as each
+    resource is first built, so every resource is built here once, before
+    the template is shared between threads."""
+    with open(DISCOVERY_DOCUMENT) as f:
+        service = build_from_document(f.read(), http=build_http())
+    _build_resources(service)
+    return service
+
+
+def _build_resources(resource: Resource) -> None:
+    for name in resource._dynamic_attrs:
+        method = getattr(resource, name)
+        if getattr(method, "__is_resource__", False):
+            _build_resources(method())
 
 
 class YouTubeAPIClient:
@@ -41,17 +78,44 @@ class YouTubeAPIClient:
         credentials: Credentials,
         use_local: bool = False,
         debug_dir: str = "debug",
+        quota: Optional[QuotaLedger] = None,
+        rate_limiter: Optional[RateLimiter] = None,
     ):
         self.credentials = credentials
         self.use_local = use_local
         self.debug_dir = debug_dir
+        self.quota = quota or QuotaLedger()
+        self.rate_limiter = rate_limiter or RateLimiter()
         self.api_calls: list[int] = [0]
+        self._calls_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
         self._service: Any = None
 
+    def spawn(self) -> "YouTubeAPIClient":
+        """Return a client with its own transport that shares credentials,
+        call/quota accounting and rate limits with this one. The
+        googleapiclient service wraps a non-thread-safe httplib2 transport,
+        so each worker thread needs its own client."""
+        client = YouTubeAPIClient(
+            credentials=self.credentials,
+            use_local=self.use_local,
+            debug_dir=self.debug_dir,
+            quota=self.quota,
+            rate_limiter=self.rate_limiter,
+        )
+        client.api_calls = self.api_calls
+        client._calls_lock = self._calls_lock
+        client._refresh_lock = self._refresh_lock
+        return client
+
     @property
     def service(self) -> Any:
         if self._service is None and not self.use_local:
-            self._service = build("youtube", "v3", credentials=self.credentials)
+            # Copying re-binds the service's methods to the copy, which then
+            # makes its requests through this client's transport
+            service = copy.copy(service_template())
+            service._http = AuthorizedHttp(self.credentials, http=build_http())
+            self._service = service
         return self._service
 
     def close(self) -> None:
@@ -59,20 +123,52 @@ class YouTubeAPIClient:
             self._service.close()
             self._service = None
 
+    def _refresh_credentials(self) -> None:
+        """Refresh expired credentials once for every client sharing them,
+        rather than letting each transport refresh them concurrently."""
+        credentials = self.credentials
+        if credentials is None or credentials.valid:
+            return
+        if not getattr(credentials, "refresh_token", None):
+            return
+        with self._refresh_lock:
+            if not credentials.valid:
+                log.info("Refreshing expired YouTube credentials")
+                credentials.refresh(Request())
+
     def _local_json(self, filename: str) -> Any:
         path = os.path.join(self.debug_dir, filename)
         with open(path) as f:
             return json.loads(f.read().strip())
 
-    def _execute_with_retry(self, request: Any) -> Any:
+    def _execute_with_retry(
+        self, request: Any, endpoint: str = "unknown", expected: frozenset = frozenset()
+    ) -> Any:
+        """Execute request, retrying transient HTTP errors. Errors with a
+        status in expected are raised without being logged; the caller
+        handles them."""
         last_error = None
         for attempt in range(MAX_RETRIES):
             try:
+                self.rate_limiter.acquire(endpoint)
+                self._refresh_credentials()
                 response = request.execute()
-                self.api_calls[0] += 1
+                with self._calls_lock:
+                    self.api_calls[0] += 1
+                self.quota.record(endpoint)
                 return response
             except HttpError as err:
+                # The API answered, so the attempt is charged like a success
+                with self._calls_lock:
+                    self.api_calls[0] += 1
+                self.quota.record(endpoint)
                 last_error = err
+                if _is_quota_exceeded(err):
+                    log.critical("YouTube API quota exceeded: %s", err)
+                    self.quota.exhaust()
+                    raise
+                if err.resp.status in expected:
+                    raise
                 if err.resp.status in CRITICAL_STATUSES:
                     log.critical("Critical HTTP error: %s", err)
                     raise
@@ -103,7 +199,7 @@ class YouTubeAPIClient:
                     order="alphabetical",
                     pageToken=next_page,
                 )
-                resp = self._execute_with_retry(req)
+                resp = self._execute_with_retry(req, "subscriptions.list")
                 items.extend(resp.get("items", []))
                 next_page = resp.get("nextPageToken")
                 if not next_page:
@@ -123,7 +219,7 @@ class YouTubeAPIClient:
             data = self._local_json("channels_list.json")
         else:
             req = self.service.channels().list(part="snippet", mine=True)
-            resp = self._execute_with_retry(req)
+            resp = self._execute_with_retry(req, "channels.list")
             data = resp
         return [
             Channel(id=item["id"], title=item["snippet"]["title"])
@@ -147,7 +243,7 @@ class YouTubeAPIClient:
                     channelId=channel_id,
                     pageToken=next_page,
                 )
-                resp = self._execute_with_retry(req)
+                resp = self._execute_with_retry(req, "activities.list")
                 items.extend(resp.get("items", []))
                 next_page = resp.get("nextPageToken")
                 if not next_page:
@@ -182,12 +278,73 @@ class YouTubeAPIClient:
             )
         return activities
 
+    def get_channel_uploads(
+        self, channel_id: str, published_after: Optional[str] = None, limit: int = 0
+    ) -> list[Activity]:
+        """List a channel's uploads newest-first from its uploads playlist.
+
+        Paging stops at the first item published before ``published_after``
+        or once ``limit`` uploads (0 = unlimited) have been collected, so a
+        channel without new uploads costs a single playlistItems.list call."""
+        if self.use_local:
+            activities = self.get_subscription_activity(channel_id)
+            return activities[:limit] if limit > 0 else activities
+        cutoff = parse_timestamp(published_after) if published_after else None
+        playlist_id = uploads_playlist_id(channel_id)
+        activities: list[Activity] = []
+        next_page: Optional[str] = None
+        while True:
+            req = self.service.playlistItems().list(
+                part="snippet,contentDetails",
+                playlistId=playlist_id,
+                maxResults=min(limit, 50) if limit > 0 else 50,
+                pageToken=next_page,
+            )
+            try:
+                resp = self._execute_with_retry(
+                    req, "playlistItems.list", expected=frozenset({404})
+                )
+            except HttpError as err:
+                if not _is_playlist_not_found(err):
+                    log.critical("Critical HTTP error: %s", err)
+                    raise
+                # Channels that never uploaded have no uploads playlist
+                log.debug("Channel %s has no uploads playlist", channel_id)
+                return activities
+            for item in resp.get("items", []):
+                snippet = item.get("snippet", {})
+                details = item.get("contentDetails", {})
+                published_at = details.get("videoPublishedAt") or snippet.get(
+                    "publishedAt", ""
+                )
+                if cutoff and published_at and parse_timestamp(published_at) < cutoff:
+                    return activities
+                video_id = details.get("videoId") or snippet.get("resourceId", {}).get(
+                    "videoId", ""
+                )
+                if not video_id:
+                    continue
+                activities.append(
+                    Activity(
+                        video_id=video_id,
+                        title=snippet.get("title", ""),
+                        published_at=published_at,
+                        video_type="upload",
+                        description=snippet.get("description", ""),
+                    )
+                )
+                if limit > 0 and len(activities) >= limit:
+                    return activities
+            next_page = resp.get("nextPageToken")
+            if not next_page:
+                return activities
+
     def get_video_duration(self, video_id: str) -> int:
         if self.use_local:
             data = self._local_json("video.json")
         else:
             req = self.service.videos().list(part="contentDetails", id=video_id)
-            resp = self._execute_with_retry(req)
+            resp = self._execute_with_retry(req, "videos.list")
             data = resp
         items = data.get("items", [])
         if not items:
@@ -195,6 +352,51 @@ class YouTubeAPIClient:
         duration = items[0].get("contentDetails", {}).get("duration", "PT0S")
         return self._iso8601_to_seconds(duration)
 
+    def get_video_durations(self, video_ids: list[str]) -> dict[str, int]:
+        """Resolve durations for many videos, up to 50 IDs per videos.list call.
+
+        Videos missing from the response (deleted, private) are left out of
+        the returned mapping."""
+        return {
+            video_id: details["duration_seconds"]
+            for video_id, details in self.get_video_details(video_ids).items()
+        }
+
+    def get_video_details(self, video_ids: list[str]) -> dict[str, dict]:
+        """Fetch duration and snippet metadata for many videos, up to 50 IDs
+        per videos.list call. Returns video_id -> {video_id, duration_seconds,
+        published_at, channel_id, title, live_broadcast_content}."""
+        if self.use_local:
+            items = self._local_json("video.json").get("items", [])[:1]
+            return {
+                video_id: self._video_details(dict(items[0], id=video_id))
+                for video_id in video_ids
+                if items
+            }
+        details: dict[str, dict] = {}
+        for i in range(0, len(video_ids), MAX_IDS_PER_REQUEST):
+            chunk = video_ids[i : i + MAX_IDS_PER_REQUEST]
+            req = self.service.videos().list(
+                part="contentDetails,snippet", id=",".join(chunk)
+            )
+            resp = self._execute_with_retry(req, "videos.list")
+            for item in resp.get("items", []):
+                details[item["id"]] = self._video_details(item)
+        return details
+
+    @classmethod
+    def _video_details(cls, item: dict) -> dict:
+        snippet = item.get("snippet", {})
+        duration = item.get("contentDetails", {}).get("duration", "PT0S")
+        return {
+            "video_id": item["id"],
+            "duration_seconds": cls._iso8601_to_seconds(duration),
+            "published_at": snippet.get("publishedAt", ""),
+            "channel_id": snippet.get("channelId", ""),
+            "title": snippet.get("title", ""),
+            "live_broadcast_content": snippet.get("liveBroadcastContent", "none"),
+        }
+
     def get_user_playlists(self, channel_id: str) -> list[Playlist]:
         if self.use_local:
             data = self._local_json("user_playlists_list.json")
@@ -203,56 +405,58 @@ class YouTubeAPIClient:
             next_page: Optional[str] = None
             while True:
                 req = self.service.playlists().list(
-                    part="snippet",
+                    part="snippet,contentDetails",
                     channelId=channel_id,
                     maxResults=50,
                     pageToken=next_page,
                 )
-                resp = self._execute_with_retry(req)
+                resp = self._execute_with_retry(req, "playlists.list")
                 items.extend(resp.get("items", []))
                 next_page = resp.get("nextPageToken")
                 if not next_page:
                     break
             data = {"items": items}
         return [
-            Playlist(id=item["id"], title=item["snippet"]["title"])
+            Playlist(
+                id=item["id"],
+                title=item["snippet"]["title"],
+                item_count=item.get("contentDetails", {}).get("itemCount", 0),
+                etag=item.get("etag", ""),
+            )
             for item in data.get("items", [])
         ]
 
     def get_playlist(self, playlist_id: str) -> list[dict]:
+        items: list[dict] = []
+        next_page: Optional[str] = None
+        while True:
+            page, next_page = self.get_playlist_page(playlist_id, next_page)
+            items.extend(page)
+            if not next_page:
+                return items
+
+    def get_playlist_page(
+        self, playlist_id: str, page_token: Optional[str] = None
+    ) -> tuple[list[dict], Optional[str]]:
+        """One page of a playlist's items and the token of the next page,
+        None after the last one."""
         if self.use_local:
-            data = self._local_json("user_playlist.json")
-        else:
-            items = []
-            next_page: Optional[str] = None
-            while True:
-                req = self.service.playlistItems().list(
-                    part="snippet",
-                    playlistId=playlist_id,
-                    maxResults=50,
-                    pageToken=next_page,
-                )
-                resp = self._execute_with_retry(req)
-                items.extend(resp.get("items", []))
-                next_page = resp.get("nextPageToken")
-                if not next_page:
-                    break
-            data = {"items": items}
-        return data.get("items", [])
+            return self._local_json("user_playlist.json").get("items", []), None
+        req = self.service.playlistItems().list(
+            part="snippet",
+            playlistId=playlist_id,
+            maxResults=50,
+            pageToken=page_token,
+        )
+        resp = self._execute_with_retry(req, "playlistItems.list")
+        return resp.get("items", []), resp.get("nextPageToken")
 
     def add_to_playlist(self, playlist_id: str, video_id: str) -> bool:
         if self.use_local:
             return True
-        body = {
-            "kind": "youtube#playlistItem",
-            "snippet": {
-                "playlistId": playlist_id,
-                "resourceId": {"kind": "youtube#video", "videoId": video_id},
-            },
-        }
-        req = self.service.playlistItems().insert(part="snippet", body=body)
+        req = self._playlist_item_insert(playlist_id, video_id)
         try:
-            self._execute_with_retry(req)
+            self._execute_with_retry(req, "playlistItems.insert")
             return True
         except HttpError as err:
             log.error(
@@ -260,6 +464,37 @@ class YouTubeAPIClient:
             )
             return False
 
+    def insert_playlist_item(self, playlist_id: str, video_id: str) -> None:
+        """Insert video_id into playlist_id once. Unlike add_to_playlist, a
+        TRANSIENT_STATUSES error is not retried here, and every HttpError
+        is raised, so the caller can decide whether to retry."""
+        if self.use_local:
+            return
+        req = self._playlist_item_insert(playlist_id, video_id)
+        self._execute_with_retry(
+            req, "playlistItems.insert", expected=TRANSIENT_STATUSES
+        )
+
+    def playlist_contains(self, playlist_id: str, video_id: str) -> bool:
+        """Whether video_id is already in playlist_id (one list call)."""
+        if self.use_local:
+            return False
+        req = self.service.playlistItems().list(
+            part="id", playlistId=playlist_id, videoId=video_id, maxResults=1
+        )
+        resp = self._execute_with_retry(req, "playlistItems.list")
+        return bool(resp.get("items"))
+
+    def _playlist_item_insert(self, playlist_id: str, video_id: str) -> Any:
+        body = {
+            "kind": "youtube#playlistItem",
+            "snippet": {
+                "playlistId": playlist_id,
+                "resourceId": {"kind": "youtube#video", "videoId": video_id},
+            },
+        }
+        return self.service.playlistItems().insert(part="snippet", body=body)
+
     @staticmethod
     def _iso8601_to_seconds(duration_str: str) -> int:
         import re
@@ -277,6 +512,31 @@ class YouTubeAPIClient:
         return days * 86400 + hours * 3600 + minutes * 60 + seconds
 
 
+def uploads_playlist_id(channel_id: str) -> str:
+    """Derive a channel's uploads playlist ID (UC... -> UU...)."""
+    if channel_id.startswith("UC"):
+        return "UU" + channel_id[2:]
+    return channel_id
+
+
+def _is_quota_exceeded(err: HttpError) -> bool:
+    if err.resp.status != 403:
+        return False
+    content = err.content or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    return "quotaExceeded" in content or "dailyLimitExceeded" in content
+
+
+def _is_playlist_not_found(err: HttpError) -> bool:
+    if err.resp.status != 404:
+        return False
+    content = err.content or b""
+    if isinstance(content, bytes):
+        content = content.decode("utf-8", errors="replace")
+    return "playlistNotFound" in content
+
+
 def authenticate(
     credentials_file: str,
     pickle_credentials: str,
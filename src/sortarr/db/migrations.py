@@ -240,6 +240,78 @@ CREATE TABLE IF NOT EXISTS playlist_video_tracking (
             con,
             "ALTER TABLE subscription ADD COLUMN added_to_playlist_count INTEGER NOT NULL DEFAULT 0",
         )
+        # V8: persistent video metadata cache (survives activity cache clears)
+        con.executescript("""
+CREATE TABLE IF NOT EXISTS video_metadata (
+    video_id TEXT NOT NULL PRIMARY KEY,
+    duration_seconds INTEGER NOT NULL DEFAULT 0,
+    published_at TEXT,
+    channel_id TEXT,
+    title TEXT,
+    fetched_at TEXT NOT NULL
+);
+""")
+        # V9: daily quota usage, keyed by Pacific quota day
+        con.executescript("""
+CREATE TABLE IF NOT EXISTS quota_usage (
+    day TEXT NOT NULL PRIMARY KEY,
+    units INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+""")
+        # V10: per-(pipeline, subscription) content watermark. Seed it from the
+        # old run-time watermark so upgraded installs keep their fetch windows.
+        _migrate_content_watermark(con)
+        # V11: stored normalized title for similarity checks, indexed for
+        # exact-duplicate probes
+        _run_migration_safe(con, "ALTER TABLE videos ADD COLUMN normalized_title TEXT")
+        _backfill_normalized_titles(con)
+        # V12: key the video ledger by (pipeline_id, videoId) so pipelines
+        # routing the same video keep their own rows. The primary key also
+        # serves per-pipeline existence lookups. Runs before the indexes
+        # below so they are created on the rebuilt table.
+        _migrate_videos_ledger(con)
+        con.executescript("""
+CREATE INDEX IF NOT EXISTS idx_videos_pipeline_normalized_title ON videos(pipeline_id, normalized_title);
+CREATE INDEX IF NOT EXISTS idx_videos_video_id ON videos(videoId);
+""")
+        # V13: durable playlist insert intents, written before the
+        # watermark moves past an accepted video
+        con.executescript("""
+CREATE TABLE IF NOT EXISTS insert_outbox (
+    pipeline_id TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    playlist_id TEXT NOT NULL,
+    title TEXT,
+    subscription_id TEXT,
+    duration_seconds INTEGER NOT NULL DEFAULT 0,
+    route_rule TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (pipeline_id, video_id)
+);
+""")
+        # V14: run decisions are read and settled per run
+        con.executescript("""
+CREATE INDEX IF NOT EXISTS idx_prd_run_video ON pipeline_run_decisions(run_id, video_id);
+""")
+        # V15: playlist tracker change detection. The state row records what
+        # the last read saw; the item's channel lets skipped playlists still
+        # be reconciled from their tracking rows.
+        con.executescript("""
+CREATE TABLE IF NOT EXISTS playlist_tracker_state (
+    playlist_id TEXT NOT NULL PRIMARY KEY,
+    item_count INTEGER NOT NULL DEFAULT 0,
+    etag TEXT,
+    newest_item_id TEXT,
+    newest_page_token TEXT,
+    updated_at TEXT NOT NULL
+);
+""")
+        _run_migration_safe(
+            con, "ALTER TABLE playlist_video_tracking ADD COLUMN channel_id TEXT"
+        )
         con.commit()
         con.close()
         return True
@@ -248,6 +320,101 @@ CREATE TABLE IF NOT EXISTS playlist_video_tracking (
         return False
 
 
+def _migrate_videos_ledger(con: sqlite3.Connection) -> None:
+    pk = {
+        row["name"]
+        for row in con.execute("PRAGMA table_info(videos)").fetchall()
+        if row["pk"]
+    }
+    if pk == {"pipeline_id", "videoId"}:
+        return
+    # One transaction, so an interrupted rebuild leaves the old table intact;
+    # a leftover videos_ledger from an earlier, pre-transaction attempt is
+    # discarded
+    try:
+        con.executescript("""
+BEGIN;
+DROP TABLE IF EXISTS videos_ledger;
+DROP INDEX IF EXISTS idx_videos_pipeline_video;
+DROP INDEX IF EXISTS idx_videos_pipeline_normalized_title;
+CREATE TABLE videos_ledger (
+    videoId TEXT NOT NULL,
+    pipeline_id TEXT NOT NULL DEFAULT '',
+    timestamp TEXT,
+    title TEXT,
+    normalized_title TEXT,
+    subscriptionId TEXT,
+    playlistId TEXT,
+    duration_seconds INTEGER,
+    route_rule TEXT,
+    PRIMARY KEY (pipeline_id, videoId)
+);
+INSERT OR REPLACE INTO videos_ledger (videoId, pipeline_id, timestamp, title, normalized_title, subscriptionId, playlistId, duration_seconds, route_rule)
+SELECT videoId, COALESCE(pipeline_id, ''), timestamp, title, normalized_title, subscriptionId, playlistId, duration_seconds, route_rule
+FROM videos ORDER BY rowid;
+DROP TABLE videos;
+ALTER TABLE videos_ledger RENAME TO videos;
+COMMIT;
+""")
+    except sqlite3.Error:
+        if con.in_transaction:
+            con.rollback()
+        raise
+
+
+def _migrate_content_watermark(con: sqlite3.Connection) -> None:
+    columns = {
+        row["name"]
+        for row in con.execute(
+            "PRAGMA table_info(pipeline_subscription_tracking)"
+        ).fetchall()
+    }
+    if "last_published_at" in columns:
+        return
+    from sortarr.core.utils import utc_timestamp
+
+    # last_processed is a run start time in isoformat(); the watermark is
+    # compared against publishedAt, so it is stored in that format. The
+    # column and its seed land together or not at all.
+    con.commit()
+    try:
+        con.execute("BEGIN")
+        con.execute(
+            "ALTER TABLE pipeline_subscription_tracking ADD COLUMN last_published_at TEXT"
+        )
+        rows = con.execute(
+            "SELECT rowid, last_processed FROM pipeline_subscription_tracking "
+            "WHERE last_processed IS NOT NULL"
+        ).fetchall()
+        seeds = []
+        for row in rows:
+            try:
+                seeds.append((utc_timestamp(row["last_processed"]), row["rowid"]))
+            except ValueError:
+                continue  # unparseable: left NULL, the default window applies
+        con.executemany(
+            "UPDATE pipeline_subscription_tracking SET last_published_at = ? WHERE rowid = ?",
+            seeds,
+        )
+        con.commit()
+    except sqlite3.Error:
+        if con.in_transaction:
+            con.rollback()
+        raise
+
+
+def _backfill_normalized_titles(con: sqlite3.Connection) -> None:
+    from sortarr.filters.title_similarity import normalize_title
+
+    rows = con.execute(
+        "SELECT rowid, title FROM videos WHERE normalized_title IS NULL"
+    ).fetchall()
+    con.executemany(
+        "UPDATE videos SET normalized_title = ? WHERE rowid = ?",
+        [(normalize_title(row["title"] or ""), row["rowid"]) for row in rows],
+    )
+
+
 def _migrate_v1_ignores(con: sqlite3.Connection) -> None:
     now = datetime.now(timezone.utc).isoformat()
     type_map = {"subscription": "subscription", "video": "video", "words": "word"}
@@ -333,7 +500,7 @@ def _migrate_v1_rules(con: sqlite3.Connection) -> None:
             )
         # Backfill existing videos
         con.execute(
-            "UPDATE videos SET pipeline_id = ? WHERE route_rule = ? OR (pipeline_id IS NULL AND route_rule IS NOT NULL)",
+            "UPDATE videos SET pipeline_id = ? WHERE route_rule = ? OR ((pipeline_id IS NULL OR pipeline_id = '') AND route_rule IS NOT NULL)",
             (pid, row["name"]),
         )
 
@@ -3,3 +3,6 @@ from .pipeline import *  # noqa: F403
 from .pipeline_runs import *  # noqa: F403
 from .config import *  # noqa: F403
 from .ignore_lists import *  # noqa: F403
+from .video_metadata import *  # noqa: F403
+from .quota import *  # noqa: F403
+from .outbox import *  # noqa: F403
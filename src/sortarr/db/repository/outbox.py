@@ -0,0 +1,97 @@
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+log = logging.getLogger("sortarr.db.repository.outbox")
+
+__all__ = [
+    "add_insert_intent",
+    "get_insert_intents",
+    "count_insert_intents",
+    "delete_insert_intent",
+    "record_insert_failure",
+]
+
+
+def add_insert_intent(
+    con: sqlite3.Connection,
+    pipeline_id: str,
+    video_id: str,
+    playlist_id: str,
+    title: Optional[str] = None,
+    subscription_id: Optional[str] = None,
+    duration_seconds: int = 0,
+    route_rule: Optional[str] = None,
+) -> Optional[bool]:
+    """Record a playlist insert before it is attempted. Returns False if the
+    pipeline already has one pending for the video, None if it could not be
+    saved."""
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        cursor = con.execute(
+            "INSERT OR IGNORE INTO insert_outbox (pipeline_id, video_id, playlist_id, title, subscription_id, duration_seconds, route_rule, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                pipeline_id,
+                video_id,
+                playlist_id,
+                title,
+                subscription_id,
+                duration_seconds,
+                route_rule,
+                now,
+            ),
+        )
+        con.commit()
+        return cursor.rowcount == 1
+    except sqlite3.Error as err:
+        log.error("Failed to record insert intent for %s: %s", video_id, err)
+        return None
+
+
+def get_insert_intents(
+    con: sqlite3.Connection, created_before: Optional[str] = None
+) -> list[dict]:
+    """Pending inserts, oldest first; with created_before, only those
+    recorded no later than it."""
+    if created_before is None:
+        cursor = con.execute("SELECT * FROM insert_outbox ORDER BY created_at, rowid")
+    else:
+        cursor = con.execute(
+            "SELECT * FROM insert_outbox WHERE created_at <= ? ORDER BY created_at, rowid",
+            (created_before,),
+        )
+    return [dict(row) for row in cursor.fetchall()]
+
+
+def count_insert_intents(con: sqlite3.Connection) -> int:
+    cursor = con.execute("SELECT COUNT(*) AS cnt FROM insert_outbox")
+    return cursor.fetchone()["cnt"]
+
+
+def delete_insert_intent(
+    con: sqlite3.Connection, pipeline_id: str, video_id: str
+) -> None:
+    con.execute(
+        "DELETE FROM insert_outbox WHERE pipeline_id = ? AND video_id = ?",
+        (pipeline_id, video_id),
+    )
+    con.commit()
+
+
+def record_insert_failure(
+    con: sqlite3.Connection, pipeline_id: str, video_id: str, error: Optional[str]
+) -> int:
+    """Count a failed attempt against the intent; returns its attempts so far."""
+    con.execute(
+        "UPDATE insert_outbox SET attempts = attempts + 1, last_error = ? "
+        "WHERE pipeline_id = ? AND video_id = ?",
+        (error, pipeline_id, video_id),
+    )
+    con.commit()
+    row = con.execute(
+        "SELECT attempts FROM insert_outbox WHERE pipeline_id = ? AND video_id = ?",
+        (pipeline_id, video_id),
+    ).fetchone()
+    return row["attempts"] if row else 0
@@ -13,12 +13,14 @@ __all__ = [
     "get_pipeline_selectors",
     "set_pipeline_selectors",
     "get_pipeline_ignore_list_ids",
+    "get_ignore_lists_by_pipeline",
     "set_pipeline_ignore_lists",
     "get_pipeline_subscription_ids",
     "set_pipeline_subscriptions",
     "get_pipeline_tracking",
     "upsert_pipeline_tracking",
     "get_min_tracking_for_subscription",
+    "get_subscription_watermarks",
     "get_routing_rules",
     "create_routing_rule",
     "update_routing_rule",
@@ -159,6 +161,22 @@ def get_pipeline_ignore_list_ids(
     return [row["ignore_list_id"] for row in cursor.fetchall()]
 
 
+def get_ignore_lists_by_pipeline(
+    con: sqlite3.Connection,
+) -> dict[str, list[tuple[str, str]]]:
+    """Every pipeline's ignore lists as (list_id, list_type) pairs, in one
+    query."""
+    cursor = con.execute(
+        "SELECT pil.pipeline_id, pil.ignore_list_id, il.list_type FROM pipeline_ignore_lists pil JOIN ignore_lists il ON il.id = pil.ignore_list_id ORDER BY pil.ignore_list_id"
+    )
+    lists: dict[str, list[tuple[str, str]]] = {}
+    for row in cursor.fetchall():
+        lists.setdefault(row["pipeline_id"], []).append(
+            (row["ignore_list_id"], row["list_type"])
+        )
+    return lists
+
+
 def set_pipeline_ignore_lists(
     con: sqlite3.Connection, pipeline_id: str, list_ids: list[str]
 ) -> None:
@@ -209,11 +227,25 @@ def get_pipeline_tracking(
 
 
 def upsert_pipeline_tracking(
-    con: sqlite3.Connection, pipeline_id: str, subscription_id: str, last_processed: str
+    con: sqlite3.Connection,
+    pipeline_id: str,
+    subscription_id: str,
+    last_processed: Optional[str],
+    last_published_at: Optional[str] = None,
 ) -> None:
+    """Record tracking for a (pipeline, subscription) pair. ``last_processed``
+    is when the pair was last checked (None keeps the stored value);
+    ``last_published_at`` is the content watermark and only ever moves
+    forward."""
     con.execute(
-        "INSERT OR REPLACE INTO pipeline_subscription_tracking (pipeline_id, subscription_id, last_processed) VALUES (?, ?, ?)",
-        (pipeline_id, subscription_id, last_processed),
+        "INSERT INTO pipeline_subscription_tracking (pipeline_id, subscription_id, last_processed, last_published_at) "
+        "VALUES (?, ?, ?, ?) ON CONFLICT(pipeline_id, subscription_id) DO UPDATE SET "
+        "last_processed = COALESCE(excluded.last_processed, last_processed), "
+        "last_published_at = CASE WHEN last_published_at IS NULL "
+        "OR excluded.last_published_at > last_published_at "
+        "THEN COALESCE(excluded.last_published_at, last_published_at) "
+        "ELSE last_published_at END",
+        (pipeline_id, subscription_id, last_processed, last_published_at),
     )
     con.commit()
 
@@ -229,6 +261,21 @@ def get_min_tracking_for_subscription(
     return row["min_ts"] if row and row["min_ts"] else None
 
 
+def get_subscription_watermarks(con: sqlite3.Connection) -> dict[str, dict[str, str]]:
+    """Return subscription_id -> {pipeline_id: last_published_at} for every
+    tracked pair with a content watermark, in one query."""
+    cursor = con.execute(
+        "SELECT subscription_id, pipeline_id, last_published_at FROM pipeline_subscription_tracking "
+        "WHERE last_published_at IS NOT NULL"
+    )
+    watermarks: dict[str, dict[str, str]] = {}
+    for row in cursor.fetchall():
+        watermarks.setdefault(row["subscription_id"], {})[row["pipeline_id"]] = row[
+            "last_published_at"
+        ]
+    return watermarks
+
+
 def get_routing_rules(con: sqlite3.Connection) -> list[dict]:
     cursor = con.execute(
         "SELECT id, name, priority, field, operator, pattern, destination_playlist_id, destination_playlist_title, enabled, minimum_length, maximum_length, catch_all "
@@ -14,6 +14,7 @@ __all__ = [
     "get_run_decisions",
     "insert_run_decision",
     "update_pipeline_run_progress",
+    "write_run_progress",
     "cleanup_old_decisions",
     "get_runs_by_video_id",
 ]
@@ -117,10 +118,13 @@ def get_run_decisions(
     return [dict(row) for row in cursor.fetchall()]
 
 
-def insert_run_decision(con: sqlite3.Connection, run_id: int, decision: dict) -> bool:
+def insert_run_decision(
+    con: sqlite3.Connection, run_id: int, decision: dict
+) -> Optional[int]:
+    """Insert a decision and return its row id, or None on failure."""
     try:
         now = datetime.now(timezone.utc).isoformat()
-        con.execute(
+        cursor = con.execute(
             "INSERT INTO pipeline_run_decisions (run_id, video_id, title, subscription_id, subscription_title, channel_id, action, reason, reason_detail, routed_to, created_at) "
             "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
             (
@@ -138,31 +142,37 @@ def insert_run_decision(con: sqlite3.Connection, run_id: int, decision: dict) ->
             ),
         )
         con.commit()
-        return True
+        return cursor.lastrowid
     except sqlite3.Error as err:
         log.error("Failed to insert run decision: %s", err)
-        return False
+        return None
+
+
+def _progress_params(run_id: int, summary: dict) -> tuple:
+    return (
+        summary.get("subscriptions_processed", 0),
+        summary.get("subscriptions_skipped", 0),
+        summary.get("videos_added", 0),
+        summary.get("videos_skipped", 0),
+        summary.get("errors", 0),
+        summary.get("pipelines_invoked", 0),
+        summary.get("pipelines_with_errors", 0),
+        run_id,
+    )
+
+
+_PROGRESS_SQL = (
+    "UPDATE pipeline_runs SET subscriptions_processed = ?, subscriptions_skipped = ?, "
+    "videos_added = ?, videos_skipped = ?, errors = ?, "
+    "pipelines_invoked = ?, pipelines_with_errors = ? WHERE id = ?"
+)
 
 
 def update_pipeline_run_progress(
     con: sqlite3.Connection, run_id: int, summary: dict
 ) -> bool:
     try:
-        con.execute(
-            "UPDATE pipeline_runs SET subscriptions_processed = ?, subscriptions_skipped = ?, "
-            "videos_added = ?, videos_skipped = ?, errors = ?, "
-            "pipelines_invoked = ?, pipelines_with_errors = ? WHERE id = ?",
-            (
-                summary.get("subscriptions_processed", 0),
-                summary.get("subscriptions_skipped", 0),
-                summary.get("videos_added", 0),
-                summary.get("videos_skipped", 0),
-                summary.get("errors", 0),
-                summary.get("pipelines_invoked", 0),
-                summary.get("pipelines_with_errors", 0),
-                run_id,
-            ),
-        )
+        con.execute(_PROGRESS_SQL, _progress_params(run_id, summary))
         con.commit()
         return True
     except sqlite3.Error as err:
@@ -170,6 +180,66 @@ def update_pipeline_run_progress(
         return False
 
 
+def write_run_progress(
+    con: sqlite3.Connection,
+    run_id: int,
+    decisions: list[dict],
+    settled: list[dict],
+    summary: Optional[dict] = None,
+) -> bool:
+    """Record a batch of decisions in one transaction: insert the new ones,
+    settle pending inserts (matched by pipeline and video) with their
+    outcome, and update the run's counters."""
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        with con:
+            con.executemany(
+                "INSERT INTO pipeline_run_decisions (run_id, video_id, title, subscription_id, subscription_title, channel_id, "
+                "pipeline_id, pipeline_name, action, reason, reason_detail, routed_to, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id,
+                        d.get("video_id"),
+                        d.get("title"),
+                        d.get("subscription_id"),
+                        d.get("subscription_title"),
+                        d.get("channel_id"),
+                        d.get("pipeline_id"),
+                        d.get("pipeline_name"),
+                        d.get("action"),
+                        d.get("reason"),
+                        d.get("reason_detail"),
+                        d.get("routed_to"),
+                        now,
+                    )
+                    for d in decisions
+                ],
+            )
+            con.executemany(
+                "UPDATE pipeline_run_decisions SET action = ?, reason = ?, reason_detail = ?, routed_to = ? "
+                "WHERE run_id = ? AND video_id = ? AND pipeline_id IS ? AND action = 'pending'",
+                [
+                    (
+                        d.get("action"),
+                        d.get("reason"),
+                        d.get("reason_detail"),
+                        d.get("routed_to"),
+                        run_id,
+                        d.get("video_id"),
+                        d.get("pipeline_id"),
+                    )
+                    for d in settled
+                ],
+            )
+            if summary is not None:
+                con.execute(_PROGRESS_SQL, _progress_params(run_id, summary))
+        return True
+    except sqlite3.Error as err:
+        log.error("Failed to write progress of pipeline run %d: %s", run_id, err)
+        return False
+
+
 def cleanup_old_decisions(con: sqlite3.Connection, days: int = 10) -> bool:
     try:
         cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
@@ -0,0 +1,31 @@
+import sqlite3
+import logging
+from datetime import datetime, timezone
+
+log = logging.getLogger("sortarr.db.repository.quota")
+
+__all__ = [
+    "get_quota_usage",
+    "add_quota_usage",
+]
+
+
+def get_quota_usage(con: sqlite3.Connection, day: str) -> int:
+    cursor = con.execute("SELECT units FROM quota_usage WHERE day = ?", (day,))
+    row = cursor.fetchone()
+    return row["units"] if row else 0
+
+
+def add_quota_usage(con: sqlite3.Connection, day: str, units: int) -> bool:
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        con.execute(
+            "INSERT INTO quota_usage (day, units, updated_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(day) DO UPDATE SET units = units + excluded.units, updated_at = excluded.updated_at",
+            (day, units, now),
+        )
+        con.commit()
+        return True
+    except sqlite3.Error as err:
+        log.error("Failed to record quota usage: %s", err)
+        return False
@@ -0,0 +1,58 @@
+import sqlite3
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+log = logging.getLogger("sortarr.db.repository.video_metadata")
+
+__all__ = [
+    "get_video_metadata",
+    "upsert_video_metadata",
+]
+
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER on older builds
+_MAX_PARAMS = 999
+
+
+def get_video_metadata(
+    con: sqlite3.Connection, video_ids: list[str], fetched_after: Optional[str] = None
+) -> dict[str, dict]:
+    """Return cached metadata keyed by video ID. Entries fetched before
+    ``fetched_after`` are treated as expired and left out."""
+    result: dict[str, dict] = {}
+    for i in range(0, len(video_ids), _MAX_PARAMS - 1):
+        chunk = video_ids[i : i + _MAX_PARAMS - 1]
+        placeholders = ", ".join("?" for _ in chunk)
+        cursor = con.execute(
+            "SELECT video_id, duration_seconds, published_at, channel_id, title, fetched_at "
+            f"FROM video_metadata WHERE video_id IN ({placeholders}) AND fetched_at >= ?",
+            (*chunk, fetched_after or ""),
+        )
+        for row in cursor.fetchall():
+            result[row["video_id"]] = dict(row)
+    return result
+
+
+def upsert_video_metadata(con: sqlite3.Connection, videos: list[dict]) -> bool:
+    now = datetime.now(timezone.utc).isoformat()
+    try:
+        con.executemany(
+            "INSERT OR REPLACE INTO video_metadata (video_id, duration_seconds, published_at, channel_id, title, fetched_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    video["video_id"],
+                    video.get("duration_seconds", 0),
+                    video.get("published_at"),
+                    video.get("channel_id"),
+                    video.get("title"),
+                    now,
+                )
+                for video in videos
+            ],
+        )
+        con.commit()
+        return True
+    except sqlite3.Error as err:
+        log.error("Failed to upsert video metadata: %s", err)
+        return False
@@ -2,6 +2,7 @@ import sqlite3
 import logging
 from datetime import datetime, timezone
 from typing import Optional
+from sortarr.filters.title_similarity import normalize_title
 
 log = logging.getLogger("sortarr.db.repository.videos")
 
@@ -21,7 +22,8 @@ __all__ = [
     "get_cached_activities",
     "clear_activity_cache",
     "video_exists_for_pipeline",
-    "get_all_video_titles_for_pipeline",
+    "get_title_corpus_for_pipeline",
+    "get_video_ids_for_pipeline",
     "get_video_by_id",
 ]
 
@@ -44,11 +46,12 @@ def insert_video(
 ) -> bool:
     try:
         con.execute(
-            "INSERT OR REPLACE INTO videos (videoId, timestamp, title, subscriptionId, playlistId, duration_seconds, route_rule, pipeline_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            "INSERT OR REPLACE INTO videos (videoId, timestamp, title, normalized_title, subscriptionId, playlistId, duration_seconds, route_rule, pipeline_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
             (
                 video_id,
                 timestamp,
                 title,
+                normalize_title(title or ""),
                 subscription_id,
                 playlist_id,
                 duration_seconds,
@@ -213,22 +216,33 @@ def video_exists_for_pipeline(
     return False, None
 
 
-def get_all_video_titles_for_pipeline(
+def get_title_corpus_for_pipeline(
     con: sqlite3.Connection, pipeline_id: str
-) -> list[tuple[str, str]]:
+) -> list[tuple[str, str, str]]:
+    """(videoId, title, normalized_title) for every video in the pipeline,
+    in insertion order."""
     cursor = con.execute(
-        "SELECT videoId, title FROM videos WHERE pipeline_id = ?", (pipeline_id,)
+        "SELECT videoId, title, normalized_title FROM videos WHERE pipeline_id = ? ORDER BY rowid",
+        (pipeline_id,),
     )
-    return cursor.fetchall()
+    return [
+        (row["videoId"], row["title"], row["normalized_title"])
+        for row in cursor.fetchall()
+    ]
+
+
+def get_video_ids_for_pipeline(con: sqlite3.Connection, pipeline_id: str) -> set[str]:
+    cursor = con.execute(
+        "SELECT videoId FROM videos WHERE pipeline_id = ?", (pipeline_id,)
+    )
+    return {row[0] for row in cursor.fetchall()}
 
 
-def get_video_by_id(con: sqlite3.Connection, video_id: str) -> Optional[dict]:
-    """Get video details by video ID across all pipelines."""
+def get_video_by_id(con: sqlite3.Connection, video_id: str) -> list[dict]:
+    """Get every placement of a video across pipelines, in the order they
+    were last written."""
     cursor = con.execute(
-        "SELECT videoId, title, timestamp, subscriptionId, playlistId, duration_seconds, route_rule, pipeline_id FROM videos WHERE videoId = ?",
+        "SELECT videoId, title, timestamp, subscriptionId, playlistId, duration_seconds, route_rule, pipeline_id FROM videos WHERE videoId = ? ORDER BY rowid",
         (video_id,),
     )
-    row = cursor.fetchone()
-    if row:
-        return dict(row)
-    return None
+    return [dict(row) for row in cursor.fetchall()]
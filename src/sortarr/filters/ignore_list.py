@@ -1,7 +1,8 @@
+from typing import Collection
 from sortarr.models.pipeline import FilterResult
 
 
-def ignore_list_filter(video_id: str, ignore_list: list[str]) -> FilterResult:
+def ignore_list_filter(video_id: str, ignore_list: Collection[str]) -> FilterResult:
     if video_id in ignore_list:
         return FilterResult(
             passed=False,
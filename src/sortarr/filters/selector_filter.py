@@ -1,59 +1,90 @@
 import re
+from typing import Callable
 from sortarr.models.pipeline import FilterResult, PipelineSelector
 from sortarr.models.youtube import Activity
 
 
+class SelectorMatcher:
+    """Pipeline selectors with their patterns lowered and regexes compiled
+    once, for evaluating many activities."""
+
+    def __init__(self, selectors: list[PipelineSelector]):
+        self._selectors = [
+            (
+                sel.field,
+                _compile(sel.operator, sel.pattern),
+                sel.combine_operator.upper(),
+            )
+            for sel in selectors
+        ]
+
+    def __bool__(self) -> bool:
+        return bool(self._selectors)
+
+    def check(self, activity: Activity, channel_title: str) -> FilterResult:
+        return self.check_fields(selector_fields(activity, channel_title))
+
+    def check_fields(self, fields: dict[str, str]) -> FilterResult:
+        """Evaluate against field values from selector_fields(), so they can
+        be shared by every pipeline looking at the same activity."""
+        if not self._selectors:
+            return FilterResult(passed=True)
+
+        result = None
+        for field, predicate, op in self._selectors:
+            value = fields.get(field, "")
+            matched = bool(value) and predicate(value)
+            if result is None:
+                result = matched
+            elif op == "OR":
+                result = result or matched
+            else:
+                result = result and matched
+
+        if not result:
+            return FilterResult(
+                passed=False,
+                reason="Selector did not match",
+                skipped_by="selector",
+            )
+        return FilterResult(passed=True)
+
+
 def selector_filter(
     activity: Activity,
     channel_title: str,
     selectors: list[PipelineSelector],
     mode: str = "AND",  # kept for backward compat
 ) -> FilterResult:
-    if not selectors:
-        return FilterResult(passed=True)
-
-    result = None
-    for sel in selectors:
-        value = _get_field_value(activity, channel_title, sel.field)
-        matched = _matches(value, sel.operator, sel.pattern)
-        if result is None:
-            result = matched
-        else:
-            op = sel.combine_operator.upper()
-            if op == "OR":
-                result = result or matched
-            else:
-                result = result and matched
+    return SelectorMatcher(selectors).check(activity, channel_title)
 
-    if not result:
-        return FilterResult(
-            passed=False,
-            reason="Selector did not match",
-            skipped_by="selector",
-        )
-    return FilterResult(passed=True)
 
-
-def _get_field_value(activity: Activity, channel_title: str, field: str) -> str:
-    mapping = {
+def selector_fields(activity: Activity, channel_title: str) -> dict[str, str]:
+    return {
         "title": activity.title,
         "video_title": activity.title,
         "channel_title": channel_title,
         "description": activity.description or "",
     }
-    return mapping.get(field, "")
 
 
-def _matches(value: str, operator: str, pattern: str) -> bool:
-    if not value or not pattern:
-        return False
+def _never(value: str) -> bool:
+    return False
+
+
+def _compile(operator: str, pattern: str) -> Callable[[str], bool]:
+    if not pattern:
+        return _never
     if operator == "contains":
-        return pattern.lower() in value.lower()
+        needle = pattern.lower()
+        return lambda value: needle in value.lower()
     elif operator == "regex":
         try:
-            return bool(re.search(pattern, value, re.IGNORECASE))
+            compiled = re.compile(pattern, re.IGNORECASE)
         except re.error:
-            return False
+            return _never
+        return lambda value: compiled.search(value) is not None
     elif operator == "equals":
-        return value.lower() == pattern.lower()
-    return False
+        target = pattern.lower()
+        return lambda value: value.lower() == target
+    return _never
@@ -1,51 +1,259 @@
 import re
+from array import array
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, Optional
 from sortarr.models.pipeline import FilterResult
 
+try:
+    import Levenshtein
+except ImportError:  # C extension is optional; fall back to pure Python
+    Levenshtein = None
 
-def _normalize(title: str) -> str:
+# Character n-gram size used by TitleSimilarityIndex postings
+NGRAM = 3
+
+
+def normalize_title(title: str) -> str:
     return re.sub(r"[^a-zA-Z0-9\-_]+", " ", title).lower()
 
 
 def _fuzz_ratio(s1: str, s2: str) -> int:
     if not s1 or not s2:
         return 0
+    max_len = max(len(s1), len(s2))
+    return int((1 - _distance(s1, s2, max_len) / max_len) * 100)
+
+
+@lru_cache(maxsize=4096)
+def _max_distance(length: int, threshold: int) -> int:
+    """Largest edit distance between strings whose longer side has `length`
+    characters that still scores above `threshold`; -1 if none can."""
+    d = max(0, length * (99 - threshold) // 100)
+    while d < length and int((1 - (d + 1) / length) * 100) > threshold:
+        d += 1
+    while d >= 0 and not int((1 - d / length) * 100) > threshold:
+        d -= 1
+    return min(d, length)
+
+
+def _bounded_distance(s1: str, s2: str, max_dist: int) -> int:
+    """Levenshtein distance restricted to a diagonal band of width max_dist,
+    giving up early. Returns max_dist + 1 when the distance exceeds it."""
+    if s1 == s2:
+        return 0
     shorter, longer = (s1, s2) if len(s1) <= len(s2) else (s2, s1)
     m = len(shorter)
     n = len(longer)
+    over = max_dist + 1
+    if n - m > max_dist:
+        return over
     if m == 0:
-        return 0
-    costs = list(range(m + 1))
+        return n
+    prev = [j if j <= max_dist else over for j in range(m + 1)]
     for i in range(1, n + 1):
-        prev = costs[0]
-        costs[0] = i
-        for j in range(1, m + 1):
-            temp = costs[j]
-            costs[j] = min(
-                costs[j] + 1,
-                costs[j - 1] + 1,
-                prev + (0 if shorter[j - 1] == longer[i - 1] else 1),
+        cur = [over] * (m + 1)
+        cur[0] = i if i <= max_dist else over
+        row_min = cur[0]
+        ch = longer[i - 1]
+        for j in range(max(1, i - max_dist), min(m, i + max_dist) + 1):
+            cost = min(
+                prev[j] + 1,
+                cur[j - 1] + 1,
+                prev[j - 1] + (0 if shorter[j - 1] == ch else 1),
             )
-            prev = temp
-    max_len = max(n, m)
-    if max_len == 0:
-        return 100
-    return int((1 - costs[m] / max_len) * 100)
+            if cost > over:
+                cost = over
+            cur[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > max_dist:
+            return over
+        prev = cur
+    return prev[m]
+
+
+def _native_distance(s1: str, s2: str, max_dist: int) -> int:
+    return Levenshtein.distance(s1, s2, score_cutoff=max_dist)
+
+
+# name -> fn(s1, s2, max_dist) returning the distance, or max_dist + 1
+DISTANCE_BACKENDS = {"python": _bounded_distance}
+if Levenshtein is not None:
+    DISTANCE_BACKENDS["levenshtein"] = _native_distance
+
+_backend = "levenshtein" if Levenshtein is not None else "python"
+_distance = DISTANCE_BACKENDS[_backend]
+
+
+def distance_backend() -> str:
+    return _backend
+
+
+def set_distance_backend(name: str) -> None:
+    """Select the edit-distance implementation used for title similarity."""
+    global _backend, _distance
+    if name not in DISTANCE_BACKENDS:
+        raise ValueError(
+            f"Unknown distance backend {name!r}; available: {', '.join(DISTANCE_BACKENDS)}"
+        )
+    _backend = name
+    _distance = DISTANCE_BACKENDS[name]
+
+
+def _ratio_above(s1: str, s2: str, threshold: int) -> Optional[int]:
+    """The _fuzz_ratio of two normalized titles if it exceeds threshold,
+    else None. Pairs that cannot reach it are rejected without a full
+    distance computation."""
+    if not s1 or not s2:
+        return 0 if 0 > threshold else None
+    max_len = max(len(s1), len(s2))
+    max_dist = _max_distance(max_len, threshold)
+    if max_dist < 0:
+        return None
+    dist = _distance(s1, s2, max_dist)
+    if dist > max_dist:
+        return None
+    return int((1 - dist / max_len) * 100)
+
+
+def exact_title_match(
+    new_title: str,
+    video_id: str,
+    existing_title: str,
+    threshold: int,
+    normalized: Optional[str] = None,
+) -> Optional[FilterResult]:
+    """The similarity result for a stored title whose normalized form equals
+    the new one, or None if even identical titles can't beat threshold."""
+    if normalized is None:
+        normalized = normalize_title(new_title)
+    if not normalized or 100 <= threshold:
+        return None
+    return _similar(new_title, video_id, existing_title, 100, threshold)
+
+
+def _similar(
+    new_title: str, video_id: str, existing_title: str, ratio: int, threshold: int
+) -> FilterResult:
+    return FilterResult(
+        passed=False,
+        reason=f"Title '{new_title}' is {ratio}% similar to existing video '{video_id}' (threshold: {threshold}%)",
+        skipped_by="title_similarity",
+        matched_video_id=video_id,
+        matched_title=existing_title,
+        match_type="title_similarity",
+    )
+
+
+def _ngrams(normalized: str) -> set[str]:
+    return {normalized[i : i + NGRAM] for i in range(len(normalized) - NGRAM + 1)}
+
+
+class TitleSimilarityIndex:
+    """A pipeline's existing titles indexed for similarity lookups.
+
+    Character n-gram postings and length bounds pick the few titles that
+    could score above the threshold; only those are verified with a banded
+    Levenshtein. find() gives the same answer as title_similarity() over
+    the titles in insertion order; exact() answers exact normalized
+    duplicates from a dict without a fuzzy pass."""
+
+    def __init__(self, titles: Iterable[tuple[str, ...]] = ()):
+        """titles holds (video_id, title) or, with the stored normalized
+        form, (video_id, title, normalized_title) rows."""
+        self._entries: list[tuple[str, str, str]] = []  # (id, title, normalized)
+        self._distinct: list[int] = []  # distinct n-grams per entry
+        self._by_length: dict[int, list[int]] = {}
+        self._postings: dict[str, array] = {}
+        self._exact: dict[str, int] = {}  # normalized -> earliest entry
+        for row in titles:
+            self.add(*row)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, video_id: str, title: str, normalized: Optional[str] = None) -> None:
+        if normalized is None:
+            normalized = normalize_title(title)
+        doc = len(self._entries)
+        grams = _ngrams(normalized)
+        self._entries.append((video_id, title, normalized))
+        self._exact.setdefault(normalized, doc)
+        self._distinct.append(len(grams))
+        self._by_length.setdefault(len(normalized), []).append(doc)
+        for gram in grams:
+            postings = self._postings.get(gram)
+            if postings is None:
+                postings = self._postings[gram] = array("I")
+            postings.append(doc)
+
+    def _candidates(self, normalized: str, threshold: int) -> list[int]:
+        """Entries that could score above threshold, in insertion order.
+
+        Within edit distance k the longer string's distinct n-grams can lose
+        at most k * NGRAM members, so max(distinct) - k * NGRAM of them must
+        be shared; lengths further apart than k are skipped outright."""
+        length = len(normalized)
+        grams = _ngrams(normalized)
+        candidates: list[int] = []
+        pruned: dict[int, int] = {}  # length -> k for lengths needing overlap
+        for other, docs in self._by_length.items():
+            max_dist = _max_distance(max(length, other) or 1, threshold)
+            if max_dist < 0 or abs(length - other) > max_dist:
+                continue
+            if len(grams) - max_dist * NGRAM <= 0:
+                candidates.extend(docs)
+            else:
+                pruned[other] = max_dist
+        if pruned:
+            shared: Counter = Counter()
+            for gram in grams:
+                shared.update(self._postings.get(gram, ()))
+            for doc, count in shared.items():
+                max_dist = pruned.get(len(self._entries[doc][2]))
+                if max_dist is None:
+                    continue
+                if count >= max(len(grams), self._distinct[doc]) - max_dist * NGRAM:
+                    candidates.append(doc)
+        candidates.sort()
+        return candidates
+
+    def exact(
+        self, new_title: str, threshold: int, normalized: Optional[str] = None
+    ) -> Optional[FilterResult]:
+        """The match against the earliest title with the same normalized
+        form, or None if there is none or it can't beat threshold."""
+        if normalized is None:
+            normalized = normalize_title(new_title)
+        doc = self._exact.get(normalized)
+        if doc is None:
+            return None
+        video_id, existing_title, _ = self._entries[doc]
+        return exact_title_match(
+            new_title, video_id, existing_title, threshold, normalized
+        )
+
+    def find(
+        self, new_title: str, threshold: int, normalized: Optional[str] = None
+    ) -> FilterResult:
+        if normalized is None:
+            normalized = normalize_title(new_title)
+        for doc in self._candidates(normalized, threshold):
+            video_id, existing_title, existing = self._entries[doc]
+            ratio = _ratio_above(normalized, existing, threshold)
+            if ratio is not None:
+                return _similar(new_title, video_id, existing_title, ratio, threshold)
+        return FilterResult(passed=True)
 
 
 def title_similarity(
     new_title: str, existing_titles: list[tuple[str, str]], threshold: int
 ) -> FilterResult:
-    normalized_new = _normalize(new_title)
+    normalized_new = normalize_title(new_title)
     for video_id, existing_title in existing_titles:
-        normalized_existing = _normalize(existing_title)
-        ratio = _fuzz_ratio(normalized_new, normalized_existing)
-        if ratio > threshold:
-            return FilterResult(
-                passed=False,
-                reason=f"Title '{new_title}' is {ratio}% similar to existing video '{video_id}' (threshold: {threshold}%)",
-                skipped_by="title_similarity",
-                matched_video_id=video_id,
-                matched_title=existing_title,
-                match_type="title_similarity",
-            )
+        normalized_existing = normalize_title(existing_title)
+        ratio = _ratio_above(normalized_new, normalized_existing, threshold)
+        if ratio is not None:
+            return _similar(new_title, video_id, existing_title, ratio, threshold)
     return FilterResult(passed=True)
@@ -1,16 +1,49 @@
 import re
+import threading
+from typing import Iterable, Optional
 from sortarr.models.pipeline import FilterResult
 
 
-def word_filter(title: str, ignore_words: list[str]) -> FilterResult:
-    if not ignore_words:
-        return FilterResult(passed=True)
-    title_lower = title.lower()
-    for word in ignore_words:
-        if not word:
-            continue
-        pattern = re.compile(r"\b" + re.escape(word.lower()) + r"\b", re.IGNORECASE)
-        if pattern.search(title_lower):
+class WordMatcher:
+    """Ignore words compiled into a single trie-shaped regex, so a title is
+    scanned once regardless of how many words the lists hold."""
+
+    def __init__(self, ignore_words: Iterable[str]):
+        # lowered word -> the entry as written, first occurrence wins
+        self._words: dict[str, str] = {}
+        for word in ignore_words:
+            if word:
+                self._words.setdefault(word.lower(), word)
+        self._pattern = (
+            re.compile(r"\b" + _trie_pattern(self._words) + r"\b", re.IGNORECASE)
+            if self._words
+            else None
+        )
+
+    def __bool__(self) -> bool:
+        return self._pattern is not None
+
+    def match(self, title: str) -> Optional[str]:
+        """Return the ignore word found in the title, if any."""
+        if self._pattern is None:
+            return None
+        m = self._pattern.search(title.lower())
+        if m is None:
+            return None
+        text = m.group(0)
+        word = self._words.get(text.lower())
+        if word is None:
+            # Case-insensitive matches that don't round-trip through lower()
+            word = next(
+                w
+                for lowered, w in self._words.items()
+                if re.fullmatch(re.escape(lowered), text, re.IGNORECASE)
+            )
+        return word
+
+    def check(self, title: str) -> FilterResult:
+        word = self.match(title)
+        if word is not None:
             return FilterResult(
                 passed=False,
                 reason=f"Title contains ignored word '{word}'",
@@ -18,4 +51,63 @@ def word_filter(title: str, ignore_words: list[str]) -> FilterResult:
                 matched_title=title,
                 match_type="word",
             )
-    return FilterResult(passed=True)
+        return FilterResult(passed=True)
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node: dict) -> str:
+    branches = [
+        re.escape(ch) + _node_pattern(child) for ch, child in sorted(node.items()) if ch
+    ]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if "" in node:
+        # A word ends here; try the longer words first, greedy
+        return "(?:" + body + ")?"
+    return body
+
+
+# (list_id, ...) -> (words the matcher was built from, matcher)
+_matchers: dict[tuple[str, ...], tuple[tuple[str, ...], WordMatcher]] = {}
+_matchers_lock = threading.Lock()
+
+
+def cached_word_matcher(list_ids: Iterable[str], words: Iterable[str]) -> WordMatcher:
+    """Return the matcher for these ignore lists, rebuilding it only when
+    their entries differ from the ones it was built from."""
+    key = tuple(sorted(list_ids))
+    words = tuple(words)
+    with _matchers_lock:
+        cached = _matchers.get(key)
+        if cached is not None and cached[0] == words:
+            return cached[1]
+    matcher = WordMatcher(words)
+    with _matchers_lock:
+        _matchers[key] = (words, matcher)
+    return matcher
+
+
+def invalidate_word_matchers(list_id: Optional[str] = None) -> None:
+    """Drop cached matchers built from list_id, or all of them."""
+    with _matchers_lock:
+        if list_id is None:
+            _matchers.clear()
+            return
+        for key in [k for k in _matchers if list_id in k]:
+            del _matchers[key]
+
+
+def word_filter(title: str, ignore_words: list[str]) -> FilterResult:
+    if not ignore_words:
+        return FilterResult(passed=True)
+    return WordMatcher(ignore_words).check(title)
@@ -37,5 +37,19 @@ last_pipeline_status = Gauge(
 )
 quota_estimate = Gauge(
     "sortarr_quota_estimate",
-    "Estimated YouTube API quota used in current run",
+    "YouTube API quota units used in the current Pacific quota day",
+)
+video_metadata_lookups_total = Counter(
+    "sortarr_video_metadata_lookups_total",
+    "Video metadata lookups served from the DB cache or the API",
+    ["result"],
+)
+client_checkout_wait_seconds = Histogram(
+    "sortarr_client_checkout_wait_seconds",
+    "Time spent waiting for a pooled YouTube API client",
+    buckets=[0.001, 0.01, 0.1, 0.5, 1, 5, 30, 120],
+)
+clients_in_use = Gauge(
+    "sortarr_clients_in_use",
+    "Pooled YouTube API clients currently checked out",
 )
@@ -30,6 +30,7 @@ class VideoResult:
     filter_result: Optional[FilterResult] = None
     route_result: Optional[RouteResult] = None
     added: bool = False
+    pending: bool = False  # accepted, playlist insert still queued
     error: Optional[str] = None
 
 
@@ -12,6 +12,8 @@ class Channel:
 class Playlist:
     id: str
     title: str
+    item_count: int = 0
+    etag: str = ""
 
 
 @dataclass
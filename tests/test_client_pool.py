@@ -0,0 +1,94 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+from sortarr import metrics
+from sortarr.core.client_pool import MAX_POOL_SIZE, ClientPool
+
+
+def _source():
+    youtube = MagicMock()
+    youtube.spawn.side_effect = lambda: MagicMock(credentials=youtube.credentials)
+    return youtube
+
+
+def test_checkout_reuses_idle_clients():
+    youtube = _source()
+    pool = ClientPool(2)
+
+    with pool.checkout(youtube) as first:
+        with pool.checkout(youtube) as second:
+            assert first is not second
+            assert pool.in_use == 2
+    with pool.checkout(youtube) as again:
+        assert again in (first, second)
+    assert youtube.spawn.call_count == 2
+
+    pool.close()
+    first.close.assert_called_once()
+    second.close.assert_called_once()
+
+
+def test_checkout_bounds_concurrent_clients():
+    youtube = _source()
+    pool = ClientPool(2)
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def _work(_):
+        with pool.checkout(youtube):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.01)
+            with lock:
+                active[0] -= 1
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(_work, range(12)))
+    assert peak[0] == 2
+    assert youtube.spawn.call_count <= 2
+
+
+def test_clients_with_replaced_credentials_are_closed():
+    old, new = _source(), _source()
+    pool = ClientPool(1)
+    with pool.checkout(old) as stale:
+        pass
+    with pool.checkout(new) as client:
+        assert client.credentials is new.credentials
+    stale.close.assert_called_once()
+
+
+def test_shrinking_pool_closes_surplus_clients():
+    youtube = _source()
+    pool = ClientPool(2)
+    with pool.checkout(youtube) as first:
+        with pool.checkout(youtube) as second:
+            pool.size = 1
+    assert first.close.called != second.close.called
+
+    pool.size = 50
+    assert pool.limit == MAX_POOL_SIZE
+
+
+def test_checkout_wait_is_measured():
+    youtube = _source()
+    pool = ClientPool(1)
+    before = metrics.client_checkout_wait_seconds._sum.get()
+    released = threading.Event()
+
+    def _hold():
+        with pool.checkout(youtube):
+            released.wait(1)
+
+    holder = threading.Thread(target=_hold)
+    holder.start()
+    while pool.in_use == 0:
+        time.sleep(0.001)
+    threading.Timer(0.05, released.set).start()
+    with pool.checkout(youtube):
+        assert metrics.clients_in_use._value.get() == 1
+    holder.join()
+    assert metrics.client_checkout_wait_seconds._sum.get() - before >= 0.04
@@ -155,3 +155,167 @@ def test_ignore_entries(db_con):
     assert entries[0]["pattern"] == "updated-channel"
     assert delete_ignore_entry(db_con, eid)
     assert get_ignore_entries(db_con, "subscription") == []
+
+
+def test_ignore_lists_by_pipeline(db_con):
+    from sortarr.db.repository import (
+        create_ignore_list,
+        create_pipeline,
+        get_ignore_lists_by_pipeline,
+        set_pipeline_ignore_lists,
+    )
+
+    create_pipeline(db_con, "p1", "One", "PL1", "Default")
+    create_pipeline(db_con, "p2", "Two", "PL1", "Default")
+    create_ignore_list(db_con, "il1", "Words", "word")
+    create_ignore_list(db_con, "il2", "Channels", "subscription")
+    set_pipeline_ignore_lists(db_con, "p1", ["il1", "il2"])
+    lists = get_ignore_lists_by_pipeline(db_con)
+    assert sorted(lists["p1"]) == [("il1", "word"), ("il2", "subscription")]
+    assert "p2" not in lists
+
+
+def test_video_metadata_cache(db_con):
+    from sortarr.db.repository.video_metadata import (
+        get_video_metadata,
+        upsert_video_metadata,
+    )
+
+    assert get_video_metadata(db_con, ["v1"]) == {}
+    assert upsert_video_metadata(
+        db_con,
+        [{"video_id": "v1", "duration_seconds": 90, "title": "One"}],
+    )
+    cached = get_video_metadata(db_con, ["v1", "v2"])
+    assert list(cached) == ["v1"]
+    assert cached["v1"]["duration_seconds"] == 90
+    # Entries fetched before the cutoff are expired
+    assert get_video_metadata(db_con, ["v1"], fetched_after="9999-01-01") == {}
+
+
+def test_content_watermark_only_moves_forward(db_con):
+    from sortarr.db.repository.pipeline import (
+        get_pipeline_tracking,
+        get_subscription_watermarks,
+        upsert_pipeline_tracking,
+    )
+
+    upsert_pipeline_tracking(db_con, "p1", "s1", None, "2024-06-02T00:00:00Z")
+    upsert_pipeline_tracking(db_con, "p1", "s1", None, "2024-06-01T00:00:00Z")
+    upsert_pipeline_tracking(db_con, "p2", "s1", "2024-06-05T00:00:00+00:00")
+    assert get_pipeline_tracking(db_con, "p1", "s1") is None
+    assert get_pipeline_tracking(db_con, "p2", "s1") == "2024-06-05T00:00:00+00:00"
+    upsert_pipeline_tracking(db_con, "p1", "s1", "2024-06-05T00:00:00+00:00")
+    assert get_subscription_watermarks(db_con) == {"s1": {"p1": "2024-06-02T00:00:00Z"}}
+
+
+def test_content_watermark_migration_seeds_from_run_time(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    con = sqlite3.connect(db_path)
+    con.execute(
+        "CREATE TABLE pipeline_subscription_tracking (pipeline_id TEXT NOT NULL, "
+        "subscription_id TEXT NOT NULL, last_processed TEXT, "
+        "PRIMARY KEY (pipeline_id, subscription_id))"
+    )
+    con.executemany(
+        "INSERT INTO pipeline_subscription_tracking VALUES (?, ?, ?)",
+        [
+            ("p1", "s1", "2024-06-01T12:30:00.123456+00:00"),
+            ("p1", "s2", "2024-06-01T14:30:00+02:00"),
+            ("p1", "s3", "not a time"),
+        ],
+    )
+    con.commit()
+    con.close()
+    assert init_db(db_path)
+    con = sqlite3.connect(db_path)
+    con.row_factory = sqlite3.Row
+    from sortarr.db.repository.pipeline import get_subscription_watermarks
+
+    # Seeds are stored in publishedAt's format; unparseable ones stay unset
+    assert get_subscription_watermarks(con) == {
+        "s1": {"p1": "2024-06-01T12:30:00Z"},
+        "s2": {"p1": "2024-06-01T12:30:00Z"},
+    }
+    con.close()
+
+
+def test_normalized_title_stored(db_con):
+    from sortarr.db.repository.videos import get_title_corpus_for_pipeline
+
+    insert_video(db_con, "v1", "now", "Hello, World!", "s1", pipeline_id="p1")
+    insert_video(db_con, "v2", "now", "hello world", "s1", pipeline_id="p1")
+    assert get_title_corpus_for_pipeline(db_con, "p1") == [
+        ("v1", "Hello, World!", "hello world "),
+        ("v2", "hello world", "hello world"),
+    ]
+    assert get_title_corpus_for_pipeline(db_con, "p2") == []
+
+
+def test_normalized_title_migration_backfills(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    con = sqlite3.connect(db_path)
+    con.execute(
+        "CREATE TABLE videos (videoId TEXT PRIMARY KEY, timestamp TEXT, title TEXT, "
+        "subscriptionId TEXT, playlistId TEXT, duration_seconds INTEGER, route_rule TEXT)"
+    )
+    con.execute(
+        "INSERT INTO videos VALUES ('v1', 'now', 'Weekly Vlog #12', 's1', 'PL1', 60, '')"
+    )
+    con.commit()
+    con.close()
+    assert init_db(db_path)
+    con = sqlite3.connect(db_path)
+    row = con.execute("SELECT normalized_title FROM videos").fetchone()
+    assert row[0] == "weekly vlog 12"
+    indexes = [r[1] for r in con.execute("PRAGMA index_list(videos)")]
+    assert "idx_videos_pipeline_normalized_title" in indexes
+    pk = {r[1] for r in con.execute("PRAGMA table_info(videos)") if r[5]}
+    assert pk == {"pipeline_id", "videoId"}
+    row = con.execute("SELECT pipeline_id, playlistId FROM videos").fetchone()
+    assert row == ("", "PL1")
+    con.close()
+
+
+def test_video_ledger_keeps_one_row_per_pipeline(db_con):
+    from sortarr.db.repository.videos import (
+        get_video_by_id,
+        video_exists_for_pipeline,
+    )
+
+    insert_video(db_con, "v1", "t1", "Video", "s1", "PL_A", pipeline_id="pA")
+    insert_video(db_con, "v1", "t2", "Video", "s1", "PL_B", pipeline_id="pB")
+    insert_video(db_con, "v1", "t3", "Video", "s1", "PL_A", pipeline_id="pA")
+    assert video_exists_for_pipeline(db_con, "v1", "pA")[0]
+    assert video_exists_for_pipeline(db_con, "v1", "pB")[0]
+    placements = get_video_by_id(db_con, "v1")
+    # Re-inserting for pA replaces only pA's row, which becomes the latest
+    assert [(p["pipeline_id"], p["timestamp"]) for p in placements] == [
+        ("pB", "t2"),
+        ("pA", "t3"),
+    ]
+    assert get_video_by_id(db_con, "missing") == []
+
+
+def test_ledger_migration_recovers_from_interrupted_rebuild(tmp_path):
+    db_path = str(tmp_path / "legacy.db")
+    con = sqlite3.connect(db_path)
+    con.execute(
+        "CREATE TABLE videos (videoId TEXT PRIMARY KEY, timestamp TEXT, title TEXT, "
+        "subscriptionId TEXT, playlistId TEXT, duration_seconds INTEGER, route_rule TEXT)"
+    )
+    con.execute("INSERT INTO videos VALUES ('v1', 'now', 'Vlog', 's1', 'PL1', 60, '')")
+    # Left behind by a rebuild that died before dropping the old table
+    con.execute("CREATE TABLE videos_ledger (videoId TEXT)")
+    con.commit()
+    con.close()
+
+    assert init_db(db_path)
+    con = sqlite3.connect(db_path)
+    tables = {r[0] for r in con.execute("SELECT name FROM sqlite_master")}
+    assert "videos_ledger" not in tables
+    assert "insert_outbox" in tables
+    pk = {r[1] for r in con.execute("PRAGMA table_info(videos)") if r[5]}
+    assert pk == {"pipeline_id", "videoId"}
+    assert con.execute("SELECT videoId FROM videos").fetchall() == [("v1",)]
+    con.close()
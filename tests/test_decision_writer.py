@@ -0,0 +1,92 @@
+import sqlite3
+import time
+import pytest
+from sortarr.core.decision_writer import DecisionWriter
+from sortarr.db import repository as repo
+from sortarr.db.migrations import init_db
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "test.db")
+    init_db(path)
+    return path
+
+
+@pytest.fixture
+def db_con(db_path):
+    con = sqlite3.connect(db_path)
+    con.row_factory = sqlite3.Row
+    yield con
+    con.close()
+
+
+def _decision(video_id, action="skipped", pipeline_id="p1"):
+    return {
+        "video_id": video_id,
+        "title": f"Video {video_id}",
+        "pipeline_id": pipeline_id,
+        "action": action,
+        "reason": "matched" if action != "skipped" else "word",
+    }
+
+
+def _wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_batch_written_once_full(db_path, db_con):
+    run_id = repo.create_pipeline_run(db_con)
+    writer = DecisionWriter(db_path, run_id, batch_size=3, interval=60)
+    writer.start()
+    try:
+        writer.add(_decision("v1"))
+        writer.add(_decision("v2"))
+        time.sleep(0.05)
+        assert repo.get_run_decisions(db_con, run_id) == []
+        writer.add(_decision("v3"))
+        assert _wait_for(lambda: len(repo.get_run_decisions(db_con, run_id)) == 3)
+    finally:
+        writer.close()
+
+
+def test_progress_visible_within_interval(db_path, db_con):
+    run_id = repo.create_pipeline_run(db_con)
+    writer = DecisionWriter(db_path, run_id, batch_size=100, interval=0.05)
+    writer.start()
+    try:
+        writer.add(_decision("v1"))
+        writer.progress({"videos_skipped": 1})
+        writer.progress({"videos_skipped": 2})
+        assert _wait_for(
+            lambda: repo.get_pipeline_run(db_con, run_id)["videos_skipped"] == 2
+        )
+        assert len(repo.get_run_decisions(db_con, run_id)) == 1
+    finally:
+        writer.close()
+
+
+def test_close_flushes_and_settles_pending(db_path, db_con):
+    run_id = repo.create_pipeline_run(db_con)
+    writer = DecisionWriter(db_path, run_id, batch_size=100, interval=60)
+    writer.start()
+    writer.add(_decision("v1", "pending"))
+    writer.add(_decision("v1", "pending", pipeline_id="p2"))
+    writer.add(_decision("v2"))
+    writer.add(_decision("v1", "added"), settles=True)
+    writer.progress({"videos_added": 1, "videos_skipped": 1})
+    writer.close()
+
+    decisions = repo.get_run_decisions(db_con, run_id)
+    assert [(d["video_id"], d["action"]) for d in decisions] == [
+        ("v1", "added"),
+        ("v1", "pending"),
+        ("v2", "skipped"),
+    ]
+    run = repo.get_pipeline_run(db_con, run_id)
+    assert (run["videos_added"], run["videos_skipped"]) == (1, 1)
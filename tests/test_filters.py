@@ -1,3 +1,4 @@
+import pytest
 from sortarr.filters.word_filter import word_filter
 from sortarr.filters.title_similarity import title_similarity
 from sortarr.filters.ignore_list import ignore_list_filter
@@ -26,6 +27,40 @@ class TestWordFilter:
         result = word_filter("", ["test"])
         assert result.passed
 
+    def test_reports_matched_word(self):
+        result = word_filter("Full Livestream Replay", ["live", "livestream"])
+        assert result.reason == "Title contains ignored word 'livestream'"
+
+    def test_word_boundaries_with_shared_prefixes(self):
+        from sortarr.filters.word_filter import WordMatcher
+
+        matcher = WordMatcher(["new york", "new", "c++"])
+        assert matcher.match("Visiting New Yorkers") == "new"
+        assert matcher.match("Newest upload") is None
+        assert matcher.match("c++ tips") is None  # no boundary after "+"
+        assert matcher.match("c++x") == "c++"
+
+    def test_many_words(self):
+        from sortarr.filters.word_filter import WordMatcher
+
+        matcher = WordMatcher([f"word{i}" for i in range(5000)])
+        assert matcher.match("this has word4321 in it") == "word4321"
+        assert matcher.match("this has word in it") is None
+
+    def test_cached_matcher_rebuilds_on_change(self):
+        from sortarr.filters.word_filter import (
+            cached_word_matcher,
+            invalidate_word_matchers,
+        )
+
+        first = cached_word_matcher(["wl1"], ["python"])
+        assert cached_word_matcher(["wl1"], ["python"]) is first
+        changed = cached_word_matcher(["wl1"], ["python", "rust"])
+        assert changed is not first
+        assert changed.match("Rust tutorial") == "rust"
+        invalidate_word_matchers("wl1")
+        assert cached_word_matcher(["wl1"], ["python", "rust"]) is not changed
+
 
 class TestIgnoreListFilter:
     def test_video_in_ignore_list(self):
@@ -60,6 +95,167 @@ class TestTitleSimilarity:
         assert not result.passed
 
 
+def _reference_ratio(s1, s2):
+    """The original full-matrix ratio, independent of the distance backend."""
+    if not s1 or not s2:
+        return 0
+    shorter, longer = (s1, s2) if len(s1) <= len(s2) else (s2, s1)
+    costs = list(range(len(shorter) + 1))
+    for i in range(1, len(longer) + 1):
+        prev = costs[0]
+        costs[0] = i
+        for j in range(1, len(shorter) + 1):
+            temp = costs[j]
+            costs[j] = min(
+                costs[j] + 1,
+                costs[j - 1] + 1,
+                prev + (0 if shorter[j - 1] == longer[i - 1] else 1),
+            )
+            prev = temp
+    return int((1 - costs[len(shorter)] / len(longer)) * 100)
+
+
+def _brute_force_similarity(new_title, existing_titles, threshold):
+    from sortarr.filters.title_similarity import normalize_title
+
+    for video_id, existing_title in existing_titles:
+        ratio = _reference_ratio(
+            normalize_title(new_title), normalize_title(existing_title)
+        )
+        if ratio > threshold:
+            return video_id, ratio
+    return None
+
+
+def _random_titles(seed, count):
+    import random
+
+    rng = random.Random(seed)
+    words = ["live", "stream", "part", "episode", "review", "the", "a", "new", "vlog"]
+    titles = []
+    for i in range(count):
+        title = " ".join(rng.choice(words) for _ in range(rng.randint(1, 6)))
+        if rng.random() < 0.5:
+            title += f" {rng.randint(1, 30)}"
+        if titles and rng.random() < 0.3:
+            # Near-duplicate of an earlier title
+            base = list(rng.choice(titles))
+            for _ in range(rng.randint(0, 3)):
+                base[rng.randrange(len(base))] = rng.choice("abcxyz ")
+            title = "".join(base)
+        titles.append(title)
+    return titles
+
+
+class TestTitleSimilarityIndex:
+    def test_matches_brute_force(self):
+        from sortarr.filters.title_similarity import TitleSimilarityIndex
+
+        titles = _random_titles(1, 160)
+        existing = [(f"v{i}", t) for i, t in enumerate(titles[:120])]
+        index = TitleSimilarityIndex(existing)
+        for threshold in (0, 80, 100):
+            for title in titles[120:] + ["", "!!!", "a"]:
+                expected = _brute_force_similarity(title, existing, threshold)
+                for result in (
+                    index.find(title, threshold),
+                    title_similarity(title, existing, threshold),
+                ):
+                    if expected is None:
+                        assert result.passed
+                    else:
+                        assert result.matched_video_id == expected[0]
+                        assert f"is {expected[1]}% similar" in result.reason
+
+    def test_add_makes_title_visible(self):
+        from sortarr.filters.title_similarity import TitleSimilarityIndex
+
+        index = TitleSimilarityIndex()
+        assert index.find("Weekly Vlog 12", 80).passed
+        index.add("v1", "Weekly Vlog #12")
+        assert len(index) == 1
+        result = index.find("Weekly Vlog 12", 80)
+        assert result.matched_video_id == "v1"
+        assert result.matched_title == "Weekly Vlog #12"
+
+    def test_exact_returns_earliest_normalized_duplicate(self):
+        from sortarr.filters.title_similarity import TitleSimilarityIndex
+
+        index = TitleSimilarityIndex([("v1", "Hello, World!", "hello world ")])
+        index.add("v2", "hello world ")
+        assert index.exact("Weekly Vlog", 80) is None
+        result = index.exact("HELLO world!", 80)
+        assert result.matched_video_id == "v1"
+        assert "is 100% similar" in result.reason
+        assert index.exact("HELLO world!", 100) is None
+
+
+def _fixture_titles():
+    from pathlib import Path
+
+    path = Path(__file__).parent / "fixtures" / "titles.txt"
+    return [line for line in path.read_text().splitlines() if line]
+
+
+class TestDistanceBackends:
+    @pytest.fixture
+    def backend(self):
+        from sortarr.filters.title_similarity import (
+            distance_backend,
+            set_distance_backend,
+        )
+
+        original = distance_backend()
+        yield set_distance_backend
+        set_distance_backend(original)
+
+    def test_unknown_backend_rejected(self, backend):
+        with pytest.raises(ValueError):
+            backend("nope")
+
+    def test_native_ratios_match_python(self, backend):
+        pytest.importorskip("Levenshtein")
+        from sortarr.filters.title_similarity import (
+            _fuzz_ratio,
+            normalize_title,
+            _ratio_above,
+        )
+
+        titles = [normalize_title(t) for t in _fixture_titles()]
+        pairs = [(a, b) for i, a in enumerate(titles) for b in titles[i + 1 : i + 8]]
+        results = {}
+        for name in ("python", "levenshtein"):
+            backend(name)
+            results[name] = [
+                (
+                    _reference_ratio(a, b),
+                    _fuzz_ratio(a, b),
+                    _ratio_above(a, b, 50),
+                    _ratio_above(a, b, 80),
+                )
+                for a, b in pairs
+            ]
+        assert results["python"] == results["levenshtein"]
+
+    def test_similarity_identical_across_backends(self, backend):
+        titles = _fixture_titles()
+        existing = [(f"v{i}", t) for i, t in enumerate(titles[::2])]
+        expected_by_title = {
+            title: _brute_force_similarity(title, existing, 80)
+            for title in titles[1::2]
+        }
+        for name in ("python", "levenshtein"):
+            try:
+                backend(name)
+            except ValueError:
+                pytest.skip("Levenshtein not installed")
+            for title, expected in expected_by_title.items():
+                result = title_similarity(title, existing, 80)
+                assert result.passed == (expected is None)
+                if expected:
+                    assert result.matched_video_id == expected[0]
+
+
 class TestFuzzRatio:
     def test_identical_strings(self):
         from sortarr.filters.title_similarity import _fuzz_ratio
@@ -88,6 +284,15 @@ class TestFuzzRatio:
 
         assert _fuzz_ratio("abc", "") == 0
 
+    def test_bounded_distance(self):
+        from sortarr.filters.title_similarity import _bounded_distance
+
+        assert _bounded_distance("kitten", "sitting", 3) == 3
+        assert _bounded_distance("kitten", "sitting", 2) == 3  # gave up
+        assert _bounded_distance("abc", "", 5) == 3
+        assert _bounded_distance("abc", "abcdefgh", 2) == 3
+        assert _bounded_distance("same", "same", 0) == 0
+
     def test_reversed_args_same_result(self):
         from sortarr.filters.title_similarity import _fuzz_ratio
 
@@ -254,3 +459,102 @@ class TestSelectorFilter:
         ]
         result = selector_filter(activity, "Channel", selectors, "AND")
         assert result.passed
+
+    def test_invalid_regex_never_matches(self):
+        from sortarr.filters.selector_filter import SelectorMatcher
+        from sortarr.models.pipeline import PipelineSelector
+
+        activity = Activity(
+            video_id="v1", title="Video (", published_at="now", video_type="upload"
+        )
+        matcher = SelectorMatcher(
+            [PipelineSelector(field="title", operator="regex", pattern="(")]
+        )
+        assert not matcher.check(activity, "Channel").passed
+
+
+class TestCompiledPipelinePlan:
+    def _plan(self, **kwargs):
+        from sortarr.core.pipeline_plan import CompiledPipelinePlan
+        from sortarr.models.pipeline import PipelineConfig, PipelineSelector
+
+        pipeline = PipelineConfig(
+            id="p1",
+            name="Test",
+            destination_playlist_id="PL1",
+            destination_playlist_title="Default",
+            **kwargs,
+        )
+        return CompiledPipelinePlan.compile(
+            pipeline,
+            [PipelineSelector(field="title", operator="contains", pattern="video")],
+            [
+                ("il1", "video", ["v2"]),
+                ("il2", "word", ["spoiler"]),
+                ("il3", "subscription", ["Boring Channel"]),
+                ("il4", "video", ["v3"]),
+            ],
+        )
+
+    def test_ignore_lists_become_sets(self):
+        plan = self._plan()
+        assert plan.video_ignores == frozenset({"v2", "v3"})
+        assert plan.ignores_subscription("Boring Channel")
+        assert not plan.ignores_subscription("Channel One")
+
+    def test_cheap_filters(self):
+        plan = self._plan()
+        ok = Activity(
+            video_id="v1", title="Video", published_at="now", video_type="upload"
+        )
+        ignored = Activity(
+            video_id="v2", title="Video", published_at="now", video_type="upload"
+        )
+        worded = Activity(
+            video_id="v4",
+            title="Video SPOILER",
+            published_at="now",
+            video_type="upload",
+        )
+        assert plan.passes_cheap_filters(ok)
+        assert not plan.passes_cheap_filters(ignored)
+        assert not plan.passes_cheap_filters(worded)
+        assert (
+            plan.check_words(worded.title).reason
+            == "Title contains ignored word 'spoiler'"
+        )
+
+    def test_duration_bounds(self):
+        plan = self._plan(duration_min_seconds=60, duration_max_seconds=600)
+        activity = Activity(
+            video_id="v1", title="Video", published_at="now", video_type="upload"
+        )
+        assert plan.check_duration(activity, 30).match_type == "duration_min"
+        assert plan.check_duration(activity, 900).match_type == "duration_max"
+        assert plan.check_duration(activity, 300).passed
+
+    def test_selector_failure_is_annotated(self):
+        from sortarr.core.pipeline_plan import ActivityFeatures
+
+        plan = self._plan()
+        activity = Activity(
+            video_id="v1", title="Live", published_at="now", video_type="upload"
+        )
+        fr = plan.check_selectors(activity, ActivityFeatures.of(activity, "Channel"))
+        assert not fr.passed
+        assert fr.match_type == "selector"
+        assert fr.matched_video_id == "v1"
+
+    def test_activity_features(self):
+        from sortarr.core.pipeline_plan import ActivityFeatures
+
+        activity = Activity(
+            video_id="v1",
+            title="My Video: Part 2!",
+            published_at="now",
+            video_type="upload",
+        )
+        features = ActivityFeatures.of(activity, "Channel One")
+        assert features.normalized_title == "my video part 2 "
+        assert features.selector_fields["title"] == "My Video: Part 2!"
+        assert features.selector_fields["channel_title"] == "Channel One"
@@ -1,7 +1,7 @@
 """Integration tests for google-api-python-client with HttpMock.
 
 Tests the real googleapiclient.discovery.build() factory and HttpError
-without network access, using a cached discovery document fixture.
+without network access, using the discovery document sortarr bundles.
 """
 
 import json
@@ -11,9 +11,9 @@ import httplib2
 from googleapiclient.discovery import build
 from googleapiclient.http import HttpMock
 from googleapiclient.errors import HttpError
+from sortarr.core.youtube import DISCOVERY_DOCUMENT
 
-FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
-DISCOVERY_PATH = os.path.join(FIXTURE_DIR, "youtube_v3_discovery.json")
+DISCOVERY_PATH = DISCOVERY_DOCUMENT
 
 
 def test_build_youtube_v3():
@@ -84,7 +84,7 @@ def test_http_error_429():
 
 @pytest.mark.skipif(
     not os.path.exists(DISCOVERY_PATH),
-    reason="requires youtube_v3_discovery.json fixture",
+    reason="requires the bundled youtube_v3.json discovery document",
 )
 def test_execute_with_mock():
     """_execute_with_retry works with a mocked request."""
@@ -105,3 +105,57 @@ def test_execute_with_mock():
     result = client._execute_with_retry(mock_request)
     assert result == {"items": [{"id": "test"}]}
     mock_request.execute.assert_called_once()
+
+
+def test_client_service_copied_from_cached_template():
+    """Clients copy one cached service, each with its own transport."""
+    from sortarr.core.youtube import YouTubeAPIClient, service_template
+    from google.oauth2.credentials import Credentials as OAuth2Credentials
+
+    creds = OAuth2Credentials(
+        token="test",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="id",
+        client_secret="secret",
+    )
+    first = YouTubeAPIClient(credentials=creds)
+    second = first.spawn()
+    request = first.service.playlistItems().list(part="snippet", playlistId="PL1")
+    assert "/youtube/v3/playlistItems" in request.uri
+    assert request.http is first.service._http
+    assert request.http.credentials is creds
+    assert second.service._http is not first.service._http
+    assert first.service._http is not service_template()._http
+    assert service_template.cache_info().currsize == 1
+    first.close()
+    second.close()
+
+
+def test_clients_built_concurrently_from_template():
+    """The shared template is safe to copy and use from many threads."""
+    from concurrent.futures import ThreadPoolExecutor
+    from google.oauth2.credentials import Credentials as OAuth2Credentials
+    from sortarr.core.youtube import YouTubeAPIClient, service_template
+
+    service_template.cache_clear()
+    creds = OAuth2Credentials(
+        token="test",
+        token_uri="https://oauth2.googleapis.com/token",
+        client_id="id",
+        client_secret="secret",
+    )
+
+    def _requests(_):
+        client = YouTubeAPIClient(credentials=creds)
+        service = client.service
+        uris = [
+            service.playlistItems().list(part="snippet", playlistId="PL1").uri,
+            service.videos().list(part="contentDetails", id="v1").uri,
+            service.subscriptions().list(part="snippet", mine=True).uri,
+        ]
+        client.close()
+        return uris
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(_requests, range(32)))
+    assert all(uris == results[0] for uris in results)
@@ -0,0 +1,138 @@
+from unittest.mock import MagicMock
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+from sortarr.core.insert_queue import INSERT_ATTEMPTS, InsertJob, InsertQueue
+from sortarr.core.quota import QuotaLedger
+from sortarr.models.pipeline import RouteResult, VideoResult
+
+
+def _job(video_id):
+    intent = {
+        "pipeline_id": "p1",
+        "video_id": video_id,
+        "playlist_id": "PL1",
+        "title": video_id,
+        "subscription_id": "UC1",
+        "duration_seconds": 300,
+        "route_rule": "Test",
+    }
+    result = VideoResult(
+        video_id=video_id,
+        title=video_id,
+        subscription_title="Channel One",
+        subscription_id="UC1",
+        pipeline_id="p1",
+        route_result=RouteResult(playlist_id="PL1", playlist_title="Default"),
+        pending=True,
+    )
+    return InsertJob(intent, result)
+
+
+def _queue(insert_playlist_item, budget=0, in_playlist=False):
+    youtube = MagicMock()
+    youtube.quota = QuotaLedger(daily_budget=budget)
+    youtube.insert_playlist_item.side_effect = insert_playlist_item
+    youtube.playlist_contains.return_value = in_playlist
+    sleeps: list[float] = []
+    inserts = InsertQueue(youtube, sleep=sleeps.append)
+    return inserts, youtube, sleeps
+
+
+def _outcomes(*outcomes):
+    """An insert_playlist_item side effect raising or returning in turn."""
+    pending = iter(outcomes)
+
+    def _insert(playlist_id, video_id):
+        outcome = next(pending)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    return _insert
+
+
+def _http_error(status):
+    return HttpError(Response({"status": status}), b"error")
+
+
+def _run(inserts, video_id="v1"):
+    inserts.start()
+    inserts.submit(_job(video_id))
+    inserts.close()
+    [job] = inserts.completed()
+    return job
+
+
+def test_jobs_complete_in_submission_order():
+    inserts, youtube, _ = _queue(lambda playlist_id, video_id: None)
+    inserts.start()
+    for video_id in ["v1", "v2", "v3"]:
+        inserts.submit(_job(video_id))
+    assert len(inserts) == 3
+    done = inserts.completed(wait=True)
+    inserts.close()
+    assert [job.intent["video_id"] for job in done] == ["v1", "v2", "v3"]
+    assert all(job.added and job.error is None for job in done)
+    assert len(inserts) == 0
+    youtube.close.assert_called_once()
+
+
+def test_finished_jobs_no_longer_wait_for_budget():
+    inserts, youtube, _ = _queue(lambda playlist_id, video_id: None)
+    inserts.submit(_job("v1"))
+    assert inserts.waiting == 1
+    inserts.start()
+    inserts.close()
+    # Charged by the writer, though not collected yet
+    assert inserts.waiting == 0
+    assert len(inserts) == 1
+
+
+def test_transient_failures_are_retried():
+    inserts, youtube, sleeps = _queue(
+        _outcomes(_http_error(429), _http_error(503), None)
+    )
+    job = _run(inserts)
+    assert job.added
+    assert job.error is None
+    assert youtube.insert_playlist_item.call_count == 3
+    assert sleeps == [2, 5]
+    # Only the server error may have been applied
+    youtube.playlist_contains.assert_called_once_with("PL1", "v1")
+
+
+def test_other_http_errors_are_final():
+    inserts, youtube, sleeps = _queue(_outcomes(_http_error(404)))
+    job = _run(inserts)
+    assert not job.added
+    assert job.error.startswith("HTTP 404: ")
+    assert youtube.insert_playlist_item.call_count == 1
+    assert sleeps == []
+
+
+def test_timeout_checks_playlist_before_retrying():
+    # The timed-out insert was applied, so it must not be sent again
+    inserts, youtube, sleeps = _queue(
+        _outcomes(TimeoutError("timed out")), in_playlist=True
+    )
+    job = _run(inserts)
+    assert job.added
+    assert youtube.insert_playlist_item.call_count == 1
+    assert sleeps == [2]
+
+
+def test_gives_up_after_max_attempts():
+    inserts, youtube, _ = _queue(_outcomes(*[_http_error(503)] * INSERT_ATTEMPTS))
+    job = _run(inserts)
+    assert not job.added
+    assert job.verify
+    assert job.error.startswith("HTTP 503: ")
+    assert youtube.insert_playlist_item.call_count == INSERT_ATTEMPTS
+
+
+def test_exhausted_quota_fails_fast():
+    inserts, youtube, _ = _queue(lambda playlist_id, video_id: None, budget=10)
+    job = _run(inserts)
+    assert job.quota_exhausted
+    assert not job.added
+    youtube.insert_playlist_item.assert_not_called()
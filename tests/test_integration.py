@@ -334,8 +334,8 @@ def test_config_keys_match_settings():
         "schedule",
         "compare_distance",
         "reprocess_days",
-        "playlist_sleep",
-        "subscription_sleep",
+        "insert_rate_per_minute",
+        "list_rate_per_second",
         "pipeline_concurrency",
         "activity_limit",
         "subscription_limit",
@@ -352,6 +352,19 @@ def test_config_keys_match_settings():
     # Or relax for advanced/hidden config
 
 
+def test_deprecated_sleep_settings_still_load(tmp_path, monkeypatch):
+    """Old .env files with the sleep settings keep loading; the insert sleep
+    becomes the equivalent insert rate."""
+    from sortarr.config import Settings
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / ".env").write_text(
+        "SORTARR_PLAYLIST_SLEEP=30\nSORTARR_SUBSCRIPTION_SLEEP=60\n"
+    )
+    assert Settings().insert_rate_per_minute == 2
+    assert Settings(insert_rate_per_minute=4).insert_rate_per_minute == 4
+
+
 def test_overlay_warns_on_invalid_key(tmp_path):
     """
     Simulate DB with typo key; app overlays and should not crash, should log warning.
@@ -0,0 +1,129 @@
+import sqlite3
+import pytest
+from unittest.mock import MagicMock
+from googleapiclient.errors import HttpError
+from httplib2 import Response
+from sortarr.core import outbox
+from sortarr.core.quota import QuotaLedger
+from sortarr.db import repository as repo
+from sortarr.db.migrations import init_db
+
+
+@pytest.fixture
+def db_con(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    init_db(db_path)
+    con = sqlite3.connect(db_path)
+    con.row_factory = sqlite3.Row
+    yield con
+    con.close()
+
+
+def _client(insert_playlist_item, in_playlist=False):
+    client = MagicMock()
+    client.quota = QuotaLedger()
+    client.insert_playlist_item.side_effect = insert_playlist_item
+    client.playlist_contains.return_value = in_playlist
+    return client
+
+
+def _reject(playlist_id, video_id):
+    raise HttpError(Response({"status": 400}), b"invalidValue")
+
+
+def _intent(con, video_id, pipeline_id="p1"):
+    return repo.add_insert_intent(
+        con, pipeline_id, video_id, "PL1", f"Video {video_id}", "UC1", 60, "Rule"
+    )
+
+
+def test_intents_are_unique_per_pipeline(db_con):
+    assert _intent(db_con, "v1")
+    assert not _intent(db_con, "v1")
+    assert _intent(db_con, "v1", pipeline_id="p2")
+    assert repo.count_insert_intents(db_con) == 2
+
+
+def test_drain_inserts_oldest_first_and_records_ledger(db_con):
+    for video_id in ["v1", "v2"]:
+        _intent(db_con, video_id)
+    client = _client(lambda playlist_id, video_id: None)
+    assert outbox.drain_outbox(client, db_con) == {
+        "added": 2,
+        "failed": 0,
+        "remaining": 0,
+    }
+    assert [c.args for c in client.insert_playlist_item.call_args_list] == [
+        ("PL1", "v1"),
+        ("PL1", "v2"),
+    ]
+    [row] = repo.get_video_by_id(db_con, "v1")
+    assert (row["pipeline_id"], row["playlistId"], row["duration_seconds"]) == (
+        "p1",
+        "PL1",
+        60,
+    )
+
+
+def test_drain_checks_playlist_before_inserting_again(db_con):
+    # An earlier attempt timed out after the API had applied it
+    _intent(db_con, "v1")
+    client = _client(lambda playlist_id, video_id: None, in_playlist=True)
+    assert outbox.drain_outbox(client, db_con)["added"] == 1
+    client.playlist_contains.assert_called_once_with("PL1", "v1")
+    client.insert_playlist_item.assert_not_called()
+    assert repo.count_insert_intents(db_con) == 0
+
+
+def test_drain_skips_intents_already_in_ledger(db_con):
+    # The process stopped after the insert but before the intent was cleared
+    _intent(db_con, "v1")
+    repo.insert_video(db_con, "v1", "now", "Video v1", "UC1", "PL1", 60, "Rule", "p1")
+    client = _client(lambda playlist_id, video_id: None)
+    assert outbox.drain_outbox(client, db_con)["added"] == 0
+    client.insert_playlist_item.assert_not_called()
+    assert repo.count_insert_intents(db_con) == 0
+
+
+def test_failing_intent_is_dropped_after_max_failures(db_con):
+    _intent(db_con, "v1")
+    client = _client(_reject)
+    for _ in range(outbox.MAX_INSERT_FAILURES - 1):
+        assert outbox.drain_outbox(client, db_con)["failed"] == 1
+    [intent] = repo.get_insert_intents(db_con)
+    assert intent["attempts"] == outbox.MAX_INSERT_FAILURES - 1
+    assert intent["last_error"].startswith("HTTP 400: ")
+    outbox.drain_outbox(client, db_con)
+    assert repo.count_insert_intents(db_con) == 0
+
+
+def test_drain_skipped_while_a_run_holds_the_outbox(db_con):
+    _intent(db_con, "v1")
+    client = _client(lambda playlist_id, video_id: None)
+    with outbox.drain_lock:
+        assert outbox.drain_outbox(client, db_con) == {
+            "added": 0,
+            "failed": 0,
+            "remaining": 0,
+        }
+    client.insert_playlist_item.assert_not_called()
+    assert repo.count_insert_intents(db_con) == 1
+
+
+def test_drain_leaves_intents_recorded_after_it_started(db_con):
+    _intent(db_con, "v1")
+    client = _client(lambda playlist_id, video_id: None)
+    load = client.quota.load
+
+    def _load(con):
+        # A pipeline run starting meanwhile records its own intent
+        _intent(db_con, "v2")
+        load(con)
+
+    client.quota.load = _load
+    assert outbox.drain_outbox(client, db_con) == {
+        "added": 1,
+        "failed": 0,
+        "remaining": 1,
+    }
+    assert [c.args[1] for c in client.insert_playlist_item.call_args_list] == ["v1"]
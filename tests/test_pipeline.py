@@ -8,18 +8,26 @@ from sortarr.config import Settings
 import sqlite3
 from sortarr.db.migrations import init_db
 from sortarr.db import repository as repo
+from sortarr.core.quota import quota_day
+from googleapiclient.errors import HttpError
+from httplib2 import Response
 
 
-@pytest.fixture
-def settings():
+@pytest.fixture(params=["defaults", "activities_inline"])
+def settings(request):
+    """Settings for the run, once with the shipped discovery and insert
+    modes and once with the previous ones (activities.list, inline)."""
     s = Settings()
     s.compare_distance = 80
     s.reprocess_days = 2
-    s.playlist_sleep = 0
-    s.subscription_sleep = 0
+    s.insert_rate_per_minute = 0
+    s.list_rate_per_second = 0
     s.subscription_limit = 0
     s.activity_limit = 0
     s.pipeline_concurrency = 1
+    if request.param == "activities_inline":
+        s.discovery_mode = "activities"
+        s.insert_mode = "inline"
     return s
 
 
@@ -33,6 +41,23 @@ def db_con(tmp_path):
     con.close()
 
 
+def _mock_youtube():
+    """A client mock serving the activities configured on
+    get_subscription_activity in either discovery mode, and inserting
+    through itself in either insert mode."""
+    youtube = MagicMock()
+    youtube.get_channel_uploads.side_effect = (
+        lambda channel_id, published_after=None, limit=0: (
+            youtube.get_subscription_activity(
+                channel_id, published_after=published_after
+            )
+        )
+    )
+    youtube.spawn.return_value = youtube
+    youtube.playlist_contains.return_value = False
+    return youtube
+
+
 def _make_pipeline(
     pipeline_id="p1",
     name="Test Pipeline",
@@ -49,6 +74,16 @@ def _make_pipeline(
     )
 
 
+def _video_details(video_id, duration_seconds):
+    return {
+        "video_id": video_id,
+        "duration_seconds": duration_seconds,
+        "published_at": "2024-06-01T00:00:00Z",
+        "channel_id": "UC1",
+        "title": video_id,
+    }
+
+
 def _setup_ignore_list(db_con, list_id, list_type, entries, pipeline_id="p1"):
     """Create ignore list in DB, add entries, and associate with pipeline."""
     repo.create_ignore_list(db_con, list_id, f"{list_type}_ignore", list_type)
@@ -59,7 +94,7 @@ def _setup_ignore_list(db_con, list_id, list_type, entries, pipeline_id="p1"):
 
 
 def test_pipeline_run_no_subscriptions(settings, db_con):
-    mock_youtube = MagicMock()
+    mock_youtube = _mock_youtube()
     mock_youtube.get_subscriptions.return_value = []
     mock_youtube.api_calls = [0]
 
@@ -81,7 +116,7 @@ def test_pipeline_run_no_subscriptions(settings, db_con):
 
 
 def test_pipeline_adds_video(settings, db_con):
-    mock_youtube = MagicMock()
+    mock_youtube = _mock_youtube()
     mock_youtube.get_subscriptions.return_value = [
         Subscription(id="UC1", title="Channel One", channel_id="UC1"),
     ]
@@ -93,8 +128,7 @@ def test_pipeline_adds_video(settings, db_con):
             video_type="upload",
         ),
     ]
-    mock_youtube.get_video_duration.return_value = 300
-    mock_youtube.add_to_playlist.return_value = True
+    mock_youtube.get_video_details.return_value = {"v1": _video_details("v1", 300)}
     mock_youtube.api_calls = [0]
 
     pipelines = [_make_pipeline(name="Default Catch-all")]
@@ -115,11 +149,11 @@ def test_pipeline_adds_video(settings, db_con):
     result = orchestrator.run()
     assert result.status == "completed"
     assert result.videos_added == 1
-    assert mock_youtube.add_to_playlist.called
+    assert mock_youtube.insert_playlist_item.called
 
 
 def test_pipeline_skips_ignored_subscription(settings, db_con):
-    mock_youtube = MagicMock()
+    mock_youtube = _mock_youtube()
     mock_youtube.get_subscriptions.return_value = [
         Subscription(id="UC1", title="Channel One", channel_id="UC1"),
         Subscription(id="UC2", title="Boring Channel", channel_id="UC2"),
@@ -171,7 +205,7 @@ def test_pipeline_skips_reprocessed_subscription(settings, db_con):
         (datetime.now(timezone.utc) - timedelta(days=1)).isoformat(),
     )
 
-    mock_youtube = MagicMock()
+    mock_youtube = _mock_youtube()
     mock_youtube.get_subscriptions.return_value = [
         Subscription(id="UC1", title="Channel One", channel_id="UC1"),
     ]
@@ -199,7 +233,7 @@ def test_pipeline_skips_reprocessed_subscription(settings, db_con):
 
 
 def test_pipeline_word_filter_skips(settings, db_con):
-    mock_youtube = MagicMock()
+    mock_youtube = _mock_youtube()
     mock_youtube.get_subscriptions.return_value = [
         Subscription(id="UC1", title="Channel One", channel_id="UC1"),
     ]
@@ -238,7 +272,7 @@ def test_pipeline_word_filter_skips(settings, db_con):
 
 
 def test_pipeline_no_rule_match_skips(settings, db_con):
-    mock_youtube = MagicMock()
+    mock_youtube = _mock_youtube()
     mock_youtube.get_subscriptions.return_value = [
         Subscription(id="UC1", title="Channel One", channel_id="UC1"),
     ]
@@ -247,7 +281,7 @@ def test_pipeline_no_rule_match_skips(settings, db_con):
             video_id="v1", title="Any Video", published_at="now", video_type="upload"
         ),
     ]
-    mock_youtube.get_video_duration.return_value = 300
+    mock_youtube.get_video_details.return_value = {"v1": _video_details("v1", 300)}
     mock_youtube.api_calls = [0]
 
     orchestrator = PipelineOrchestrator(
@@ -298,8 +332,8 @@ def test_execute_pipeline_filters_by_pipeline_id(tmp_path):
     s.database_file = db_path
     s.compare_distance = 80
     s.reprocess_days = 2
-    s.playlist_sleep = 0
-    s.subscription_sleep = 0
+    s.insert_rate_per_minute = 0
+    s.list_rate_per_second = 0
     s.subscription_limit = 0
     s.activity_limit = 0
     s.pipeline_concurrency = 1
@@ -328,3 +362,925 @@ def test_execute_pipeline_filters_by_pipeline_id(tmp_path):
     assert run_id2 is not None
 
     state.db_con.close()
+
+
+def test_pipeline_batches_durations_across_pipelines(settings, db_con):
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+        Subscription(id="UC2", title="Channel Two", channel_id="UC2"),
+    ]
+    mock_youtube.get_subscription_activity.side_effect = lambda channel_id, **_: [
+        Activity(
+            video_id=f"{channel_id}_v1",
+            title=f"Video from {channel_id}",
+            published_at="2024-06-01T00:00:00Z",
+            video_type="upload",
+        ),
+    ]
+    mock_youtube.get_video_details.return_value = {
+        "UC1_v1": _video_details("UC1_v1", 300),
+        "UC2_v1": _video_details("UC2_v1", 30),
+    }
+    mock_youtube.api_calls = [0]
+
+    pipelines = [
+        _make_pipeline("p1", "Long", duration_min_seconds=60),
+        _make_pipeline("p2", "Short", duration_max_seconds=60),
+    ]
+    repo.create_pipeline(db_con, "p1", "Long", "PL_DEFAULT", "Default")
+    repo.create_pipeline(db_con, "p2", "Short", "PL_DEFAULT", "Default")
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+        dry_run=True,
+    )
+
+    result = orchestrator.run()
+    assert result.videos_added == 2
+    assert result.videos_skipped == 2
+    mock_youtube.get_video_details.assert_called_once_with(["UC1_v1", "UC2_v1"])
+    mock_youtube.get_video_duration.assert_not_called()
+
+
+def test_pipeline_reads_durations_through_metadata_cache(settings, db_con):
+    repo.upsert_video_metadata(db_con, [_video_details("v1", 300)])
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+    ]
+    mock_youtube.get_subscription_activity.return_value = [
+        Activity(
+            video_id="v1",
+            title="Cached Video",
+            published_at="2024-06-01T00:00:00Z",
+            video_type="upload",
+        ),
+        Activity(
+            video_id="v2",
+            title="Fresh Video",
+            published_at="2024-06-02T00:00:00Z",
+            video_type="upload",
+        ),
+    ]
+    mock_youtube.get_video_details.return_value = {"v2": _video_details("v2", 45)}
+    mock_youtube.api_calls = [0]
+
+    pipelines = [_make_pipeline(duration_min_seconds=60)]
+    repo.create_pipeline(db_con, "p1", "Test Pipeline", "PL_DEFAULT", "Default")
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+        dry_run=True,
+    )
+
+    result = orchestrator.run()
+    assert result.videos_added == 1
+    assert result.videos_skipped == 1
+    mock_youtube.get_video_details.assert_called_once_with(["v2"])
+    cached = repo.get_video_metadata(db_con, ["v1", "v2"])
+    assert cached["v2"]["duration_seconds"] == 45
+
+
+def test_metadata_cache_skips_upcoming_and_live_videos(db_con):
+    from sortarr.core.video_metadata import VideoMetadataCache
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_video_details.return_value = {
+        "v1": _video_details("v1", 300),
+        "v2": dict(_video_details("v2", 0), live_broadcast_content="upcoming"),
+        "v3": dict(_video_details("v3", 0), live_broadcast_content="live"),
+    }
+    cache = VideoMetadataCache(mock_youtube, db_con, ttl_days=30)
+
+    assert set(cache.get_details(["v1", "v2", "v3"])) == {"v1", "v2", "v3"}
+    assert set(repo.get_video_metadata(db_con, ["v1", "v2", "v3"])) == {"v1"}
+
+
+def test_pipeline_collects_activities_concurrently(settings, db_con):
+    settings.pipeline_concurrency = 4
+    subscriptions = [
+        Subscription(id=f"UC{i}", title=f"Channel {i}", channel_id=f"UC{i}")
+        for i in range(10)
+    ]
+
+    def _activity(channel_id, **_):
+        if channel_id == "UC3":
+            raise RuntimeError("boom")
+        return [
+            Activity(
+                video_id=f"{channel_id}_v1",
+                title=f"Video from {channel_id}",
+                published_at="2024-06-01T00:00:00Z",
+                video_type="upload",
+            )
+        ]
+
+    worker_client = _mock_youtube()
+    worker_client.get_subscription_activity.side_effect = _activity
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = subscriptions
+    mock_youtube.spawn.return_value = worker_client
+    mock_youtube.api_calls = [0]
+    worker_client.credentials = mock_youtube.credentials
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=[],
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    cached = orchestrator._collect_activities(subscriptions)
+    assert list(cached) == [s.id for s in subscriptions if s.id != "UC3"]
+    assert cached["UC7"][0].video_id == "UC7_v1"
+    mock_youtube.get_subscription_activity.assert_not_called()
+    assert 1 <= mock_youtube.spawn.call_count <= 4
+    assert worker_client.close.call_count == mock_youtube.spawn.call_count
+
+
+def test_pipeline_stops_inserting_when_quota_budget_exhausted(settings, db_con):
+    import threading
+    from sortarr.core.quota import QuotaLedger
+
+    settings.quota_daily_budget = 120
+    mock_youtube = _mock_youtube()
+    mock_youtube.quota = QuotaLedger()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+        Subscription(id="UC2", title="Channel Two", channel_id="UC2"),
+    ]
+    mock_youtube.get_subscription_activity.side_effect = lambda channel_id, **_: [
+        Activity(
+            video_id=f"{channel_id}_v{i}",
+            title=f"Video {i} from {channel_id}",
+            published_at="2024-06-01T00:00:00Z",
+            video_type="upload",
+        )
+        for i in range(2)
+    ]
+    mock_youtube.get_video_details.return_value = {}
+
+    evaluated = threading.Event()
+
+    def _add(playlist_id, video_id):
+        if settings.insert_mode == "queued":
+            # Charge nothing until evaluation has reserved the budget
+            evaluated.wait(timeout=5)
+        mock_youtube.quota.record("playlistItems.insert")
+
+    def _on_progress(result, summary):
+        if result.filter_result and result.filter_result.skipped_by == "quota":
+            evaluated.set()
+
+    mock_youtube.insert_playlist_item.side_effect = _add
+    mock_youtube.api_calls = [0]
+
+    pipelines = [_make_pipeline()]
+    repo.create_pipeline(db_con, "p1", "Test Pipeline", "PL_DEFAULT", "Default")
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+        on_progress=_on_progress,
+    )
+
+    result = orchestrator.run()
+    assert result.status == "completed"
+    assert result.videos_added == 2
+    assert mock_youtube.insert_playlist_item.call_count == 2
+    assert result.video_results[-1].filter_result.skipped_by == "quota"
+    assert result.subscriptions_processed == 2
+    # The deferred subscription keeps its old watermark
+    assert repo.get_pipeline_tracking(db_con, "p1", "UC1") is not None
+    assert repo.get_pipeline_tracking(db_con, "p1", "UC2") is None
+    assert repo.get_quota_usage(db_con, quota_day()) == 100
+
+
+def test_pipeline_uploads_discovery_mode(settings, db_con):
+    settings.discovery_mode = "uploads"
+    settings.activity_limit = 5
+    mock_youtube = MagicMock()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+    ]
+    mock_youtube.get_channel_uploads.return_value = [
+        Activity(
+            video_id="v1",
+            title="New Upload",
+            published_at="2024-06-01T00:00:00Z",
+            video_type="upload",
+        ),
+    ]
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=[],
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    cached = orchestrator._collect_activities(
+        mock_youtube.get_subscriptions.return_value
+    )
+    assert [a.video_id for a in cached["UC1"]] == ["v1"]
+    mock_youtube.get_subscription_activity.assert_not_called()
+    _, kwargs = mock_youtube.get_channel_uploads.call_args
+    assert kwargs["limit"] == 5
+    assert kwargs["published_after"]
+
+
+def test_pipeline_uses_content_watermark(settings, db_con):
+    settings.reprocess_days = 0
+    pipelines = [_make_pipeline()]
+    repo.create_pipeline(db_con, "p1", "Test Pipeline", "PL_DEFAULT", "Default")
+    repo.upsert_pipeline_tracking(db_con, "p1", "UC1", None, "2024-06-01T00:00:00Z")
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+    ]
+    mock_youtube.get_subscription_activity.return_value = [
+        Activity(
+            video_id=video_id,
+            title=f"Video {video_id}",
+            published_at=published_at,
+            video_type="upload",
+        )
+        for video_id, published_at in [
+            ("v3", "2024-06-03T00:00:00Z"),
+            ("v2", "2024-06-02T00:00:00Z"),
+            ("v1", "2024-06-01T00:00:00Z"),
+        ]
+    ]
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    result = orchestrator.run()
+    _, kwargs = mock_youtube.get_subscription_activity.call_args
+    assert kwargs["published_after"] == "2024-06-01T00:00:00Z"
+    # Already-evaluated v1 is not re-routed; the rest go oldest first
+    assert [r.video_id for r in result.video_results] == ["v2", "v3"]
+    assert repo.get_subscription_watermarks(db_con) == {
+        "UC1": {"p1": "2024-06-03T00:00:00Z"}
+    }
+
+
+def test_pipeline_compares_watermark_as_time(settings, db_con):
+    settings.reprocess_days = 0
+    pipelines = [_make_pipeline()]
+    repo.create_pipeline(db_con, "p1", "Test Pipeline", "PL_DEFAULT", "Default")
+    # A watermark seeded from a run time, not in publishedAt's format
+    repo.upsert_pipeline_tracking(
+        db_con, "p1", "UC1", None, "2024-06-01T00:00:00.500000+00:00"
+    )
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+    ]
+    mock_youtube.get_subscription_activity.return_value = [
+        Activity(
+            video_id=video_id,
+            title=f"Video {video_id}",
+            published_at=published_at,
+            video_type="upload",
+        )
+        for video_id, published_at in [
+            ("v2", "2024-06-01T00:00:01Z"),
+            ("v1", "2024-06-01T00:00:00Z"),
+        ]
+    ]
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    result = orchestrator.run()
+    assert [r.video_id for r in result.video_results] == ["v2"]
+
+
+def test_pipeline_fetches_only_planned_subscriptions(settings, db_con):
+    settings.reprocess_days = 0
+    pipelines = [
+        _make_pipeline("p1", "One"),
+        _make_pipeline("p2", "Two", subscription_scope="selected"),
+    ]
+    repo.create_pipeline(db_con, "p1", "One", "PL_DEFAULT", "Default")
+    repo.create_pipeline(db_con, "p2", "Two", "PL_DEFAULT", "Default")
+    all_ignore_lists = _setup_ignore_list(
+        db_con, "il1", "subscription", ["Boring Channel"], pipeline_id="p1"
+    )
+    repo.set_pipeline_subscriptions(db_con, "p2", ["UC3"])
+    repo.upsert_pipeline_tracking(db_con, "p1", "UC1", None, "2024-06-05T00:00:00Z")
+    # p2 does not consider UC1, so its stale watermark must not widen the window
+    repo.upsert_pipeline_tracking(db_con, "p2", "UC1", None, "2024-01-01T00:00:00Z")
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+        Subscription(id="UC2", title="Boring Channel", channel_id="UC2"),
+    ]
+    mock_youtube.get_subscription_activity.return_value = []
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists=all_ignore_lists,
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    result = orchestrator.run()
+    mock_youtube.get_subscription_activity.assert_called_once_with(
+        "UC1", published_after="2024-06-05T00:00:00Z"
+    )
+    assert result.subscriptions_skipped == 1
+    assert result.subscription_skips[0]["subscription_title"] == "Boring Channel"
+
+
+def test_pipeline_title_corpus_covers_videos_added_this_run(
+    settings, db_con, monkeypatch
+):
+    from sortarr.db.repository import videos
+
+    pipelines = [_make_pipeline(check_title_similarity=True)]
+    repo.create_pipeline(db_con, "p1", "Test Pipeline", "PL_DEFAULT", "Default")
+    repo.insert_video(
+        db_con, "v0", "2024-01-01T00:00:00Z", "Old Upload", "UC1", pipeline_id="p1"
+    )
+    title_reads = []
+    real_titles = videos.get_title_corpus_for_pipeline
+    monkeypatch.setattr(
+        videos,
+        "get_title_corpus_for_pipeline",
+        lambda con, pid: title_reads.append(pid) or real_titles(con, pid),
+    )
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+    ]
+    mock_youtube.get_subscription_activity.return_value = [
+        Activity(
+            video_id=video_id,
+            title=title,
+            published_at=published_at,
+            video_type="upload",
+        )
+        for video_id, title, published_at in [
+            ("v1", "Weekly Vlog #12", "2024-06-01T00:00:00Z"),
+            ("v2", "Weekly Vlog 12!", "2024-06-02T00:00:00Z"),
+            ("v3", "Old Upload", "2024-06-03T00:00:00Z"),
+            ("v4", "weekly vlog 12", "2024-06-04T00:00:00Z"),
+        ]
+    ]
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    result = orchestrator.run()
+    skipped = {
+        r.video_id: r.filter_result.matched_video_id
+        for r in result.video_results
+        if not r.added
+    }
+    assert result.videos_added == 1
+    assert skipped == {"v2": "v1", "v3": "v0", "v4": "v1"}
+    # v3 and v4 are exact normalized duplicates of a stored title and of
+    # one routed earlier in the run, answered without a fuzzy pass
+    for r in result.video_results[2:]:
+        assert "is 100% similar" in r.filter_result.reason
+    assert title_reads == ["p1"]
+
+
+def test_pipeline_seen_set_replaces_per_activity_exists_queries(
+    settings, db_con, monkeypatch
+):
+    from sortarr.db.repository import videos
+
+    pipelines = [_make_pipeline(check_db_exists=True)]
+    repo.create_pipeline(db_con, "p1", "Test Pipeline", "PL_DEFAULT", "Default")
+    repo.insert_video(
+        db_con, "v0", "2024-01-01T00:00:00Z", "Old", "UC1", pipeline_id="p1"
+    )
+    exists_checks = []
+    real_exists = videos.video_exists_for_pipeline
+    monkeypatch.setattr(
+        videos,
+        "video_exists_for_pipeline",
+        lambda con, vid, pid: exists_checks.append(vid) or real_exists(con, vid, pid),
+    )
+
+    def _activity(video_id, published_at):
+        return Activity(
+            video_id=video_id,
+            title=f"Video {video_id}",
+            published_at=published_at,
+            video_type="upload",
+        )
+
+    uploads = {
+        "UC1": [
+            _activity("v0", "2024-06-01T00:00:00Z"),
+            _activity("v1", "2024-06-02T00:00:00Z"),
+        ],
+        "UC2": [
+            _activity("v1", "2024-06-02T00:00:00Z"),
+            _activity("v2", "2024-06-03T00:00:00Z"),
+        ],
+    }
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+        Subscription(id="UC2", title="Channel Two", channel_id="UC2"),
+    ]
+    mock_youtube.get_subscription_activity.side_effect = (
+        lambda channel_id, published_after=None: uploads[channel_id]
+    )
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    result = orchestrator.run()
+    assert [r.video_id for r in result.video_results if r.added] == ["v1", "v2"]
+    assert [
+        r.video_id
+        for r in result.video_results
+        if r.filter_result and r.filter_result.skipped_by == "db_exists"
+    ] == ["v0", "v1"]
+    # Only seen-set hits reach the DB; a video still queued for insert is
+    # answered from the run's queue
+    queued = settings.insert_mode == "queued"
+    assert exists_checks == (["v0"] if queued else ["v0", "v1"])
+
+
+@pytest.mark.parametrize("limit", [0, 1])
+@pytest.mark.parametrize("mode", ["single_pass", "per_pipeline"])
+def test_pipeline_evaluation_modes_agree(settings, db_con, monkeypatch, mode, limit):
+    from sortarr.core import pipeline_plan
+
+    settings.evaluation_mode = mode
+    settings.subscription_limit = limit
+    pipelines = [
+        _make_pipeline("p1", "First"),
+        _make_pipeline("p2", "Second", destination_playlist_id="PL_OTHER"),
+    ]
+    repo.create_pipeline(db_con, "p1", "First", "PL_DEFAULT", "Default")
+    repo.create_pipeline(db_con, "p2", "Second", "PL_OTHER", "Other")
+    ignore_lists = _setup_ignore_list(
+        db_con, "il1", "word", ["trailer"], pipeline_id="p2"
+    )
+    feature_calls = []
+    real_fields = pipeline_plan.selector_fields
+    monkeypatch.setattr(
+        pipeline_plan,
+        "selector_fields",
+        lambda activity, channel_title: (
+            feature_calls.append(activity.video_id)
+            or real_fields(activity, channel_title)
+        ),
+    )
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+        Subscription(id="UC2", title="Channel Two", channel_id="UC2"),
+    ]
+    activities = {
+        "UC1": [
+            Activity(
+                video_id="v2",
+                title="Movie Trailer",
+                published_at="2024-06-02T00:00:00Z",
+                video_type="upload",
+            ),
+            Activity(
+                video_id="v1",
+                title="Full Episode",
+                published_at="2024-06-01T00:00:00Z",
+                video_type="upload",
+            ),
+        ],
+        "UC2": [
+            Activity(
+                video_id="w1",
+                title="Another Episode",
+                published_at="2024-06-03T00:00:00Z",
+                video_type="upload",
+            ),
+        ],
+    }
+    mock_youtube.get_subscription_activity.side_effect = lambda channel_id, **_: (
+        activities[channel_id]
+    )
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists=ignore_lists,
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+    )
+
+    result = orchestrator.run()
+    outcomes = sorted(
+        (r.pipeline_id, r.video_id, r.added) for r in result.video_results
+    )
+    # With a limit of one, each pipeline stops after Channel One
+    second_channel = [("p1", "w1", True), ("p2", "w1", True)] if not limit else []
+    assert outcomes == sorted(
+        [
+            ("p1", "v1", True),
+            ("p1", "v2", True),
+            ("p2", "v1", True),
+            ("p2", "v2", False),
+        ]
+        + second_channel
+    )
+    assert result.pipelines_invoked == 2
+    assert result.subscriptions_processed == 2 + len(second_channel)
+    walked = ["v1", "v2"] + (["w1"] if not limit else [])
+    if mode == "single_pass":
+        # One walk over each subscription, oldest first, features shared
+        assert [(r.pipeline_id, r.video_id) for r in result.video_results] == [
+            ("p1", "v1"),
+            ("p2", "v1"),
+            ("p1", "v2"),
+            ("p2", "v2"),
+        ] + [(pid, vid) for pid, vid, _ in second_channel]
+        assert feature_calls == walked
+    else:
+        assert feature_calls == walked + walked
+
+
+@pytest.mark.parametrize("mode", ["single_pass", "per_pipeline"])
+def test_subscription_limit_is_per_pipeline(settings, db_con, mode):
+    settings.evaluation_mode = mode
+    settings.subscription_limit = 1
+    pipelines = [
+        _make_pipeline("p1", "All"),
+        _make_pipeline("p2", "Selected", subscription_scope="selected"),
+    ]
+    repo.create_pipeline(db_con, "p1", "All", "PL_DEFAULT", "Default")
+    repo.create_pipeline(
+        db_con, "p2", "Selected", "PL_DEFAULT", "Default", subscription_scope="selected"
+    )
+    repo.set_pipeline_subscriptions(db_con, "p2", ["UC3"])
+
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id=f"UC{i}", title=f"Channel {i}", channel_id=f"UC{i}")
+        for i in (1, 2, 3)
+    ]
+    mock_youtube.get_subscription_activity.side_effect = lambda channel_id, **_: [
+        Activity(
+            video_id=f"{channel_id}_v1",
+            title=f"Video from {channel_id}",
+            published_at="2024-06-01T00:00:00Z",
+            video_type="upload",
+        ),
+    ]
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+
+    orchestrator = PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=pipelines,
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+        dry_run=True,
+    )
+
+    result = orchestrator.run()
+    # p1 stops after its first subscription; p2 still gets its own
+    assert [(r.pipeline_id, r.video_id) for r in result.video_results] == [
+        ("p1", "UC1_v1"),
+        ("p2", "UC3_v1"),
+    ]
+    assert result.subscriptions_processed == 2
+
+
+def _queued_orchestrator(
+    settings, db_con, writer, on_progress=None, quota=None, insert_mode="queued"
+):
+    repo.create_pipeline(db_con, "p1", "Test Pipeline", "PL_DEFAULT", "Default")
+    settings.insert_mode = insert_mode
+    mock_youtube = _mock_youtube()
+    mock_youtube.get_subscriptions.return_value = [
+        Subscription(id="UC1", title="Channel One", channel_id="UC1"),
+    ]
+    mock_youtube.get_subscription_activity.return_value = [
+        Activity(
+            video_id=f"v{i}",
+            title=f"Video number {i}",
+            published_at=f"2024-06-0{i}T00:00:00Z",
+            video_type="upload",
+        )
+        for i in (1, 2, 3)
+    ]
+    mock_youtube.get_video_details.return_value = {}
+    mock_youtube.api_calls = [0]
+    if quota is not None:
+        mock_youtube.quota = quota
+    mock_youtube.playlist_contains.return_value = False
+    mock_youtube.spawn.return_value = writer
+    writer.quota = mock_youtube.quota
+    return PipelineOrchestrator(
+        settings=settings,
+        youtube=mock_youtube,
+        db_con=db_con,
+        channel=Channel(id="UC1", title="My Channel"),
+        playlist=Playlist(id="PL1", title="Watch Later"),
+        pipelines=[_make_pipeline()],
+        all_ignore_lists={},
+        default_playlist_id="PL1",
+        default_playlist_title="Watch Later",
+        on_progress=on_progress,
+    )
+
+
+def test_pipeline_queues_inserts_without_blocking_evaluation(settings, db_con):
+    import threading
+
+    evaluated = threading.Event()
+    waited = []
+
+    def _add(playlist_id, video_id):
+        # The writer can't finish anything until every activity is evaluated
+        waited.append(evaluated.wait(timeout=5))
+        if video_id == "v2":
+            raise HttpError(Response({"status": 400}), b"invalidValue")
+
+    writer = MagicMock()
+    writer.insert_playlist_item.side_effect = _add
+    states = []
+
+    def _on_progress(result, summary):
+        state = (
+            "pending"
+            if result.pending
+            else "added"
+            if result.added
+            else "failed"
+            if result.error
+            else "skipped"
+        )
+        states.append((result.video_id, state))
+        if result.video_id == "v3":
+            evaluated.set()
+
+    orchestrator = _queued_orchestrator(settings, db_con, writer, _on_progress)
+    result = orchestrator.run()
+
+    assert all(waited)
+    assert states == [
+        ("v1", "pending"),
+        ("v2", "pending"),
+        ("v3", "pending"),
+        ("v1", "added"),
+        ("v2", "failed"),
+        ("v3", "added"),
+    ]
+    assert result.videos_added == 2
+    assert result.errors == 1
+    assert sorted(repo.get_video_ids_for_pipeline(db_con, "p1")) == ["v1", "v3"]
+    # A failed insert is final, as it is inline
+    assert repo.get_subscription_watermarks(db_con) == {
+        "UC1": {"p1": "2024-06-03T00:00:00Z"}
+    }
+    writer.close.assert_called_once()
+
+
+def test_pipeline_keeps_unfinished_inserts_in_outbox(settings, db_con, monkeypatch):
+    import threading
+    from sortarr.core import quota as quota_module
+    from sortarr.core.outbox import drain_outbox
+    from sortarr.core.quota import QuotaLedger
+
+    writer = MagicMock()
+    quota = QuotaLedger(daily_budget=150)
+    evaluated = threading.Event()
+
+    def _add(playlist_id, video_id):
+        evaluated.wait(timeout=5)
+        # The API reports quotaExceeded despite the local estimate
+        quota.exhaust()
+        raise HttpError(Response({"status": 403}), b"quotaExceeded")
+
+    def _on_progress(result, summary):
+        if result.video_id == "v3":
+            evaluated.set()
+
+    writer.insert_playlist_item.side_effect = _add
+    orchestrator = _queued_orchestrator(
+        settings, db_con, writer, _on_progress, quota=quota
+    )
+    result = orchestrator.run()
+
+    assert writer.insert_playlist_item.call_count == 1
+    assert [(r.video_id, r.pending) for r in result.video_results] == [
+        ("v1", True),
+        ("v2", True),
+        ("v3", True),
+    ]
+    assert result.videos_added == 0
+    assert "quota" in result.error_message.lower()
+    # The intents are durable, so the watermark moves on
+    assert repo.get_subscription_watermarks(db_con) == {
+        "UC1": {"p1": "2024-06-03T00:00:00Z"}
+    }
+    assert [i["video_id"] for i in repo.get_insert_intents(db_con)] == [
+        "v1",
+        "v2",
+        "v3",
+    ]
+
+    # After the quota resets the background drain finishes them
+    monkeypatch.setattr(quota_module, "quota_day", lambda now=None: "2099-01-01")
+    client = MagicMock()
+    client.quota = QuotaLedger()
+    client.playlist_contains.return_value = False
+    assert drain_outbox(client, db_con) == {"added": 3, "failed": 0, "remaining": 0}
+    assert repo.get_video_ids_for_pipeline(db_con, "p1") == {"v1", "v2", "v3"}
+
+
+def test_pipeline_resumes_outbox_before_evaluating(settings, db_con):
+    repo.add_insert_intent(
+        db_con, "p1", "v0", "PL_DEFAULT", "Video number 0", "UC1", 120, "Test"
+    )
+    repo.add_insert_intent(
+        db_con, "p1", "v1", "PL_DEFAULT", "Video number 1", "UC1", 120, "Test"
+    )
+    orchestrator = _queued_orchestrator(
+        settings, db_con, MagicMock(), insert_mode="inline"
+    )
+    orchestrator.pipelines = [_make_pipeline(check_db_exists=True)]
+    result = orchestrator.run()
+
+    inserted = [
+        c.args[1] for c in orchestrator.youtube.insert_playlist_item.call_args_list
+    ]
+    # Leftover intents go first, so v1 is in the ledger when it's evaluated
+    assert inserted == ["v0", "v1", "v2", "v3"]
+    # and they are reported with the run's own results
+    assert [
+        (r.video_id, r.added, r.filter_result.skipped_by if r.filter_result else None)
+        for r in result.video_results
+    ] == [
+        ("v0", True, None),
+        ("v1", True, None),
+        ("v1", False, "db_exists"),
+        ("v2", True, None),
+        ("v3", True, None),
+    ]
+    assert result.videos_added == 4
+    assert result.video_results[0].route_result.playlist_title == "Default"
+    assert repo.get_insert_intents(db_con) == []
+
+
+def test_pipeline_leaves_outbox_to_a_running_drain(settings, db_con):
+    from sortarr.core import outbox
+
+    repo.add_insert_intent(
+        db_con, "p1", "v0", "PL_DEFAULT", "Video number 0", "UC1", 120, "Test"
+    )
+    orchestrator = _queued_orchestrator(
+        settings, db_con, MagicMock(), insert_mode="inline"
+    )
+    # The run goes ahead instead of waiting for the drain to finish
+    with outbox.drain_lock:
+        result = orchestrator.run()
+    assert outbox.drain_lock.acquire(blocking=False)
+    outbox.drain_lock.release()
+
+    inserted = [
+        c.args[1] for c in orchestrator.youtube.insert_playlist_item.call_args_list
+    ]
+    assert inserted == ["v1", "v2", "v3"]
+    assert result.videos_added == 3
+    assert [i["video_id"] for i in repo.get_insert_intents(db_con)] == ["v0"]
+
+
+def test_pipeline_holds_watermark_when_intent_cannot_be_saved(
+    settings, db_con, monkeypatch
+):
+    from sortarr.db.repository import outbox as ob
+
+    settings.reprocess_days = 0
+    writer = MagicMock()
+    orchestrator = _queued_orchestrator(settings, db_con, writer, insert_mode="inline")
+    original = ob.add_insert_intent
+
+    def _add_intent(con, **intent):
+        if intent["video_id"] == "v2":
+            return None
+        return original(con, **intent)
+
+    monkeypatch.setattr(ob, "add_insert_intent", _add_intent)
+    summary = orchestrator.run()
+
+    assert summary.videos_added == 2
+    assert summary.videos_skipped == 0
+    assert summary.errors == 1
+    # The watermark stops at v1, so the next run accepts v2 again
+    assert repo.get_subscription_watermarks(db_con) == {
+        "UC1": {"p1": "2024-06-01T00:00:00Z"}
+    }
+    assert repo.get_pipeline_tracking(db_con, "p1", "UC1") is None
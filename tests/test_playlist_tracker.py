@@ -1,82 +1,93 @@
+import sqlite3
+import pytest
 from unittest.mock import Mock, MagicMock
 from sortarr.core.playlist_tracker import PlaylistTracker
+from sortarr.models.youtube import Playlist
+from sortarr.db import repository as repo
+from sortarr.db.migrations import init_db
+
+
+@pytest.fixture
+def db_con(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    init_db(db_path)
+    con = sqlite3.connect(db_path)
+    con.row_factory = sqlite3.Row
+    yield con
+    con.close()
+
+
+def _item(video_id, channel_id="UC123", position=0):
+    return {
+        "id": f"item_{video_id}",
+        "snippet": {
+            "resourceId": {"videoId": video_id},
+            "videoOwnerChannelId": channel_id,
+            "title": f"Video {video_id}",
+            "publishedAt": "2024-01-01T00:00:00Z",
+            "position": position,
+        },
+    }
 
 
-def test_exclude_pipeline_playlists():
-    youtube = Mock()
-    youtube.get_user_playlists.return_value = [
-        type("Playlist", (), {"id": "PL1", "title": "Pipeline Dest"}),
-        type("Playlist", (), {"id": "PL2", "title": "Custom List"}),
+def _tracker(db_con, playlists, page_size=50):
+    """A tracker over user playlists given as {playlist_id: [video_id, ...]},
+    served in pages of page_size items whose tokens are their offsets."""
+    youtube = MagicMock()
+    youtube.get_user_playlists.side_effect = lambda channel_id: [
+        Playlist(
+            id=pid,
+            title=f"List {pid}",
+            item_count=len(videos),
+            etag=f"etag-{'-'.join(videos)}",
+        )
+        for pid, videos in playlists.items()
     ]
-    db = Mock()
-    db.execute.return_value.fetchall.return_value = [{"destination_playlist_id": "PL1"}]
 
-    tracker = PlaylistTracker(youtube, db, channel_id="UC123")
-    playlists = tracker._get_playlists()
-    assert len(playlists) == 1
-    assert playlists[0]["id"] == "PL2"
+    def get_playlist_page(pid, token=None):
+        start = int(token or 0)
+        end = start + page_size
+        videos = playlists[pid]
+        page = [
+            _item(vid, position=start + i) for i, vid in enumerate(videos[start:end])
+        ]
+        return page, str(end) if end < len(videos) else None
 
-
-def test_process_video_new_match():
-    youtube = Mock()
-    db = Mock()
-    db.execute.side_effect = [
-        Mock(fetchone=Mock(return_value=None)),
-        Mock(fetchone=Mock(return_value={"subscriptionId": "UC123"})),
-        None,
-        None,
-        None,
-    ]
-    tracker = PlaylistTracker(youtube, db, channel_id="UC123")
-    result = tracker._process_video("vid1", "PL99")
-    assert result is True
+    youtube.get_playlist_page.side_effect = get_playlist_page
+    return PlaylistTracker(youtube, db_con, channel_id="UC123")
 
 
-def test_process_video_already_counted():
-    youtube = Mock()
-    db = Mock()
-    db.execute.return_value.fetchone.return_value = {"counted": 1}
-    tracker = PlaylistTracker(youtube, db, channel_id="UC123")
-    result = tracker._process_video("vid1", "PL99")
-    assert result is False
+def _added_count(db_con, sub_id):
+    return db_con.execute(
+        "SELECT added_to_playlist_count FROM subscription WHERE id = ?", (sub_id,)
+    ).fetchone()[0]
 
 
-def test_process_video_not_in_videos_table():
-    youtube = Mock()
-    db = Mock()
-    db.execute.side_effect = [
-        Mock(fetchone=Mock(return_value=None)),
-        Mock(fetchone=Mock(return_value=None)),
-        None,
-    ]
-    tracker = PlaylistTracker(youtube, db, channel_id="UC123")
-    result = tracker._process_video("vid1", "PL99")
-    assert result is False
+def _tracking(db_con):
+    return {
+        (row["video_id"], row["source_playlist_id"]): row["counted"]
+        for row in db_con.execute("SELECT * FROM playlist_video_tracking")
+    }
 
 
-def test_run():
+def test_exclude_pipeline_playlists():
     youtube = Mock()
     youtube.get_user_playlists.return_value = [
-        type("Playlist", (), {"id": "PL1", "title": "Custom List"}),
-    ]
-    youtube.get_playlist.return_value = [
-        {
-            "snippet": {
-                "resourceId": {"videoId": "vid1"},
-                "videoOwnerChannelId": "UC123",
-                "title": "Video 1",
-                "publishedAt": "2024-01-01T00:00:00Z",
-            }
-        },
-    ]
-    db = MagicMock()
-    db.execute.return_value.fetchall.return_value = []
-    db.execute.return_value.fetchone.side_effect = [
-        None,
-        {"subscriptionId": "sub123"},
+        Playlist(id="PL1", title="Pipeline Dest"),
+        Playlist(id="PL2", title="Custom List"),
     ]
+    db = Mock()
+    db.execute.return_value.fetchall.return_value = [{"destination_playlist_id": "PL1"}]
 
     tracker = PlaylistTracker(youtube, db, channel_id="UC123")
+    playlists = tracker._get_playlists()
+    assert len(playlists) == 1
+    assert playlists[0]["id"] == "PL2"
+
+
+def test_run(db_con):
+    repo.insert_video(db_con, "vid1", "", "Video 1", "sub123")
+    tracker = _tracker(db_con, {"PL1": ["vid1"]})
     result = tracker.run()
 
     assert result == {
@@ -84,27 +95,118 @@ def test_run():
         "videos_found": 1,
         "videos_newly_counted": 1,
         "subscriptions_updated": 1,
+        "playlists_unchanged": 0,
     }
 
 
-def test_upgrade_from_counted_0_to_1():
-    youtube = Mock()
-    db = MagicMock()
+def test_reconcile_counts_ledger_videos_once(db_con):
+    repo.insert_subscription(db_con, "sub1", "Sub 1", "")
+    repo.insert_subscription(db_con, "sub2", "Sub 2", "")
+    repo.insert_video(db_con, "vid1", "", "Video vid1", "sub1", pipeline_id="p1")
+    repo.insert_video(db_con, "vid1", "", "Video vid1", "sub2", pipeline_id="p2")
+    repo.insert_video(db_con, "vid2", "", "Video vid2", "sub1", pipeline_id="p1")
+    tracker = _tracker(
+        db_con, {"PL1": ["vid1", "vid1", "vid2", "vid3"], "PL2": ["vid2"]}
+    )
+
+    assert tracker.run() == {
+        "playlists_processed": 2,
+        "videos_found": 5,
+        "videos_newly_counted": 3,
+        "subscriptions_updated": 1,
+        "playlists_unchanged": 0,
+    }
+    # The earliest ledger row of a video names its subscription
+    assert _added_count(db_con, "sub1") == 3
+    assert _added_count(db_con, "sub2") == 0
+    assert _tracking(db_con) == {
+        ("vid1", "PL1"): 1,
+        ("vid2", "PL1"): 1,
+        ("vid3", "PL1"): 0,
+        ("vid2", "PL2"): 1,
+    }
 
-    db.execute.return_value.fetchall.return_value = []
-    db.execute.return_value.fetchone.side_effect = [
-        None,
-        None,
-    ]
+    assert tracker.run()["videos_newly_counted"] == 0
+    assert _added_count(db_con, "sub1") == 3
 
-    tracker = PlaylistTracker(youtube, db, channel_id="UC123")
-    result1 = tracker._process_video("vid1", "PL99")
-    assert result1 is False
 
-    db.execute.return_value.fetchone.side_effect = [
-        {"counted": 0},
-        {"subscriptionId": "sub123"},
-    ]
+def test_upgrade_from_counted_0_to_1(db_con):
+    repo.insert_subscription(db_con, "sub123", "Sub", "")
+    tracker = _tracker(db_con, {"PL99": ["vid1"]})
+
+    assert tracker.run()["videos_newly_counted"] == 0
+    assert _tracking(db_con) == {("vid1", "PL99"): 0}
+
+    repo.insert_video(db_con, "vid1", "", "Video vid1", "sub123")
+    assert tracker.run()["videos_newly_counted"] == 1
+    assert _tracking(db_con) == {("vid1", "PL99"): 1}
+    assert _added_count(db_con, "sub123") == 1
+
+
+def test_unchanged_playlist_not_reread(db_con):
+    repo.insert_subscription(db_con, "sub1", "Sub 1", "")
+    tracker = _tracker(db_con, {"PL1": ["vid1", "vid2"]})
+    tracker.run()
+    tracker.youtube.get_playlist_page.reset_mock()
+
+    # A video routed since is counted from its tracking row
+    repo.insert_video(db_con, "vid2", "", "Video vid2", "sub1")
+    result = tracker.run()
+
+    tracker.youtube.get_playlist_page.assert_not_called()
+    assert result["playlists_unchanged"] == 1
+    assert result["videos_newly_counted"] == 1
+    assert result["subscriptions_updated"] == 1
+    assert _tracking(db_con) == {("vid1", "PL1"): 0, ("vid2", "PL1"): 1}
+
+
+def test_appended_playlist_reads_new_pages_only(db_con):
+    repo.insert_subscription(db_con, "sub1", "Sub 1", "")
+    playlists = {"PL1": ["vid1", "vid2", "vid3", "vid4", "vid5"]}
+    tracker = _tracker(db_con, playlists, page_size=2)
+    tracker.run()
+
+    playlists["PL1"] += ["vid6", "vid7"]
+    repo.insert_video(db_con, "vid7", "", "Video vid7", "sub1")
+    tracker.youtube.get_playlist_page.reset_mock()
+    result = tracker.run()
+
+    tokens = [c.args[1] for c in tracker.youtube.get_playlist_page.call_args_list]
+    assert tokens == ["4", "6"]
+    assert result["videos_found"] == 2
+    assert result["videos_newly_counted"] == 1
+    assert len(_tracking(db_con)) == 7
+
+    # Removing an item breaks the append check, so the playlist is read again
+    playlists["PL1"] = playlists["PL1"][1:] + ["vid8", "vid9"]
+    tracker.youtube.get_playlist_page.reset_mock()
+    result = tracker.run()
 
-    result2 = tracker._process_video("vid1", "PL99")
-    assert result2 is True
+    tokens = [c.args[1] for c in tracker.youtube.get_playlist_page.call_args_list]
+    assert tokens == ["6", None, "2", "4", "6"]
+    assert result["videos_found"] == 8
+    assert _tracking(db_con)[("vid8", "PL1")] == 0
+
+
+def test_pooled_reads_match_sequential(tmp_path):
+    from sortarr.core.client_pool import ClientPool
+
+    playlists = {f"PL{i}": [f"vid{i}_{j}" for j in range(5)] for i in range(6)}
+    results = []
+    for clients in (None, ClientPool(3)):
+        db_path = str(tmp_path / f"{bool(clients)}.db")
+        init_db(db_path)
+        con = sqlite3.connect(db_path)
+        con.row_factory = sqlite3.Row
+        repo.insert_video(con, "vid2_3", "", "Video", "sub1")
+        repo.insert_video(con, "vid5_0", "", "Video", "sub1")
+        tracker = _tracker(con, playlists, page_size=2)
+        if clients is not None:
+            # Pooled clients are spawned from the tracker's client
+            tracker.youtube.spawn.return_value = tracker.youtube
+            tracker.clients = clients
+        results.append((tracker.run(), _tracking(con)))
+        con.close()
+
+    assert results[0] == results[1]
+    assert results[1][0]["videos_newly_counted"] == 2
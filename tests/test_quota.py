@@ -0,0 +1,62 @@
+import sqlite3
+from datetime import datetime, timezone
+import pytest
+from sortarr.core.quota import QuotaLedger, quota_day
+from sortarr.db.migrations import init_db
+from sortarr.db.repository.quota import get_quota_usage
+
+
+@pytest.fixture
+def db_con(tmp_path):
+    db_path = str(tmp_path / "test.db")
+    init_db(db_path)
+    con = sqlite3.connect(db_path)
+    con.row_factory = sqlite3.Row
+    yield con
+    con.close()
+
+
+def test_quota_day_uses_pacific_reset():
+    # 07:59 UTC is still the previous day in Los Angeles (UTC-8 in winter)
+    assert quota_day(datetime(2024, 1, 2, 7, 59, tzinfo=timezone.utc)) == "2024-01-01"
+    assert quota_day(datetime(2024, 1, 2, 8, 0, tzinfo=timezone.utc)) == "2024-01-02"
+
+
+def test_ledger_records_endpoint_costs():
+    ledger = QuotaLedger(daily_budget=100)
+    ledger.record("activities.list")
+    ledger.record("playlistItems.insert")
+    assert ledger.used == 51
+    assert ledger.remaining == 49
+    assert not ledger.can_afford("playlistItems.insert")
+    assert ledger.can_afford("videos.list")
+
+
+def test_ledger_unlimited_budget():
+    ledger = QuotaLedger(daily_budget=0)
+    for _ in range(500):
+        ledger.record("playlistItems.insert")
+    assert ledger.remaining is None
+    assert ledger.can_afford("playlistItems.insert")
+
+
+def test_ledger_exhaust():
+    ledger = QuotaLedger(daily_budget=1000)
+    ledger.exhaust()
+    assert ledger.remaining == 0
+    assert not ledger.can_afford("videos.list")
+
+
+def test_ledger_persists_daily_total(db_con):
+    first = QuotaLedger()
+    first.record("playlistItems.insert")
+    first.flush(db_con)
+    first.flush(db_con)  # nothing new to write
+    assert get_quota_usage(db_con, quota_day()) == 50
+
+    second = QuotaLedger()
+    second.record("videos.list")
+    second.load(db_con)
+    assert second.used == 51
+    second.flush(db_con)
+    assert get_quota_usage(db_con, quota_day()) == 51
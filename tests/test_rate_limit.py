@@ -0,0 +1,49 @@
+import pytest
+from sortarr.core.rate_limit import RateLimiter, TokenBucket, endpoint_class
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_endpoint_class():
+    assert endpoint_class("playlistItems.insert") == "insert"
+    assert endpoint_class("playlistItems.list") == "list"
+    assert endpoint_class("unknown") == "list"
+
+
+def test_bucket_spaces_out_calls():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=0.1, capacity=1, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire() == 0
+    assert bucket.acquire() == pytest.approx(10)
+    clock.now += 4
+    assert bucket.acquire() == pytest.approx(6)
+    assert clock.sleeps == pytest.approx([10, 6])
+
+
+def test_bucket_allows_burst_up_to_capacity():
+    clock = FakeClock()
+    bucket = TokenBucket(rate=5, capacity=5, clock=clock, sleep=clock.sleep)
+    assert [bucket.acquire() for _ in range(5)] == [0] * 5
+    assert bucket.acquire() == pytest.approx(0.2)
+
+
+def test_bucket_unlimited():
+    bucket = TokenBucket(rate=0)
+    assert all(bucket.acquire() == 0 for _ in range(100))
+
+
+def test_limiter_does_not_pace_list_calls_by_insert_rate():
+    limiter = RateLimiter(insert_per_minute=1, list_per_second=0)
+    assert limiter.acquire("playlistItems.insert") == 0
+    assert all(limiter.acquire("activities.list") == 0 for _ in range(100))
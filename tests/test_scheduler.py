@@ -28,3 +28,19 @@ async def test_run_once_invokes_pipeline():
     scheduler = PipelineScheduler("0 */2 * * *", fake_pipeline)
     await scheduler.run_once()
     assert called
+
+
+@pytest.mark.asyncio
+async def test_outbox_drain_scheduled_after_quota_reset():
+    async def noop():
+        pass
+
+    scheduler = PipelineScheduler("0 */6 * * *", noop, outbox_fn=noop)
+    scheduler.start()
+    try:
+        job = scheduler.scheduler.get_job("insert_outbox")
+        assert job is not None
+        assert str(job.trigger.timezone) == "America/Los_Angeles"
+        assert job.next_run_time.hour == 0 and job.next_run_time.minute == 5
+    finally:
+        scheduler.stop()
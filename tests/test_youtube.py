@@ -59,3 +59,232 @@ def test_local_get_playlist(client):
 
 def test_api_call_tracking(client):
     assert client.api_calls[0] == 0
+
+
+def test_local_video_durations(client):
+    durations = client.get_video_durations(["a", "b"])
+    assert set(durations) == {"a", "b"}
+    assert all(d > 0 for d in durations.values())
+
+
+def test_video_durations_batches_ids(mock_credentials):
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    client._service = MagicMock()
+    client._service.videos.return_value.list.return_value.execute.side_effect = [
+        {"items": [{"id": "v0", "contentDetails": {"duration": "PT1M"}}]},
+        {"items": [{"id": "v50", "contentDetails": {"duration": "PT1H2S"}}]},
+    ]
+    ids = [f"v{i}" for i in range(60)]
+    durations = client.get_video_durations(ids)
+    assert durations == {"v0": 60, "v50": 3602}
+    calls = client._service.videos.return_value.list.call_args_list
+    assert len(calls) == 2
+    assert calls[0].kwargs["id"] == ",".join(ids[:50])
+    assert calls[1].kwargs["id"] == ",".join(ids[50:])
+
+
+def test_spawn_shares_call_accounting(client):
+    worker = client.spawn()
+    assert worker is not client
+    assert worker.credentials is client.credentials
+    assert worker.api_calls is client.api_calls
+    worker.close()
+
+
+def test_execute_records_quota_per_endpoint(mock_credentials):
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    request = MagicMock()
+    request.execute.return_value = {}
+    client._execute_with_retry(request, "playlistItems.insert")
+    client._execute_with_retry(request, "videos.list")
+    assert client.api_calls[0] == 2
+    assert client.quota.used == 51
+
+
+def test_quota_exceeded_exhausts_ledger(mock_credentials):
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    request = MagicMock()
+    request.execute.side_effect = HttpError(
+        httplib2.Response({"status": 403}),
+        b'{"error": {"errors": [{"reason": "quotaExceeded"}]}}',
+    )
+    with pytest.raises(HttpError):
+        client._execute_with_retry(request, "playlistItems.insert")
+    assert not client.quota.can_afford("playlistItems.insert")
+
+
+def test_failed_attempts_are_charged(mock_credentials, monkeypatch):
+    import httplib2
+    from googleapiclient.errors import HttpError
+    from sortarr.core import youtube
+
+    monkeypatch.setattr(youtube.time, "sleep", lambda seconds: None)
+    client = YouTubeAPIClient(credentials=mock_credentials, rate_limiter=MagicMock())
+    request = MagicMock()
+    request.execute.side_effect = [
+        HttpError(httplib2.Response({"status": 502}), b"Bad Gateway"),
+        {},
+    ]
+    client._execute_with_retry(request, "playlistItems.insert")
+    assert client.api_calls[0] == 2
+    assert client.quota.used == 100
+
+    request.execute.side_effect = HttpError(
+        httplib2.Response({"status": 404}), b"playlistNotFound"
+    )
+    with pytest.raises(HttpError):
+        client._execute_with_retry(request, "playlistItems.list")
+    assert client.quota.used == 101
+
+
+def test_execute_acquires_rate_limit_token(mock_credentials):
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    client.rate_limiter = MagicMock()
+    request = MagicMock()
+    request.execute.return_value = {}
+    client._execute_with_retry(request, "playlistItems.insert")
+    client.rate_limiter.acquire.assert_called_once_with("playlistItems.insert")
+    assert client.spawn().rate_limiter is client.rate_limiter
+
+
+def test_expired_credentials_refreshed_once_across_clients(mock_credentials):
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+
+    mock_credentials.valid = False
+    refreshes = []
+
+    def _refresh(_request):
+        refreshes.append(threading.get_ident())
+        mock_credentials.valid = True
+
+    mock_credentials.refresh.side_effect = _refresh
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    workers = [client.spawn() for _ in range(4)]
+    request = MagicMock()
+    request.execute.return_value = {}
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(
+            executor.map(
+                lambda worker: worker._execute_with_retry(request, "videos.list"),
+                workers,
+            )
+        )
+    assert len(refreshes) == 1
+    assert client.api_calls[0] == 4
+
+
+def _upload_item(video_id, published_at):
+    return {
+        "snippet": {"title": f"Title {video_id}", "publishedAt": published_at},
+        "contentDetails": {"videoId": video_id, "videoPublishedAt": published_at},
+    }
+
+
+def test_uploads_playlist_id():
+    from sortarr.core.youtube import uploads_playlist_id
+
+    assert uploads_playlist_id("UCabc123") == "UUabc123"
+
+
+def test_channel_uploads_stops_at_watermark(mock_credentials):
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    client._service = MagicMock()
+    items = client._service.playlistItems.return_value.list
+    items.return_value.execute.side_effect = [
+        {
+            "items": [
+                _upload_item("v3", "2024-06-03T00:00:00Z"),
+                _upload_item("v2", "2024-06-02T00:00:00Z"),
+            ],
+            "nextPageToken": "page2",
+        },
+        {
+            "items": [
+                _upload_item("v1", "2024-05-31T00:00:00Z"),
+                _upload_item("v0", "2024-05-30T00:00:00Z"),
+            ],
+            "nextPageToken": "page3",
+        },
+    ]
+    uploads = client.get_channel_uploads(
+        "UCabc", published_after="2024-06-01T00:00:00+00:00"
+    )
+    assert [a.video_id for a in uploads] == ["v3", "v2"]
+    assert items.call_count == 2
+    assert items.call_args_list[0].kwargs["playlistId"] == "UUabc"
+
+
+def test_channel_without_uploads_playlist_has_no_uploads(mock_credentials, caplog):
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    client._service = MagicMock()
+    items = client._service.playlistItems.return_value.list
+    items.return_value.execute.side_effect = HttpError(
+        httplib2.Response({"status": 404}),
+        b'{"error": {"errors": [{"reason": "playlistNotFound"}]}}',
+    )
+    with caplog.at_level("DEBUG", logger="sortarr.youtube"):
+        assert client.get_channel_uploads("UCabc") == []
+    assert not [r for r in caplog.records if r.levelname == "CRITICAL"]
+
+    items.return_value.execute.side_effect = HttpError(
+        httplib2.Response({"status": 404}), b"videoNotFound"
+    )
+    with pytest.raises(HttpError):
+        client.get_channel_uploads("UCabc")
+
+
+def test_channel_uploads_respects_limit(mock_credentials):
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    client._service = MagicMock()
+    items = client._service.playlistItems.return_value.list
+    items.return_value.execute.return_value = {
+        "items": [
+            _upload_item("v3", "2024-06-03T00:00:00Z"),
+            _upload_item("v2", "2024-06-02T00:00:00Z"),
+        ],
+        "nextPageToken": "more",
+    }
+    uploads = client.get_channel_uploads("UCabc", limit=2)
+    assert [a.video_id for a in uploads] == ["v3", "v2"]
+    assert items.call_count == 1
+    assert items.call_args.kwargs["maxResults"] == 2
+
+
+def test_add_to_playlist_returns_false_on_http_error(mock_credentials):
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    client = YouTubeAPIClient(credentials=mock_credentials)
+    client._service = MagicMock()
+    insert = client._service.playlistItems.return_value.insert
+    insert.return_value.execute.side_effect = HttpError(
+        httplib2.Response({"status": 404}), b"playlistNotFound"
+    )
+    assert client.add_to_playlist("PL1", "v1") is False
+
+
+def test_insert_playlist_item_leaves_transient_errors_to_caller(mock_credentials):
+    import httplib2
+    from googleapiclient.errors import HttpError
+
+    client = YouTubeAPIClient(credentials=mock_credentials, rate_limiter=MagicMock())
+    client._service = MagicMock()
+    playlist_items = client._service.playlistItems.return_value
+    playlist_items.insert.return_value.execute.side_effect = HttpError(
+        httplib2.Response({"status": 503}), b"backendError"
+    )
+    with pytest.raises(HttpError):
+        client.insert_playlist_item("PL1", "v1")
+    assert playlist_items.insert.return_value.execute.call_count == 1
+
+    playlist_items.list.return_value.execute.return_value = {"items": [{"id": "x"}]}
+    assert client.playlist_contains("PL1", "v1")
+    assert playlist_items.list.call_args.kwargs["videoId"] == "v1"